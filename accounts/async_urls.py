@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import async_views
+
+app_name = "accounts_async"
+
+urlpatterns = [
+    path("whoami/", async_views.whoami, name="whoami"),
+    path("user/profile/", async_views.user_profile, name="user_profile"),
+]
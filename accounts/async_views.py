@@ -0,0 +1,11 @@
+"""
+Async variants of the authenticated read views for the ASGI deployment. See
+`store.async_views`.
+"""
+
+from ecommerce.orm_pool import pooled
+
+from .views import UserProfileView, WhoAmIView
+
+whoami = pooled(WhoAmIView.as_view())
+user_profile = pooled(UserProfileView.as_view())
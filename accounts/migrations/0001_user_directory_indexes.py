@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# `auth_user` belongs to django.contrib.auth, so the indexes backing the admin
+# user directory's prefix search and filters are created here. They match the
+# `UPPER(col::text) LIKE UPPER('prefix%')` SQL that `istartswith` produces on
+# PostgreSQL, which needs `text_pattern_ops` to use an index.
+INDEXES = {
+    "accounts_user_username_prefix_idx": "(UPPER(username::text) text_pattern_ops)",
+    "accounts_user_email_prefix_idx": "(UPPER(email::text) text_pattern_ops)",
+    "accounts_user_first_name_prefix_idx": "(UPPER(first_name::text) text_pattern_ops)",
+    "accounts_user_last_name_prefix_idx": "(UPPER(last_name::text) text_pattern_ops)",
+    "accounts_user_staff_idx": "(id) WHERE is_staff",
+    "accounts_user_inactive_idx": "(id) WHERE NOT is_active",
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, definition in INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON auth_user {definition}"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -103,6 +103,24 @@ class UserSerializer(serializers.ModelSerializer):
         return is_admin
 
 
+class UserDirectorySerializer(UserSerializer):
+    """User row of the admin user directory, with order statistics."""
+
+    orders_count = serializers.IntegerField(read_only=True)
+    lifetime_spend = serializers.DecimalField(
+        max_digits=12, decimal_places=2, read_only=True
+    )
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + [
+            "is_active",
+            "date_joined",
+            "last_login",
+            "orders_count",
+            "lifetime_spend",
+        ]
+
+
 class LoginSerializer(serializers.ModelSerializer):
     """Login serializer authenticates and logs in a registered user."""
 
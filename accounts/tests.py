@@ -1,3 +1,75 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from rest_framework.test import APITestCase
+
+from store.models import Category, Order, OrderItem, Product, ProductType
+
+
+class UserDirectoryTestCase(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username="admin", is_staff=True)
+        self.alice = User.objects.create(
+            username="alice", email="alice@example.com", first_name="Alice"
+        )
+        self.bob = User.objects.create(
+            username="bob", email="bob@example.com", is_active=False
+        )
+
+        product = Product.objects.create(
+            product_type=ProductType.objects.create(name="book"),
+            category=Category.objects.create(name="django", slug="django"),
+            created_by=self.admin,
+            title="django stars",
+            slug="django-stars",
+            regular_price="20.99",
+            discount_price="10.00",
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        for is_paid in (True, True, False):
+            order = Order.objects.create(
+                created_by=self.alice,
+                tax="1.00",
+                shipping_charge="2.00",
+                is_paid=is_paid,
+            )
+            OrderItem.objects.create(product=product, order=order, quantity=3)
+            order.update_totals()
+
+        self.client.force_authenticate(self.admin)
+
+    def get_users(self, **params):
+        return self.client.get(reverse("accounts:all_users"), params).json()
+
+    def test_order_statistics_are_annotated_in_one_query(self):
+        with self.assertNumQueries(1):
+            users = {user["username"]: user for user in self.get_users()["users"]}
+
+        self.assertEqual(users["alice"]["orders_count"], 3)
+        self.assertEqual(users["alice"]["lifetime_spend"], 2 * (3 * 10 + 3))
+        self.assertEqual(users["bob"]["orders_count"], 0)
+        self.assertEqual(users["bob"]["lifetime_spend"], 0)
+
+    def test_prefix_search_and_filters(self):
+        self.assertEqual(
+            [user["username"] for user in self.get_users(search="ALI")["users"]],
+            ["alice"],
+        )
+        self.assertEqual(
+            [user["username"] for user in self.get_users(is_staff="true")["users"]],
+            ["admin"],
+        )
+        self.assertEqual(
+            [user["username"] for user in self.get_users(is_active="false")["users"]],
+            ["bob"],
+        )
+
+    def test_cursor_pagination(self):
+        first = self.get_users(page_size=2)
+        second = self.get_users(page_size=2, cursor=first["next"])
+
+        self.assertEqual(len(first["users"]), 2)
+        self.assertEqual([user["username"] for user in second["users"]], ["bob"])
+        self.assertIsNone(second["next"])
@@ -11,11 +11,59 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.hashers import make_password
-
+from django.db.models import (
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
+
+from ecommerce.pagination import KeysetPagination
+from store.models import ArchivedOrder, Order
 
 from .serializers import *
 
 
+def with_order_statistics(users):
+    """
+    Annotate each user's order count and lifetime spend on paid orders,
+    archived ones included. All are correlated subqueries, so only the rows
+    of the requested page pay for them.
+    """
+    money = DecimalField(max_digits=12, decimal_places=2)
+    orders = (
+        Order.objects.filter(created_by=OuterRef("pk")).order_by().values("created_by")
+    )
+    # Only paid orders are archived.
+    archived = (
+        ArchivedOrder.objects.filter(created_by=OuterRef("pk"))
+        .order_by()
+        .values("created_by")
+    )
+
+    def count(orders):
+        return Coalesce(Subquery(orders.annotate(count=Count("id")).values("count")), 0)
+
+    def spend(orders):
+        return Coalesce(
+            Subquery(orders.annotate(total=Sum("total_price")).values("total")),
+            Value(0),
+            output_field=money,
+        )
+
+    return users.annotate(
+        orders_count=count(orders) + count(archived),
+        lifetime_spend=ExpressionWrapper(
+            spend(orders.filter(is_paid=True)) + spend(archived), output_field=money
+        ),
+    )
+
+
 class CSRFTokenView(APIView):
     """Generate CSRF Token"""
 
@@ -137,17 +185,52 @@ class UpdateUserProfileView(APIView):
 
 
 class UserListView(APIView):
-    """Get a list of users."""
+    """
+    Get a page of users for the admin user directory.
+
+    Supports `?search=` (prefix match on username, email and name),
+    `?is_staff=` / `?is_active=` filters and the `next` cursor of the
+    previous page as `?cursor=`.
+    """
 
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAdminUser]
-    serializer_class = UserSerializer
+    serializer_class = UserDirectorySerializer
 
-    def get(self, request):
+    search_fields = ["username", "email", "first_name", "last_name"]
+    boolean_filters = ["is_staff", "is_active"]
+
+    def get_queryset(self, request):
         users = User.objects.all()
+
+        search = request.query_params.get("search", "").strip()
+        if search:
+            # `istartswith` is served by the UPPER(...) text_pattern_ops
+            # indexes created in the accounts migrations.
+            condition = Q()
+            for field in self.search_fields:
+                condition |= Q(**{f"{field}__istartswith": search})
+            users = users.filter(condition)
+
+        for field in self.boolean_filters:
+            value = request.query_params.get(field)
+            if value is not None:
+                users = users.filter(**{field: value.lower() in ("1", "true")})
+
+        return with_order_statistics(users)
+
+    def get(self, request):
+        paginator = KeysetPagination(("id",))
+        users = paginator.paginate_queryset(self.get_queryset(request), request)
         serializer = self.serializer_class(users, many=True)
 
-        return Response({"users": serializer.data, "status": status.HTTP_200_OK})
+        return Response(
+            {
+                "users": serializer.data,
+                "next": paginator.next_cursor,
+                "status": status.HTTP_200_OK,
+            }
+        )
 
 
 class GetUserByIdView(APIView):
@@ -0,0 +1,190 @@
+"""
+Compare throughput and tail latency of the WSGI and ASGI serving paths.
+
+Start both servers against the same database, e.g.
+
+    gunicorn ecommerce.wsgi -w 2 -b 127.0.0.1:8000
+    gunicorn ecommerce.asgi:application -c gunicorn_asgi.conf.py -b 127.0.0.1:8001
+
+then run
+
+    python benchmarks/serving.py \
+        --target wsgi=http://127.0.0.1:8000/api/products/ \
+        --target asgi=http://127.0.0.1:8001/api/async/products/ \
+        --concurrency 200 --slow-clients 50 --duration 30
+
+Every shopper keeps one keep-alive connection open and requests the target in
+a loop. Slow clients trickle their request headers a few bytes at a time,
+the way a shopper on a poor mobile connection would. Only the regular
+shoppers are timed, so the report shows how much slow clients hurt everybody
+else. Uses only the standard library.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+class Connection:
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.reader = self.writer = None
+
+    def request_bytes(self):
+        return (
+            f"GET {self.path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Accept: application/json\r\n"
+            "Connection: keep-alive\r\n"
+            "\r\n"
+        ).encode("ascii")
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+    async def send(self, data, trickle=None):
+        if trickle is None:
+            self.writer.write(data)
+        else:
+            chunk, delay = trickle
+            for start in range(0, len(data), chunk):
+                self.writer.write(data[start : start + chunk])
+                await self.writer.drain()
+                await asyncio.sleep(delay)
+        await self.writer.drain()
+
+    async def read_response(self):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("server closed the connection")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await self.reader.readexactly(int(headers.get("content-length", 0)))
+
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status
+
+    async def get(self, trickle=None):
+        if self.writer is None:
+            await self.open()
+        await self.send(self.request_bytes(), trickle)
+        return await self.read_response()
+
+
+async def shopper(url, deadline, latencies, errors, trickle=None):
+    connection = Connection(url)
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            status = await connection.get(trickle)
+        except (ConnectionError, asyncio.IncompleteReadError, OSError):
+            errors.append("connection")
+            await connection.close()
+            continue
+        if status >= 400:
+            errors.append(status)
+        elif latencies is not None:
+            latencies.append(time.perf_counter() - started)
+    await connection.close()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(url, args):
+    latencies, errors = [], []
+    deadline = time.monotonic() + args.duration
+    trickle = (args.slow_chunk, args.slow_delay)
+
+    tasks = [
+        shopper(url, deadline, latencies, errors) for _ in range(args.concurrency)
+    ] + [
+        shopper(url, deadline, None, errors, trickle) for _ in range(args.slow_clients)
+    ]
+    started = time.monotonic()
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - started
+
+    if not latencies:
+        return {"requests": 0, "errors": len(errors)}
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p90": percentile(latencies, 0.90) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "max": max(latencies) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--target",
+        action="append",
+        required=True,
+        help="name=url of an endpoint to load, may be repeated",
+    )
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--slow-clients", type=int, default=0)
+    parser.add_argument(
+        "--slow-chunk", type=int, default=8, help="bytes per slow client write"
+    )
+    parser.add_argument(
+        "--slow-delay", type=float, default=0.05, help="seconds between slow writes"
+    )
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+
+    print(
+        f"{'target':<10}{'requests':>10}{'errors':>8}{'req/s':>10}"
+        f"{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    )
+    for target in args.target:
+        name, _, url = target.partition("=")
+        result = asyncio.run(run(url, args))
+        if not result["requests"]:
+            print(f"{name:<10}{0:>10}{result['errors']:>8}")
+            continue
+        print(
+            f"{name:<10}{result['requests']:>10}{result['errors']:>8}"
+            f"{result['rps']:>10.1f}{result['p50']:>10.1f}{result['p90']:>10.1f}"
+            f"{result['p99']:>10.1f}{result['max']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Measure worker boot cost: import time per package, cold start to the first
+response and peak resident memory, for one or more settings profiles.
+
+    python benchmarks/startup.py \
+        --settings ecommerce.settings \
+        --settings ecommerce.settings_production
+
+Every run is a fresh interpreter that imports the WSGI application and
+answers one request internally, the way a newly started worker does. Cold
+start is the wall time from spawning that process until it exits, so it
+includes interpreter start-up. Import times come from a separate run under
+``python -X importtime`` (which slows imports down) and are the self time of
+each module, summed per top-level package. Needs a reachable DATABASE_URL
+when the request touches the database. Uses only the standard library.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def child(path):
+    import resource
+
+    sys.path.insert(0, str(BASE_DIR))
+    from ecommerce.warmup import send_request
+    from ecommerce.wsgi import application
+
+    status = send_request(application, path)
+    # Kilobytes on Linux.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"status": status, "max_rss_kb": max_rss}))
+
+
+def spawn(settings, path, importtime=False):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings)
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += [__file__, "--child", "--path", path]
+
+    started = time.perf_counter()
+    result = subprocess.run(
+        command, env=env, cwd=BASE_DIR, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode:
+        raise SystemExit(f"{settings}: worker failed\n{result.stderr}")
+    return elapsed, json.loads(result.stdout.splitlines()[-1]), result.stderr
+
+
+def import_times(stderr):
+    """Self time in milliseconds per top-level package."""
+    packages = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            # The header line.
+            continue
+        packages[name.strip().split(".")[0]] += int(self_us) / 1000
+    return packages
+
+
+def measure(settings, path, runs):
+    cold_starts, max_rss = [], []
+    for _ in range(runs):
+        elapsed, result, _ = spawn(settings, path)
+        cold_starts.append(elapsed * 1000)
+        max_rss.append(result["max_rss_kb"] / 1024)
+    _, result, stderr = spawn(settings, path, importtime=True)
+    return {
+        "status": result["status"],
+        "cold_start": statistics.median(cold_starts),
+        "max_rss": statistics.median(max_rss),
+        "imports": import_times(stderr),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--settings",
+        action="append",
+        help="settings module to measure, may be repeated "
+        "(default: ecommerce.settings and ecommerce.settings_production)",
+    )
+    parser.add_argument("--path", default="/api/products/")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--top", type=int, default=15, help="packages to list by import time"
+    )
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.path)
+        return
+
+    profiles = args.settings or ["ecommerce.settings", "ecommerce.settings_production"]
+    results = {
+        settings: measure(settings, args.path, args.runs) for settings in profiles
+    }
+
+    print(f"{'settings':<32}{'status':>16}{'cold start ms':>15}{'max RSS MiB':>13}")
+    for settings, result in results.items():
+        print(
+            f"{settings:<32}{result['status']:>16}"
+            f"{result['cold_start']:>15.1f}{result['max_rss']:>13.1f}"
+        )
+
+    for settings, result in results.items():
+        imports = result["imports"]
+        print(f"\nimport time by package, {settings}: {sum(imports.values()):.1f} ms")
+        for package, ms in imports.most_common(args.top):
+            print(f"  {package:<30}{ms:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Swagger API docs at the site root, served from a prebuilt schema.
+
+Generating the schema introspects every view and serializer, so it is built
+once, by ``manage.py build_api_schema`` at deploy time or else on the first
+request for the docs, and saved to ``API_SCHEMA_FILE`` along with a
+fingerprint of the URL conf. Each process loads the saved schema and only
+regenerates it when the URL conf no longer matches the fingerprint. Responses
+carry an ETag, so repeat visits, crawlers and health checks get a 304.
+
+As before, the schema is the one an anonymous visitor sees, without the
+endpoints that need authentication.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from coreapi.codecs import CoreJSONCodec
+from django.conf import settings
+from django.http import HttpRequest
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework.permissions import AllowAny
+from rest_framework.renderers import CoreJSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.schemas.coreapi import SchemaGenerator
+from rest_framework.schemas.generators import EndpointEnumerator
+from rest_framework.views import APIView
+from rest_framework_swagger import renderers
+from rest_framework_swagger.settings import swagger_settings
+
+TITLE = "Ecart API"
+
+_lock = threading.Lock()
+_schema = None
+
+
+class ApiSchema:
+    """A generated schema, encoded once per format."""
+
+    def __init__(self, fingerprint, corejson, openapi):
+        self.fingerprint = fingerprint
+        self.corejson = corejson
+        self.openapi = openapi
+        self.digest = hashlib.sha256((corejson + openapi).encode()).hexdigest()[:32]
+
+    def etag(self, format):
+        return f'"{self.digest}-{format}"'
+
+    def to_json(self):
+        return {
+            "fingerprint": self.fingerprint,
+            "corejson": self.corejson,
+            "openapi": self.openapi,
+        }
+
+
+def url_conf_fingerprint():
+    """Hash of every documented route and the view class behind it."""
+    digest = hashlib.sha256()
+    for path, method, callback in EndpointEnumerator().get_api_endpoints():
+        view = callback.cls
+        digest.update(
+            f"{path} {method} {view.__module__}.{view.__qualname__}\n".encode()
+        )
+    return digest.hexdigest()
+
+
+def build_schema(fingerprint=None):
+    # A request without authenticators is anonymous. The relative url keeps
+    # the host out of the spec, so the docs work on any domain.
+    request = Request(HttpRequest())
+    document = SchemaGenerator(title=TITLE, url="/").get_schema(request=request)
+    options = renderers.OpenAPIRenderer().get_customizations()
+    return ApiSchema(
+        fingerprint or url_conf_fingerprint(),
+        CoreJSONCodec().encode(document).decode(),
+        renderers.OpenAPICodec().encode(document, **options).decode(),
+    )
+
+
+def save_schema(schema, path=None):
+    path = path or settings.API_SCHEMA_FILE
+    directory = os.path.dirname(os.path.abspath(path))
+    # Written aside and renamed, so concurrent workers never read half a file.
+    with tempfile.NamedTemporaryFile("w", dir=directory, delete=False) as file:
+        json.dump(schema.to_json(), file)
+    os.chmod(file.name, 0o644)
+    os.replace(file.name, path)
+
+
+def load_schema(path=None):
+    try:
+        with open(path or settings.API_SCHEMA_FILE) as file:
+            return ApiSchema(**json.load(file))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def get_api_schema():
+    """The schema for the current URL conf, generated only if it changed."""
+    global _schema
+    if _schema is not None:
+        return _schema
+
+    with _lock:
+        if _schema is None:
+            fingerprint = url_conf_fingerprint()
+            schema = load_schema()
+            if schema is None or schema.fingerprint != fingerprint:
+                schema = build_schema(fingerprint)
+                try:
+                    save_schema(schema)
+                except OSError:
+                    # A read-only deploy still serves it from memory.
+                    pass
+            _schema = schema
+    return _schema
+
+
+class CoreJSONSchemaRenderer(CoreJSONRenderer):
+    def render(self, data, media_type=None, renderer_context=None):
+        if isinstance(data, ApiSchema):
+            return data.corejson.encode()
+        return super().render(data, media_type, renderer_context)
+
+
+class OpenAPISchemaRenderer(renderers.OpenAPIRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, ApiSchema):
+            return data.openapi.encode()
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+class SwaggerUISchemaRenderer(renderers.SwaggerUIRenderer):
+    def set_context(self, data, renderer_context):
+        renderer_context["USE_SESSION_AUTH"] = swagger_settings.USE_SESSION_AUTH
+        renderer_context.update(self.get_auth_urls())
+        renderer_context["drs_settings"] = json.dumps(self.get_ui_settings())
+        renderer_context["spec"] = data.openapi
+
+
+class SchemaView(APIView):
+    """Swagger UI, OpenAPI and CoreJSON renderings of the API schema."""
+
+    schema = None
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    renderer_classes = [
+        CoreJSONSchemaRenderer,
+        OpenAPISchemaRenderer,
+        SwaggerUISchemaRenderer,
+    ]
+
+    def get(self, request):
+        schema = get_api_schema()
+        etag = schema.etag(request.accepted_renderer.format)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(schema)
+        response["ETag"] = etag
+        # The formats share a URL and are picked by the Accept header.
+        patch_vary_headers(response, ["Accept"])
+        return response
@@ -0,0 +1,120 @@
+"""
+Read-replica routing.
+
+Reads go to the primary (``default``) unless something opted in to replica
+reads: a view with ``replica_reads = True`` (see `ReplicaRoutingMiddleware`)
+or code running inside `use_replica()`, such as reports and exports. Even
+then the primary is used when
+
+* the current request, or a transaction in progress, has written,
+* the client wrote within the last ``REPLICA_PIN_SECONDS`` (pin cookie), or
+* every replica lags more than ``REPLICA_MAX_LAG`` seconds behind.
+
+Writes and migrations always go to the primary.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+PIN_COOKIE = "db_pin"
+
+
+class RoutingState:
+    def __init__(self, replica_reads=False):
+        self.replica_reads = replica_reads
+        self.wrote = False
+
+
+_state = ContextVar("db_routing_state", default=None)
+
+# alias -> (checked at, lag in seconds), per process
+_lag_cache = {}
+
+
+@contextmanager
+def routing_state(replica_reads=False):
+    state = RoutingState(replica_reads)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def use_replica():
+    """Send the reads made inside the block to a replica where possible."""
+    with routing_state(replica_reads=True) as state:
+        yield state
+
+
+def replica_aliases():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def replica_lag(alias):
+    """Seconds `alias` trails the primary, re-measured at most every few seconds."""
+    interval = getattr(settings, "REPLICA_LAG_CHECK_INTERVAL", 5)
+    checked_at, lag = _lag_cache.get(alias, (None, 0.0))
+    now = time.monotonic()
+    if checked_at is not None and now - checked_at < interval:
+        return lag
+
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        lag = 0.0
+    else:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT CASE"
+                    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+                    " ELSE COALESCE(EXTRACT(EPOCH FROM"
+                    " now() - pg_last_xact_replay_timestamp()), 0)"
+                    " END"
+                )
+                lag = float(cursor.fetchone()[0])
+        except DatabaseError:
+            # An unreachable replica is as good as an infinitely lagging one.
+            lag = float("inf")
+
+    _lag_cache[alias] = (now, lag)
+    return lag
+
+
+def healthy_replicas():
+    max_lag = getattr(settings, "REPLICA_MAX_LAG", 5)
+    return [alias for alias in replica_aliases() if replica_lag(alias) <= max_lag]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica_reads or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads inside a transaction must see its own writes.
+            return DEFAULT_DB_ALIAS
+
+        replicas = healthy_replicas()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
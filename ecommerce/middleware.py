@@ -0,0 +1,95 @@
+import asyncio
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from .db_router import PIN_COOKIE, routing_state
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise middleware that also runs natively under ASGI.
+
+    The upstream middleware is sync-only, which makes Django push the rest of
+    the middleware chain, async views included, through a single thread.
+    Looking a static file up is an in-memory dict access, so it is safe to do
+    on the event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Tell Django this instance is a coroutine function.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        response = self.process_request(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let views with ``replica_reads = True`` read from the database replicas.
+
+    Clients that just wrote get a short-lived pin cookie that keeps their
+    reads on the primary until the replicas have caught up, so a shopper
+    always sees their own order right after checkout. The frontend calls the
+    API cross-site, so the cookie is ``SameSite=None; Secure``; with ``Lax``
+    browsers would not send it back.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def replica_reads_allowed(self, request):
+        if request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES:
+            return False
+        try:
+            view = resolve(request.path_info).func
+        except Resolver404:
+            return False
+        view_class = getattr(view, "cls", None) or getattr(view, "view_class", None)
+        return getattr(view_class, "replica_reads", False)
+
+    def pin(self, request, response, state):
+        if state.wrote or request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=getattr(settings, "REPLICA_PIN_SECONDS", 10),
+                httponly=True,
+                samesite="None",
+                secure=True,
+            )
+        return response
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        with routing_state(self.replica_reads_allowed(request)) as state:
+            response = self.get_response(request)
+        return self.pin(request, response, state)
+
+    async def __acall__(self, request):
+        with routing_state(self.replica_reads_allowed(request)) as state:
+            response = await self.get_response(request)
+        return self.pin(request, response, state)
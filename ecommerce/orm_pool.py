@@ -0,0 +1,68 @@
+"""
+Run blocking Django/DRF work from async views on a bounded thread pool.
+
+Django 3.2 runs sync views served over ASGI in a single shared thread, so a
+slow query would stall every other request in the worker. The async views
+in `store.async_views` and `accounts.async_views` instead hand their ORM
+work to this pool, whose size (``ASYNC_ORM_THREADS``) also caps how many
+database connections one worker opens. Everything else, including idle
+keep-alive connections, stays on the event loop.
+"""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "ASYNC_ORM_THREADS", 8),
+            thread_name_prefix="orm",
+        )
+    return _executor
+
+
+def _call(func, args, kwargs):
+    # Pool threads outlive requests, so recycle their connections the way
+    # Django does around every request.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # Carry context variables, such as the database routing state, over.
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(), functools.partial(context.run, _call, func, args, kwargs)
+    )
+
+
+def pooled(view):
+    """
+    Turn a sync view into an async one that runs, and renders, on the pool.
+    The wrapped view keeps its payloads, authentication and permissions.
+    """
+
+    def render(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, "render", None)):
+            response.render()
+        return response
+
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await run_in_pool(render, request, *args, **kwargs)
+
+    return async_view
@@ -13,6 +13,10 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 from pathlib import Path
 import os
 from datetime import timedelta
+from decimal import Decimal
+from importlib.util import find_spec
+
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -47,12 +51,27 @@ INSTALLED_APPS = [
     "corsheaders",
     "rest_framework_swagger",
     "storages",
-    "django_seed",
 ]
 
+# Apps only needed while developing. They are not in requirements.txt, so they
+# are loaded only when installed, and the production profile
+# (ecommerce/settings_production.py) leaves them out altogether.
+DEV_APPS = ["whitenoise.runserver_nostatic", "django_seed"]
+if find_spec("django_seed"):
+    INSTALLED_APPS.append("django_seed")
+
+# Serve the Swagger API docs at the site root.
+SERVE_API_DOCS = True
+# Prebuilt schema for the docs, written by `manage.py build_api_schema` or on
+# the first request for them (see ecommerce/api_docs.py).
+API_SCHEMA_FILE = os.getenv(
+    "API_SCHEMA_FILE", os.path.join(BASE_DIR, "api_schema.json")
+)
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "ecommerce.middleware.ReplicaRoutingMiddleware",
+    "ecommerce.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -112,6 +131,36 @@ SIMPLE_JWT = {
     "TOKEN_TYPE_CLAIM": "token_type",
 }
 
+# How long an unpaid order holds its stock before the
+# `release_expired_reservations` sweeper gives it back.
+STOCK_RESERVATION_TTL = timedelta(minutes=30)
+
+# How long a stored `Idempotency-Key` response is replayed for retries.
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+# How long after delivery a paid order stays in the order tables before
+# `archive_orders` moves it to the archive.
+ORDER_ARCHIVE_AFTER = timedelta(days=365)
+
+# How long, in seconds, the specification names of a product type are
+# cached. Saving a specification clears them, but only in the cache of the
+# process that saved it unless CACHES points at a shared cache.
+SPECIFICATION_NAMES_TTL = 5 * 60
+
+# How long, in seconds, a process answers autocomplete from its in-memory
+# index before reloading it. Saves update the index at once, but only in the
+# process that made them. Products rank by their paid units over the last
+# AUTOCOMPLETE_POPULAR_DAYS.
+AUTOCOMPLETE_TTL = 5 * 60
+AUTOCOMPLETE_POPULAR_DAYS = 90
+
+# Cart pricing, used by the cart quote and by checkout. Orders under
+# CART_FREE_SHIPPING_OVER pay CART_SHIPPING_CHARGE. No tax or shipping is
+# charged unless the environment sets them.
+CART_TAX_RATE = Decimal(os.environ.get("CART_TAX_RATE", "0"))
+CART_SHIPPING_CHARGE = Decimal(os.environ.get("CART_SHIPPING_CHARGE", "0.00"))
+CART_FREE_SHIPPING_OVER = Decimal(os.environ.get("CART_FREE_SHIPPING_OVER", "0.00"))
+
 CSRF_COOKIE_SAMESITE = "Lax"
 SESSION_COOKIE_SAMESITE = "Lax"
 CSRF_COOKIE_HTTPONLY = True
@@ -123,15 +172,30 @@ CORS_ALLOWED_ORIGINS = [
     "https://ecart-ui.vercel.app",
 ]
 
+CORS_ALLOW_HEADERS = list(default_headers) + ["idempotency-key"]
+
 CORS_EXPOSE_HEADERS = [
     "Content-Type",
     "X-CSRFToken",
+    "Idempotent-Replayed",
 ]
 
 CORS_ALLOW_CREDENTIALS = True
 
 WSGI_APPLICATION = "ecommerce.wsgi.application"
 
+# Read-only requests each gunicorn worker answers internally before it takes
+# traffic (see ecommerce/warmup.py and gunicorn.conf.py).
+WARMUP_URLS = ["/api/categories/", "/api/products/", "/api/products/top/"]
+
+# In-memory indexes loaded once in the gunicorn master, so forked workers
+# share them.
+WARMUP_LOADERS = ["store.autocomplete.load"]
+
+# Size of the thread pool the async views run their ORM work on, per ASGI
+# worker. Each pool thread holds at most one database connection.
+ASYNC_ORM_THREADS = int(os.getenv("ASYNC_ORM_THREADS", 8))
+
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
@@ -226,6 +290,27 @@ import dj_database_url
 
 DATABASES["default"].update(dj_database_url.config(conn_max_age=600))
 
+# Read replicas, as a comma separated list of database URLs in
+# $DATABASE_REPLICA_URLS. Safe reads of views with `replica_reads = True`
+# go to them (see ecommerce/db_router.py). Under test they mirror `default`,
+# so `DATABASE_REPLICA_URLS=$DATABASE_URL` exercises the routing locally.
+DATABASE_REPLICAS = []
+for number, url in enumerate(
+    filter(None, os.getenv("DATABASE_REPLICA_URLS", "").split(",")), start=1
+):
+    alias = f"replica_{number}"
+    DATABASES[alias] = dj_database_url.parse(url.strip(), conn_max_age=600)
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["ecommerce.db_router.ReplicaRouter"]
+
+# Replicas further behind the primary than this many seconds are skipped.
+REPLICA_MAX_LAG = 5
+REPLICA_LAG_CHECK_INTERVAL = 5
+# How long a client that wrote keeps reading from the primary.
+REPLICA_PIN_SECONDS = 10
+
 # Honor the 'X-Forwarded-Proto' header for request.is_secure()
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
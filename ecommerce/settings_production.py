@@ -0,0 +1,18 @@
+"""
+Production settings profile for the web workers.
+
+The development settings without the apps the workers never use, so each
+worker boots faster and holds less memory. Selected by the gunicorn
+configurations; set DJANGO_SETTINGS_MODULE=ecommerce.settings_production
+for management commands run in production too.
+
+Set SERVE_API_DOCS=false to also drop the Swagger docs at the site root.
+"""
+
+from .settings import *
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in DEV_APPS]
+
+SERVE_API_DOCS = os.getenv("SERVE_API_DOCS", "true").lower() == "true"
+if not SERVE_API_DOCS:
+    INSTALLED_APPS.remove("rest_framework_swagger")
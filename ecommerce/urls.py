@@ -3,17 +3,38 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.conf.urls import url
+from django.views.decorators.csrf import csrf_exempt
+from functools import lru_cache
 
-from rest_framework_swagger.views import get_swagger_view
 
-schema_view = get_swagger_view(title="Ecart API")
+@lru_cache(maxsize=None)
+def get_schema_view():
+    # Imported on first use: the docs renderers pull in openapi_codec and
+    # simplejson, which no API request needs.
+    from ecommerce.api_docs import SchemaView
+
+    return SchemaView.as_view()
+
+
+@csrf_exempt
+def schema_view(request, *args, **kwargs):
+    return get_schema_view()(request, *args, **kwargs)
+
 
 urlpatterns = [
-    url(r"^$", schema_view),
     path("admin/", admin.site.urls),
     path("api/", include("store.urls", namespace="store")),
     path("api/accounts/", include("accounts.urls", namespace="accounts")),
+    # Async variants of the read-heavy endpoints, for the ASGI workers
+    path("api/async/", include("store.async_urls", namespace="store_async")),
+    path(
+        "api/async/accounts/",
+        include("accounts.async_urls", namespace="accounts_async"),
+    ),
 ]
 
+if settings.SERVE_API_DOCS:
+    urlpatterns.insert(0, url(r"^$", schema_view))
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
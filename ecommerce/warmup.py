@@ -0,0 +1,152 @@
+"""
+Application warm-up for pre-forked gunicorn workers.
+
+`preload()` runs once in the gunicorn master (``preload_app``) and does the
+work every worker would otherwise repeat on its first requests: importing
+the views and their dependencies, compiling the URL resolvers, building
+serializer fields, which fills the model ``_meta`` caches, and running the
+``WARMUP_LOADERS`` that fill in-memory indexes. Workers inherit all of it
+through fork. `warm_worker()` then runs in each worker: it opens
+the worker's own database connection and sends a few read-only requests
+through the real WSGI application, so the first shopper hits a warm process.
+
+Both return a dict of phase name to milliseconds for the gunicorn log.
+"""
+
+import io
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils.module_loading import import_string
+from rest_framework.serializers import BaseSerializer
+
+
+@contextmanager
+def timed(timings, phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = (time.perf_counter() - started) * 1000
+
+
+def format_timings(timings):
+    total = sum(timings.values())
+    phases = ", ".join(f"{phase} {ms:.1f} ms" for phase, ms in timings.items())
+    return f"{total:.1f} ms ({phases})"
+
+
+def _views(resolver):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _views(pattern)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.callback
+
+
+def prime_url_resolvers():
+    resolver = get_resolver()
+    # Populating compiles every pattern and the reverse lookup tables.
+    resolver._populate()
+    return resolver
+
+
+def _build_fields(serializer):
+    # Building the field map introspects, and so caches, the model _meta.
+    for field in serializer.fields.values():
+        field = getattr(field, "child", field)
+        if isinstance(field, BaseSerializer):
+            _build_fields(field)
+
+
+def prime_serializers(resolver):
+    seen = set()
+    for view in _views(resolver):
+        view_class = getattr(view, "cls", None)
+        serializer_class = getattr(view_class, "serializer_class", None)
+        if serializer_class is None or serializer_class in seen:
+            continue
+        seen.add(serializer_class)
+        _build_fields(serializer_class())
+
+
+def preload():
+    """Warm the parts of the process that forked workers share."""
+    timings = {}
+    with timed(timings, "urls"):
+        resolver = prime_url_resolvers()
+    with timed(timings, "serializers"):
+        prime_serializers(resolver)
+    for loader in getattr(settings, "WARMUP_LOADERS", []):
+        with timed(timings, loader):
+            try:
+                import_string(loader)()
+            except DatabaseError:
+                # The worker loads it on first use instead.
+                pass
+    # Connections must never be shared with forked workers.
+    connections.close_all()
+    return timings
+
+
+def _environ(path):
+    return {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "SCRIPT_NAME": "",
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "localhost",
+        "HTTP_ACCEPT": "application/json",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+
+
+def send_request(application, path):
+    status = []
+
+    def start_response(response_status, headers, exc_info=None):
+        status.append(response_status)
+
+    response = application(_environ(path), start_response)
+    try:
+        for _ in response:
+            pass
+    finally:
+        if hasattr(response, "close"):
+            response.close()
+    return status[0] if status else None
+
+
+def warm_worker(application, log=None):
+    """Open this worker's connections and serve a few requests internally."""
+    timings = {}
+    with timed(timings, "connections"):
+        for alias in connections:
+            try:
+                connections[alias].ensure_connection()
+            except DatabaseError as exc:
+                if log is not None:
+                    log.warning("Warm-up could not connect to %s: %s", alias, exc)
+
+    for path in settings.WARMUP_URLS:
+        with timed(timings, path):
+            try:
+                status = send_request(application, path)
+            except Exception as exc:
+                status = repr(exc)
+        if log is not None and not str(status).startswith("2"):
+            log.warning("Warm-up request to %s answered %s", path, status)
+    return timings
@@ -0,0 +1,30 @@
+"""
+Gunicorn configuration for the WSGI deployment (see Procfile).
+
+The application is loaded and warmed up once in the master, then forked, so
+every worker starts with the imports, URL resolvers and serializer metadata
+in place. Each worker then opens its database connection and answers a few
+warm-up requests before it accepts traffic. See ecommerce/warmup.py.
+"""
+
+import os
+
+# The lean production profile, unless the environment picks another one.
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ecommerce.settings_production")
+
+bind = "0.0.0.0:" + os.getenv("PORT", "8000")
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+preload_app = True
+
+
+def when_ready(server):
+    from ecommerce.warmup import format_timings, preload
+
+    server.log.info("Master warm-up took %s", format_timings(preload()))
+
+
+def post_worker_init(worker):
+    from ecommerce.warmup import format_timings, warm_worker
+
+    timings = warm_worker(worker.wsgi, log=worker.log)
+    worker.log.info("Worker %s warm-up took %s", worker.pid, format_timings(timings))
@@ -0,0 +1,37 @@
+"""
+Gunicorn configuration for the ASGI deployment:
+
+    gunicorn ecommerce.asgi:application -c gunicorn_asgi.conf.py
+
+Each worker is a single uvicorn event loop. Open connections, including idle
+keep-alive ones and slow clients, cost a socket on the loop rather than a
+worker process, and database work runs on a pool of ASYNC_ORM_THREADS
+threads per worker. Size the database for
+WEB_CONCURRENCY * (ASYNC_ORM_THREADS + 1) connections.
+"""
+
+import os
+
+# The lean production profile, unless the environment picks another one.
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ecommerce.settings_production")
+
+bind = "0.0.0.0:" + os.getenv("PORT", "8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+
+# Passed on to uvicorn as its keep-alive timeout. Keep it above the idle
+# timeout of the load balancer in front (Heroku's router uses 55 seconds).
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 75))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+accesslog = "-"
+
+# Import and prime the application once in the master; see gunicorn.conf.py.
+preload_app = True
+
+
+def when_ready(server):
+    from ecommerce.warmup import format_timings, preload
+
+    server.log.info("Master warm-up took %s", format_timings(preload()))
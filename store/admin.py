@@ -1,6 +1,18 @@
-from django.contrib import admin
+from collections import Counter
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.shortcuts import redirect
+from django.utils.translation import gettext_lazy as _
 from mptt.admin import MPTTModelAdmin
+from mptt.exceptions import InvalidMove
+from mptt.forms import TreeNodeChoiceField
+
+from ecommerce.pagination import EstimatedCountPaginator
 
+from . import fulfillment
+from .categories import move_categories
 from .models import *
 
 admin.site.site_header = "Ecart Admin"
@@ -8,10 +20,42 @@ admin.site.index_title = "Welcome to Ecart Admin"
 admin.site.site_title = "Ecart Admin"
 
 
+class CategoryParentForm(forms.Form):
+    parent = TreeNodeChoiceField(
+        label=_("New parent"),
+        queryset=Category.objects.all(),
+        required=False,
+        empty_label=_("(top level)"),
+    )
+
+
+class CategoryActionForm(ActionForm, CategoryParentForm):
+    pass
+
+
 @admin.register(Category)
 class CategoryAdmin(MPTTModelAdmin):
     list_display = ["name", "slug", "is_active", "parent"]
     prepopulated_fields = {"slug": ("name",)}
+    action_form = CategoryActionForm
+    actions = ["move_to_parent"]
+
+    @admin.action(description=_("Move selected categories under the new parent"))
+    def move_to_parent(self, request, queryset):
+        form = CategoryParentForm(request.POST)
+        if not form.is_valid():
+            self.message_user(request, _("Choose a valid parent."), messages.ERROR)
+            return
+
+        try:
+            renumbered = move_categories(queryset, form.cleaned_data["parent"])
+        except InvalidMove as exc:
+            self.message_user(request, str(exc), messages.ERROR)
+            return
+        self.message_user(
+            request,
+            f"Moved {len(queryset)} category(ies); {renumbered} row(s) renumbered.",
+        )
 
 
 class ProductSpecificationInline(admin.TabularInline):
@@ -44,23 +88,148 @@ class ProductAdmin(admin.ModelAdmin):
         ProductImageInline,
     ]
     prepopulated_fields = {"slug": ("title",)}
+    # Used by the product autocomplete widgets of the admins below.
+    search_fields = ["title", "=slug"]
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables that grow with every order: newest rows
+    first by primary key, no full-table counts, and raw id or autocomplete
+    widgets rather than a select over every user or product.
+    """
+
+    ordering = ["-id"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # When set, the search box looks up this field by exact id, which the
+    # foreign key or primary key index answers, instead of `search_fields`.
+    id_search_field = None
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if self.id_search_field is None or not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        if not search_term.isdigit():
+            return queryset.none(), False
+        return queryset.filter(**{self.id_search_field: search_term}), False
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
-    pass
+class ReviewAdmin(LargeTableAdmin):
+    list_display = ["id", "product", "created_by", "rating", "created_at"]
+    list_select_related = ["product", "created_by"]
+    autocomplete_fields = ["product"]
+    raw_id_fields = ["created_by"]
+    search_fields = ["product__id"]
+    id_search_field = "product_id"
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    autocomplete_fields = ["product"]
+    extra = 0
+
+
+class ShippingAddressInline(admin.StackedInline):
+    model = ShippingAddress
+    raw_id_fields = ["customer"]
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
-    pass
+class OrderAdmin(LargeTableAdmin):
+    list_display = [
+        "id",
+        "created_by",
+        "total_items",
+        "total_price",
+        "is_paid",
+        "is_delivered",
+        "created_at",
+    ]
+    list_filter = ["is_paid", "is_delivered"]
+    list_select_related = ["created_by"]
+    date_hierarchy = "created_at"
+    raw_id_fields = ["created_by"]
+    search_fields = ["id"]
+    id_search_field = "id"
+    inlines = [OrderItemInline, ShippingAddressInline]
+    actions = ["mark_paid", "mark_delivered"]
+
+    def change_view(self, request, object_id, form_url="", extra_context=None):
+        # Links to an order that has been archived since lead to the archive.
+        if (
+            object_id.isdigit()
+            and not Order.objects.filter(id=object_id).exists()
+            and ArchivedOrder.objects.filter(id=object_id).exists()
+        ):
+            return redirect("admin:store_archivedorder_change", object_id)
+        return super().change_view(request, object_id, form_url, extra_context)
+
+    def report_outcomes(self, request, outcomes):
+        counts = Counter(outcomes.values())
+        summary = ", ".join(
+            f"{count} {outcome.replace('_', ' ')}"
+            for outcome, count in sorted(counts.items())
+        )
+        self.message_user(request, f"Orders: {summary}.")
+
+    @admin.action(description=_("Mark selected orders as paid"))
+    def mark_paid(self, request, queryset):
+        ids = queryset.values_list("id", flat=True)
+        self.report_outcomes(request, fulfillment.mark_paid(ids))
+
+    @admin.action(description=_("Mark selected orders as delivered"))
+    def mark_delivered(self, request, queryset):
+        ids = queryset.values_list("id", flat=True)
+        self.report_outcomes(request, fulfillment.mark_delivered(ids))
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(LargeTableAdmin):
+    """Archived orders can be looked up and read, but not changed."""
+
+    list_display = [
+        "id",
+        "created_by",
+        "total_price",
+        "created_at",
+        "delivered_at",
+        "archived_at",
+    ]
+    list_select_related = ["created_by"]
+    date_hierarchy = "created_at"
+    raw_id_fields = ["created_by"]
+    search_fields = ["id"]
+    id_search_field = "id"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
-    pass
+class OrderItemAdmin(LargeTableAdmin):
+    list_display = ["id", "order", "name", "price", "quantity", "created_at"]
+    list_select_related = ["order"]
+    autocomplete_fields = ["product"]
+    raw_id_fields = ["order"]
+    search_fields = ["order__id"]
+    id_search_field = "order_id"
 
 
 @admin.register(ShippingAddress)
-class ShippingAddressAdmin(admin.ModelAdmin):
-    pass
+class ShippingAddressAdmin(LargeTableAdmin):
+    list_display = ["order", "customer", "city", "country", "created_at"]
+    list_select_related = ["order", "customer"]
+    raw_id_fields = ["order", "customer"]
+    search_fields = ["order__id"]
+    id_search_field = "order_id"
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ["order", "product", "quantity", "expires_at", "released_at"]
+    raw_id_fields = ["order", "product"]
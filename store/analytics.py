@@ -0,0 +1,256 @@
+"""
+Sales analytics.
+
+`DailySales` holds the units and revenue of each product per day, both
+checked out and paid, along with the product's category and type at the
+time. Checkout and payment add to it in their own transaction
+(`record_checkout`, `record_payment`), so reports read a few small rows
+per product and day instead of scanning order items. `sales_report` answers
+range and drill-down queries. A category takes in its whole subtree,
+matched by the MPTT ``lft``/``rght`` range. `rebuild_sales` recomputes the
+table from the orders, one month per transaction, after the days of the
+archived orders, whose rows cannot be recomputed.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Max, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ArchivedOrder, Category, DailySales, Order, OrderItem
+
+MEASURES = ["ordered_units", "ordered_revenue", "paid_units", "paid_revenue"]
+GROUPINGS = ["day", "category", "product_type", "product"]
+
+money = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _add(day, lines, units_field, revenue_field):
+    """
+    Add ``(product_id, category_id, product_type_id, units, revenue)`` lines
+    to the rows of `day`, creating the missing ones.
+    """
+    lines = sorted(lines)
+    if not lines:
+        return
+
+    DailySales.objects.bulk_create(
+        [
+            DailySales(
+                day=day,
+                product_id=product_id,
+                category_id=category_id,
+                product_type_id=product_type_id,
+            )
+            for product_id, category_id, product_type_id, _, _ in lines
+        ],
+        ignore_conflicts=True,
+    )
+    # In product order, like stock updates, so concurrent checkouts lock
+    # the rows in the same order.
+    for product_id, _, _, units, revenue in lines:
+        DailySales.objects.filter(day=day, product_id=product_id).update(
+            **{
+                units_field: F(units_field) + units,
+                revenue_field: F(revenue_field) + revenue,
+            }
+        )
+
+
+def _merge(lines):
+    merged = {}
+    for product_id, category_id, product_type_id, units, revenue in lines:
+        key = (product_id, category_id, product_type_id)
+        total_units, total_revenue = merged.get(key, (0, 0))
+        merged[key] = (total_units + units, total_revenue + revenue)
+    return [(*key, units, revenue) for key, (units, revenue) in merged.items()]
+
+
+def record_checkout(items, day=None):
+    """Add the order items of a checkout, with their products loaded."""
+    _add(
+        day or timezone.localdate(),
+        _merge(
+            (
+                item.product_id,
+                item.product.category_id,
+                item.product.product_type_id,
+                item.quantity,
+                item.price * item.quantity,
+            )
+            for item in items
+        ),
+        "ordered_units",
+        "ordered_revenue",
+    )
+
+
+def record_payment(order_ids, day=None):
+    """Add the items of orders that were just paid."""
+    lines = (
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .values("product_id", "product__category_id", "product__product_type_id")
+        .annotate(
+            units=Sum("quantity"),
+            revenue=Sum(F("price") * F("quantity"), output_field=money),
+        )
+        .values_list(
+            "product_id",
+            "product__category_id",
+            "product__product_type_id",
+            "units",
+            "revenue",
+        )
+        .order_by("product_id")
+    )
+    _add(day or timezone.localdate(), list(lines), "paid_units", "paid_revenue")
+
+
+def sales_report(start, end, by="day", category=None, product_type=None, product=None):
+    """
+    Totals per `by` grouping for the days from `start` to `end`, optionally
+    within a category subtree, a product type or a product. By category,
+    the rows are the children of `category` (the top level categories
+    without one), and sales filed directly under `category` are a row of
+    their own.
+    """
+    if by not in GROUPINGS:
+        raise ValueError(f"by must be one of {', '.join(GROUPINGS)}.")
+
+    rows = DailySales.objects.filter(day__range=(start, end))
+    if category is not None:
+        rows = rows.filter(
+            category__tree_id=category.tree_id,
+            category__lft__gte=category.lft,
+            category__rght__lte=category.rght,
+        )
+    if product_type is not None:
+        rows = rows.filter(product_type=product_type)
+    if product is not None:
+        rows = rows.filter(product=product)
+
+    totals = {measure: Sum(measure) for measure in MEASURES}
+    report = {
+        "total": {
+            measure: value or 0 for measure, value in rows.aggregate(**totals).items()
+        }
+    }
+    if by == "category":
+        report["rows"] = _category_rows(rows, category, totals)
+    else:
+        key, label = {
+            "day": ("day", "day"),
+            "product_type": ("product_type_id", "product_type__name"),
+            "product": ("product_id", "product__title"),
+        }[by]
+        report["rows"] = [
+            {"key": row.pop(key), "label": row.pop(label, None), **row}
+            for row in rows.values(*{key, label}).annotate(**totals).order_by(key)
+        ]
+        if by == "day":
+            for row in report["rows"]:
+                row["label"] = row["key"] = row["key"].isoformat()
+    return report
+
+
+def _category_rows(rows, category, totals):
+    """Roll the sales up to the children of `category`."""
+    if category is None:
+        branches = list(Category.objects.root_nodes())
+    else:
+        branches = [category, *category.get_children()]
+    rolled = {branch.id: {measure: 0 for measure in MEASURES} for branch in branches}
+
+    for row in (
+        rows.values("category__tree_id", "category__lft").annotate(**totals).order_by()
+    ):
+        for branch in reversed(branches):
+            # The category itself comes first and only keeps what no child has.
+            if (
+                branch.tree_id == row["category__tree_id"]
+                and branch.lft <= row["category__lft"] <= branch.rght
+            ):
+                for measure in MEASURES:
+                    rolled[branch.id][measure] += row[measure] or 0
+                break
+
+    return [
+        {"key": branch.slug, "label": branch.name, **rolled[branch.id]}
+        for branch in branches
+        if any(rolled[branch.id].values())
+    ]
+
+
+def _months(start, end):
+    while start <= end:
+        following = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        yield start, min(end, following - timedelta(days=1))
+        start = following
+
+
+def _archived_through():
+    """The last day an archived order was placed or paid on, if any."""
+    last = ArchivedOrder.objects.aggregate(
+        created=Max("created_at"), paid=Max("paid_at")
+    )
+    days = [timezone.localtime(value).date() for value in last.values() if value]
+    return max(days, default=None)
+
+
+def rebuild_sales(start=None, end=None):
+    """
+    Recompute the daily sales from `start` (default: the first order) to
+    `end` (default: today) from the orders. Returns the number of rows.
+    Days up to the last one an archived order was placed or paid on are
+    kept as they are.
+    """
+    if start is None:
+        first = Order.objects.aggregate(first=Min("created_at"))["first"]
+        start = timezone.localtime(first).date() if first else timezone.localdate()
+    end = end or timezone.localdate()
+    archived = _archived_through()
+    if archived and start <= archived:
+        start = archived + timedelta(days=1)
+
+    created = 0
+    for month_start, month_end in _months(start, end):
+        with transaction.atomic():
+            DailySales.objects.filter(day__range=(month_start, month_end)).delete()
+            rows = {}
+            for field, units_field, revenue_field in [
+                ("order__created_at", "ordered_units", "ordered_revenue"),
+                ("order__paid_at", "paid_units", "paid_revenue"),
+            ]:
+                lines = (
+                    OrderItem.objects.filter(
+                        **{f"{field}__date__range": (month_start, month_end)}
+                    )
+                    .annotate(day=TruncDate(field))
+                    .values(
+                        "day",
+                        "product_id",
+                        "product__category_id",
+                        "product__product_type_id",
+                    )
+                    .annotate(
+                        units=Sum("quantity"),
+                        revenue=Sum(F("price") * F("quantity"), output_field=money),
+                    )
+                    .order_by()
+                )
+                for line in lines:
+                    key = (line["day"], line["product_id"])
+                    if key not in rows:
+                        rows[key] = DailySales(
+                            day=line["day"],
+                            product_id=line["product_id"],
+                            category_id=line["product__category_id"],
+                            product_type_id=line["product__product_type_id"],
+                        )
+                    setattr(rows[key], units_field, line["units"] or 0)
+                    setattr(rows[key], revenue_field, line["revenue"] or 0)
+            DailySales.objects.bulk_create(rows.values(), batch_size=1000)
+            created += len(rows)
+    return created
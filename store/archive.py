@@ -0,0 +1,81 @@
+"""
+Cold storage for finished orders.
+
+Orders that were paid and delivered more than `ORDER_ARCHIVE_AFTER` ago are
+moved, a batch per transaction, out of the order, order item and shipping
+address tables into ``ArchivedOrder``: one row per order, keeping its id,
+with the order, its items and its address in a JSON document that Postgres
+stores compressed. Archived orders are never changed again, so they are
+only read back, by id or by customer and date, and shown as they were.
+
+The order history, the order detail, the dashboard summary and the admin
+fall back to the archive, so customers and staff find an order wherever it
+is. The daily sales rows of archived orders are kept; `rebuild_sales` leaves
+the days they fall on alone.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import ArchivedOrder, Order, OrderItem
+from .serializers import OrderArchiveSerializer
+
+
+def archivable_orders(now=None, older_than=None):
+    """Paid orders delivered more than `older_than` before `now`."""
+    if older_than is None:
+        older_than = settings.ORDER_ARCHIVE_AFTER
+    cutoff = (now or timezone.now()) - older_than
+    return Order.objects.filter(
+        is_paid=True, is_delivered=True, delivered_at__lt=cutoff
+    )
+
+
+def archive(order):
+    """The `ArchivedOrder` standing in for `order`, unsaved."""
+    return ArchivedOrder(
+        id=order.id,
+        created_by_id=order.created_by_id,
+        total_price=order.total_price,
+        created_at=order.created_at,
+        paid_at=order.paid_at,
+        delivered_at=order.delivered_at,
+        document=OrderArchiveSerializer(order).data,
+    )
+
+
+def archive_orders(now=None, older_than=None, batch_size=500):
+    """
+    Move the archivable orders to the archive, `batch_size` orders per
+    transaction, and return how many moved. Orders locked by a running
+    transaction are skipped and picked up by the next run.
+    """
+    candidates = archivable_orders(now, older_than).order_by("id")
+    archived = 0
+
+    while True:
+        with transaction.atomic():
+            ids = list(
+                candidates.select_for_update(skip_locked=True).values_list(
+                    "id", flat=True
+                )[:batch_size]
+            )
+            if not ids:
+                return archived
+
+            orders = (
+                Order.objects.filter(id__in=ids)
+                .select_related("shippingaddress")
+                .prefetch_related(
+                    Prefetch(
+                        "orderitem_set",
+                        queryset=OrderItem.objects.select_related("product"),
+                    )
+                )
+            )
+            ArchivedOrder.objects.bulk_create(archive(order) for order in orders)
+            # Takes the items, address and released reservations along.
+            Order.objects.filter(id__in=ids).delete()
+        archived += len(ids)
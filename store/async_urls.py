@@ -0,0 +1,27 @@
+from django.urls import path
+
+from . import async_views
+
+app_name = "store_async"
+
+urlpatterns = [
+    path("products/", async_views.product_list, name="all_products"),
+    path("products/top/", async_views.top_product_list, name="top_products"),
+    path("products/batch/", async_views.product_batch, name="get_products_batch"),
+    path(
+        "products/autocomplete/",
+        async_views.product_autocomplete,
+        name="autocomplete_products",
+    ),
+    path(
+        "products/<slug:slug>/",
+        async_views.product_detail,
+        name="get_individual_product",
+    ),
+    path("categories/", async_views.category_list, name="all_top_level_categories"),
+    path(
+        "categories/<slug:slug>/",
+        async_views.category_items,
+        name="get_products_by_category",
+    ),
+]
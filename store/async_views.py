@@ -0,0 +1,27 @@
+"""
+Async variants of the read-heavy catalog views for the ASGI deployment.
+
+They answer with exactly the same payloads as the views they wrap, but run
+the ORM work on the bounded pool from `ecommerce.orm_pool`, so one worker can
+hold many concurrent keep-alive shoppers without a thread per connection.
+"""
+
+from ecommerce.orm_pool import pooled
+
+from .views import (
+    CategoryItemView,
+    CategoryListView,
+    ProductAutocompleteView,
+    ProductBatchView,
+    ProductListView,
+    ProductView,
+    TopProductListView,
+)
+
+product_list = pooled(ProductListView.as_view())
+top_product_list = pooled(TopProductListView.as_view())
+product_detail = pooled(ProductView.as_view())
+product_batch = pooled(ProductBatchView.as_view())
+product_autocomplete = pooled(ProductAutocompleteView.as_view())
+category_list = pooled(CategoryListView.as_view())
+category_items = pooled(CategoryItemView.as_view())
@@ -0,0 +1,339 @@
+"""
+Type-ahead suggestions for the search box, answered from memory.
+
+Active product titles, brands and category names are kept in one sorted
+array of normalized search keys, one key per word a name can be typed from,
+so "sco" finds "Two Scoops of Django". The keys that start with a prefix are
+a contiguous run of the array, found with two binary searches. The run's
+suggestions are ranked by popularity: products by paid units over the last
+`AUTOCOMPLETE_POPULAR_DAYS` and then by rating, brands by the paid units of
+all their products, and categories by their number of products.
+
+Each process loads the index once, in the gunicorn master when it is
+listed in ``WARMUP_LOADERS``, and otherwise on the first request. Product
+and category signals update it in place. Changes made by other processes,
+and rating changes, which are saved with ``UPDATE``, arrive when the index
+is reloaded after ``AUTOCOMPLETE_TTL`` seconds. The reload runs in a
+background thread and builds a new index while the old one keeps answering;
+the lock is only held to swap it in.
+"""
+
+import heapq
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Category, DailySales, Product
+
+PRODUCT = "product"
+BRAND = "brand"
+CATEGORY = "category"
+
+# Longer keys add memory but no precision to a type-ahead.
+MAX_KEY_LENGTH = 40
+# Prefixes this short match much of the catalog, so their answers are kept.
+CACHED_PREFIX_LENGTH = 2
+
+
+def normalize(text):
+    """Lower case, without accents or punctuation, single spaced."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = "".join(char if char.isalnum() else " " for char in text.casefold())
+    return " ".join(text.split())
+
+
+def search_keys(text):
+    """The keys a name is found by: the name from each of its words on."""
+    words = normalize(text).split()
+    return {" ".join(words[i:])[:MAX_KEY_LENGTH] for i in range(len(words))}
+
+
+class PrefixIndex:
+    """Sorted search keys pointing at ranked suggestions."""
+
+    def __init__(self):
+        self.keys = []
+        self.owners = []
+        self.entries = {}
+        self.cache = {}
+
+    def add(self, id, text, rank, suggestion):
+        """Add or replace the suggestion `id`, found by the words of `text`."""
+        self.remove(id)
+        keys = search_keys(text)
+        self.entries[id] = (rank, suggestion, keys)
+        for key in keys:
+            position = bisect_left(self.keys, key)
+            self.keys.insert(position, key)
+            self.owners.insert(position, id)
+        self.cache.clear()
+
+    def extend(self, items):
+        """Add many ``(id, text, rank, suggestion)`` at once, sorting once."""
+        pairs = list(zip(self.keys, self.owners))
+        for id, text, rank, suggestion in items:
+            keys = search_keys(text)
+            self.entries[id] = (rank, suggestion, keys)
+            pairs.extend((key, id) for key in keys)
+        pairs.sort(key=lambda pair: pair[0])
+        self.keys = [key for key, _ in pairs]
+        self.owners = [id for _, id in pairs]
+        self.cache.clear()
+
+    def remove(self, id):
+        entry = self.entries.pop(id, None)
+        if entry is None:
+            return
+        for key in entry[2]:
+            position = bisect_left(self.keys, key)
+            while self.owners[position] != id:
+                position += 1
+            del self.keys[position]
+            del self.owners[position]
+        self.cache.clear()
+
+    def rank(self, id):
+        entry = self.entries.get(id)
+        return entry[0] if entry else None
+
+    def search(self, prefix, limit):
+        prefix = normalize(prefix)[:MAX_KEY_LENGTH]
+        if not prefix:
+            return []
+        cached = len(prefix) <= CACHED_PREFIX_LENGTH
+        if cached and (prefix, limit) in self.cache:
+            return self.cache[prefix, limit]
+
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "\U0010ffff", start)
+        ids = set(self.owners[start:end])
+        best = heapq.nlargest(limit, ids, key=lambda id: self.entries[id][0])
+        suggestions = [self.entries[id][1] for id in best]
+        if cached:
+            self.cache[prefix, limit] = suggestions
+        return suggestions
+
+
+class Autocomplete:
+    """The index of one process, with the bookkeeping to update it."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.index = None
+        self.loaded_at = None
+        self.reloading = False
+        # Changes seen while a new index is built, replayed onto it.
+        self.changes = None
+        self.popularity = {}
+        self.brands = defaultdict(dict)
+        self.brand_of = {}
+
+    def build(self):
+        """Build the index from the database."""
+        since = timezone.localdate() - timedelta(
+            days=settings.AUTOCOMPLETE_POPULAR_DAYS
+        )
+        self.popularity = dict(
+            DailySales.objects.filter(day__gte=since)
+            .values("product_id")
+            .annotate(units=Sum("paid_units"))
+            .values_list("product_id", "units")
+            .order_by()
+        )
+        products = list(
+            Product.objects.filter(is_active=True).values(
+                "id", "title", "slug", "brand", "rating", "num_reviews"
+            )
+        )
+        categories = list(
+            Category.objects.filter(is_active=True).annotate(products=Count("product"))
+        )
+
+        self.index = PrefixIndex()
+        self.brands = defaultdict(dict)
+        self.brand_of = {}
+        items = [self._product(product) for product in products]
+        for product in products:
+            self._track_brand(product["id"], product["brand"])
+        items += [self._brand(brand) for brand in self.brands]
+        items += [self._category(category) for category in categories]
+        self.index.extend(item for item in items if item)
+
+    def load(self):
+        """Build a new index without holding the lock and swap it in."""
+        with self.lock:
+            self.changes = []
+        try:
+            fresh = Autocomplete()
+            fresh.build()
+            with self.lock:
+                for change, args in self.changes:
+                    getattr(fresh, change)(*args)
+                self.index = fresh.index
+                self.popularity = fresh.popularity
+                self.brands = fresh.brands
+                self.brand_of = fresh.brand_of
+                self.loaded_at = time.monotonic()
+        finally:
+            with self.lock:
+                self.changes = None
+
+    def reload(self):
+        try:
+            self.load()
+        finally:
+            self.reloading = False
+            # The thread's own database connections.
+            connections.close_all()
+
+    def reload_in_background(self):
+        threading.Thread(target=self.reload, daemon=True).start()
+
+    def _ensure_loaded(self):
+        if self.index is None:
+            with self.lock:
+                if self.index is None:
+                    self.load()
+            return
+        with self.lock:
+            stale = (
+                not self.reloading
+                and time.monotonic() - self.loaded_at > settings.AUTOCOMPLETE_TTL
+            )
+            if stale:
+                self.reloading = True
+        if stale:
+            self.reload_in_background()
+
+    def suggest(self, prefix, limit=10):
+        """The best `limit` suggestions for what was typed so far."""
+        self._ensure_loaded()
+        with self.lock:
+            return self.index.search(prefix, limit)
+
+    def _product(self, product):
+        suggestion = {
+            "type": PRODUCT,
+            "text": product["title"],
+            "slug": product["slug"],
+        }
+        rank = (
+            self.popularity.get(product["id"]) or 0,
+            float(product["rating"] or 0),
+            product["num_reviews"] or 0,
+        )
+        return ((PRODUCT, product["id"]), product["title"], rank, suggestion)
+
+    def _track_brand(self, product_id, brand):
+        key = normalize(brand)
+        if key:
+            self.brands[key][product_id] = brand.strip()
+            self.brand_of[product_id] = key
+
+    def _brand(self, key):
+        products = self.brands.get(key)
+        if not products:
+            return None
+        name = next(iter(products.values()))
+        units = sum(self.popularity.get(id) or 0 for id in products)
+        suggestion = {"type": BRAND, "text": name, "slug": None}
+        return ((BRAND, key), name, (units, 0, len(products)), suggestion)
+
+    def _category(self, category):
+        suggestion = {"type": CATEGORY, "text": category.name, "slug": category.slug}
+        rank = (0, 0, getattr(category, "products", 0))
+        return ((CATEGORY, category.id), category.name, rank, suggestion)
+
+    def _update_brands(self, *keys):
+        for key in keys:
+            item = self._brand(key)
+            if item:
+                self.index.add(*item)
+            else:
+                self.brands.pop(key, None)
+                self.index.remove((BRAND, key))
+
+    def product_changed(self, product, deleted=False, id=None):
+        id = id or product.id
+        with self.lock:
+            if self.changes is not None:
+                self.changes.append(("product_changed", (product, deleted, id)))
+            if self.index is None:
+                return
+            old_brand = self.brand_of.pop(id, None)
+            if old_brand:
+                self.brands[old_brand].pop(id, None)
+            if deleted or not product.is_active:
+                self.index.remove((PRODUCT, id))
+            else:
+                self.index.add(
+                    *self._product(
+                        {
+                            "id": product.id,
+                            "title": product.title,
+                            "slug": product.slug,
+                            "rating": product.rating,
+                            "num_reviews": product.num_reviews,
+                        }
+                    )
+                )
+                self._track_brand(product.id, product.brand)
+            new_brand = self.brand_of.get(id)
+            self._update_brands(*{old_brand, new_brand} - {None})
+
+    def category_changed(self, category, deleted=False, id=None):
+        id = id or category.id
+        with self.lock:
+            if self.changes is not None:
+                self.changes.append(("category_changed", (category, deleted, id)))
+            if self.index is None:
+                return
+            if deleted or not category.is_active:
+                self.index.remove((CATEGORY, id))
+            else:
+                # Keep the product count from the last load.
+                rank = self.index.rank((CATEGORY, category.id))
+                category.products = rank[2] if rank else 0
+                self.index.add(*self._category(category))
+
+
+autocomplete = Autocomplete()
+load = autocomplete.load
+
+
+# The index takes in changes once they are committed.
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocomplete.product_changed(instance))
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    id = instance.id
+    transaction.on_commit(
+        lambda: autocomplete.product_changed(instance, deleted=True, id=id)
+    )
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocomplete.category_changed(instance))
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    id = instance.id
+    transaction.on_commit(
+        lambda: autocomplete.category_changed(instance, deleted=True, id=id)
+    )
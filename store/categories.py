@@ -0,0 +1,143 @@
+"""
+Bulk maintenance of the category tree.
+
+Saving a category renumbers its whole tree to keep siblings sorted by name
+(``order_insertion_by``), so reorganizing a taxonomy one save at a time
+rewrites the tree, and holds its row locks, once per change. The helpers
+here make all of their changes with tree updates disabled, then renumber
+each affected tree once with ``partial_rebuild``, all in one transaction.
+Changes that reorder the root categories, which are sorted across trees,
+take one full ``rebuild`` instead.
+
+Each returns the number of categories whose position in the tree changed,
+including the ones it created.
+"""
+
+from django.db import transaction
+from mptt.exceptions import InvalidMove
+
+from .models import Category
+
+
+def _positions(categories):
+    return {
+        pk: position
+        for pk, *position in categories.values_list(
+            "pk", "tree_id", "lft", "rght", "level"
+        )
+    }
+
+
+def _rebuild(tree_ids, roots_changed):
+    """Renumber the given trees, or the whole table if roots changed."""
+    categories = Category.objects.all()
+    if not roots_changed:
+        categories = categories.filter(tree_id__in=tree_ids)
+    before = _positions(categories)
+
+    if roots_changed:
+        Category.objects.rebuild()
+    else:
+        for tree_id in sorted(tree_ids):
+            Category.objects.partial_rebuild(tree_id)
+
+    after = _positions(categories)
+    return sum(1 for pk, position in after.items() if before.get(pk) != position)
+
+
+@transaction.atomic
+def move_categories(categories, parent):
+    """Move `categories`, with their subtrees, under `parent` (None: to the top)."""
+    categories = list(categories)
+    for category in categories:
+        if parent is not None and parent.is_descendant_of(category, include_self=True):
+            raise InvalidMove(f"{parent} is inside {category}.")
+
+    tree_ids = {category.tree_id for category in categories}
+    roots_changed = parent is None or any(c.is_root_node() for c in categories)
+    if parent is not None:
+        tree_ids.add(parent.tree_id)
+
+    with Category.objects.disable_mptt_updates():
+        Category.objects.filter(pk__in=[c.pk for c in categories]).update(parent=parent)
+    return _rebuild(tree_ids, roots_changed)
+
+
+@transaction.atomic
+def rename_categories(names):
+    """Rename categories from a mapping of slug to new name."""
+    categories = list(Category.objects.filter(slug__in=names))
+    missing = set(names) - {category.slug for category in categories}
+    if missing:
+        raise Category.DoesNotExist(f"Unknown categories: {', '.join(sorted(missing))}")
+
+    for category in categories:
+        category.name = names[category.slug]
+    with Category.objects.disable_mptt_updates():
+        Category.objects.bulk_update(categories, ["name"])
+
+    return _rebuild(
+        {category.tree_id for category in categories},
+        any(category.is_root_node() for category in categories),
+    )
+
+
+def _check_acyclic(parents):
+    for slug in parents:
+        seen = {slug}
+        parent = parents[slug]
+        while parent is not None and parent in parents:
+            if parent in seen:
+                raise InvalidMove(f"{slug} would be inside itself.")
+            seen.add(parent)
+            parent = parents[parent]
+
+
+@transaction.atomic
+def import_categories(rows):
+    """
+    Create or update categories from ``(name, slug, parent_slug)`` rows. An
+    empty parent slug puts the category at the top. Parents may be existing
+    categories or other rows of the import, in any order.
+    """
+    rows = list(rows)
+    parents = {slug: parent_slug or None for _, slug, parent_slug in rows}
+    _check_acyclic(parents)
+
+    existing = Category.objects.in_bulk(
+        set(parents) | set(filter(None, parents.values())), field_name="slug"
+    )
+    missing = set(filter(None, parents.values())) - set(parents) - set(existing)
+    if missing:
+        raise Category.DoesNotExist(f"Unknown parents: {', '.join(sorted(missing))}")
+
+    # The trees the rows leave and join. Rows at the top, or leaving it,
+    # reorder the roots and take a full rebuild.
+    tree_ids = {existing[slug].tree_id for slug in parents if slug in existing}
+    roots_changed = False
+    for _, slug, parent_slug in rows:
+        if not parent_slug or (slug in existing and existing[slug].is_root_node()):
+            roots_changed = True
+        if parent_slug in existing:
+            tree_ids.add(existing[parent_slug].tree_id)
+
+    with Category.objects.disable_mptt_updates():
+        new = [
+            # Placeholder tree fields; the rebuild below numbers them.
+            Category(name=name, slug=slug, tree_id=0, lft=0, rght=0, level=0)
+            for name, slug, _ in rows
+            if slug not in existing
+        ]
+        Category.objects.bulk_create(new)
+        categories = Category.objects.in_bulk(
+            set(parents) | set(existing), field_name="slug"
+        )
+        changed = []
+        for name, slug, parent_slug in rows:
+            category = categories[slug]
+            category.name = name
+            category.parent = categories[parent_slug] if parent_slug else None
+            changed.append(category)
+        Category.objects.bulk_update(changed, ["name", "parent"])
+
+    return _rebuild(tree_ids, roots_changed)
@@ -0,0 +1,127 @@
+"""
+Order status transitions, one order or many at a time.
+
+`mark_paid` and `mark_delivered` lock the orders they are given, check each
+one's state, and move every eligible order with a single ``UPDATE``. They
+return an outcome per id and send `orders_transitioned` once for the batch
+when the transaction commits. An order left unpaid because its stock sold
+out gets an `OutOfStock` outcome naming the product, found while its stock
+was locked.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .analytics import record_payment
+from .inventory import InsufficientStock, take_stock
+from .models import Order, StockReservation
+from .signals import orders_transitioned
+
+PAID = "paid"
+DELIVERED = "delivered"
+NOT_FOUND = "not_found"
+ALREADY_PAID = "already_paid"
+ALREADY_DELIVERED = "already_delivered"
+UNPAID = "unpaid"
+OUT_OF_STOCK = "out_of_stock"
+
+
+class OutOfStock(str):
+    """The `OUT_OF_STOCK` outcome, with the `product_id` that sold out."""
+
+    def __new__(cls, product_id):
+        outcome = super().__new__(cls, OUT_OF_STOCK)
+        outcome.product_id = product_id
+        return outcome
+
+
+def _lock(order_ids):
+    ids = list(dict.fromkeys(int(id) for id in order_ids))
+    orders = {
+        order["id"]: order
+        for order in Order.objects.select_for_update()
+        .filter(id__in=ids)
+        .order_by("id")
+        .values("id", "is_paid", "is_delivered")
+    }
+    return ids, orders
+
+
+def notify(status, order_ids):
+    """Send `orders_transitioned` for `order_ids` once the transaction commits."""
+    if order_ids:
+        transaction.on_commit(
+            lambda: orders_transitioned.send(
+                sender=Order, status=status, order_ids=order_ids
+            )
+        )
+
+
+@transaction.atomic
+def mark_paid(order_ids, now=None):
+    """
+    Mark unpaid orders paid, turning their stock reservations into sales.
+    An order whose released stock has sold out meanwhile stays unpaid.
+    """
+    ids, orders = _lock(order_ids)
+    outcomes = {}
+    for id in ids:
+        order = orders.get(id)
+        if order is None:
+            outcomes[id] = NOT_FOUND
+        elif order["is_paid"]:
+            outcomes[id] = ALREADY_PAID
+        else:
+            outcomes[id] = PAID
+    eligible = [id for id in ids if outcomes[id] == PAID]
+
+    # Stock the sweeper gave back has to be taken again.
+    released = defaultdict(list)
+    for reservation in (
+        StockReservation.objects.select_for_update()
+        .filter(order_id__in=eligible, released_at__isnull=False)
+        .order_by("product_id")
+    ):
+        released[reservation.order_id].append(reservation)
+    for order_id, reservations in released.items():
+        try:
+            with transaction.atomic():
+                for reservation in reservations:
+                    take_stock(reservation.product_id, reservation.quantity)
+        except InsufficientStock as exc:
+            outcomes[order_id] = OutOfStock(exc.product_id)
+            eligible.remove(order_id)
+
+    StockReservation.objects.filter(order_id__in=eligible).delete()
+    Order.objects.filter(id__in=eligible).update(
+        is_paid=True, paid_at=now or timezone.now()
+    )
+    record_payment(eligible, timezone.localdate(now))
+    notify(PAID, eligible)
+    return outcomes
+
+
+@transaction.atomic
+def mark_delivered(order_ids, now=None):
+    """Mark paid, undelivered orders delivered."""
+    ids, orders = _lock(order_ids)
+    outcomes = {}
+    for id in ids:
+        order = orders.get(id)
+        if order is None:
+            outcomes[id] = NOT_FOUND
+        elif order["is_delivered"]:
+            outcomes[id] = ALREADY_DELIVERED
+        elif not order["is_paid"]:
+            outcomes[id] = UNPAID
+        else:
+            outcomes[id] = DELIVERED
+    eligible = [id for id in ids if outcomes[id] == DELIVERED]
+
+    Order.objects.filter(id__in=eligible).update(
+        is_delivered=True, delivered_at=now or timezone.now()
+    )
+    notify(DELIVERED, eligible)
+    return outcomes
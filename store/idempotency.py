@@ -0,0 +1,157 @@
+"""
+`Idempotency-Key` support for endpoints that clients retry.
+
+The first request with a key inserts an ``IdempotencyKey`` row in the same
+transaction that runs the view, and stores the response on it before
+committing. A concurrent duplicate blocks on the unique index until that
+transaction finishes, then replays the stored response instead of running
+the view again. If the first request fails the row is rolled back and the
+duplicate simply runs the view itself.
+"""
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class _DoNotStore(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def idempotency_key_ttl():
+    return getattr(settings, "IDEMPOTENCY_KEY_TTL", timedelta(hours=24))
+
+
+def request_fingerprint(request):
+    body = json.dumps(request.data, cls=JSONEncoder, sort_keys=True, default=str)
+    payload = "\n".join([request.method, request.path, body])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _in_progress():
+    return Response(
+        {
+            "detail": "A request with this Idempotency-Key is still in progress!",
+            "status": status.HTTP_409_CONFLICT,
+        },
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+def _replay(record, fingerprint):
+    if record.request_hash != fingerprint:
+        return Response(
+            {
+                "detail": "Idempotency-Key was already used for a different request!",
+                "status": status.HTTP_422_UNPROCESSABLE_ENTITY,
+            },
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    if record.status_code is None:
+        return _in_progress()
+
+    return Response(
+        record.response,
+        status=record.status_code,
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+def idempotent(handler):
+    """
+    Make an APIView handler replay its first response for repeated
+    `Idempotency-Key` headers. Requests without the header are untouched;
+    server errors are never stored so they can be retried.
+    """
+
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return handler(view, request, *args, **kwargs)
+
+        if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+            return Response(
+                {
+                    "detail": "Idempotency-Key is too long!",
+                    "status": status.HTTP_400_BAD_REQUEST,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = request_fingerprint(request)
+
+        for _ in range(2):
+            try:
+                with transaction.atomic():
+                    try:
+                        # Blocks while a duplicate of this request is in flight.
+                        with transaction.atomic():
+                            record = IdempotencyKey.objects.create(
+                                created_by=request.user,
+                                key=key,
+                                request_hash=fingerprint,
+                            )
+                    except IntegrityError:
+                        record = None
+
+                    if record is not None:
+                        response = handler(view, request, *args, **kwargs)
+                        if response.status_code >= 500:
+                            raise _DoNotStore(response)
+
+                        record.status_code = response.status_code
+                        record.response = response.data
+                        record.save(update_fields=["status_code", "response"])
+                        return response
+            except _DoNotStore as exc:
+                return exc.response
+
+            record = IdempotencyKey.objects.filter(
+                created_by=request.user, key=key
+            ).first()
+            if record is None:
+                continue
+
+            if record.created_at < timezone.now() - idempotency_key_ttl():
+                record.delete()
+                continue
+
+            return _replay(record, fingerprint)
+
+        return _in_progress()
+
+    return wrapper
+
+
+def purge_expired_keys(now=None, batch_size=1000):
+    """Delete keys older than `IDEMPOTENCY_KEY_TTL`, returning how many went."""
+    cutoff = (now or timezone.now()) - idempotency_key_ttl()
+    purged = 0
+
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(created_at__lt=cutoff).values_list(
+                "id", flat=True
+            )[:batch_size]
+        )
+        if not ids:
+            return purged
+
+        purged += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
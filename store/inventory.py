@@ -0,0 +1,141 @@
+"""
+Stock keeping for checkout.
+
+Stock is taken from ``Product.count_in_stock`` with a single conditional
+``UPDATE ... WHERE count_in_stock >= qty`` so concurrent checkouts can never
+oversell or lose an update. Every unpaid order holds its stock through
+``StockReservation`` rows until it is paid, or until the reservation expires
+and the sweeper gives the stock back.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Product, StockReservation
+
+
+class InsufficientStock(Exception):
+    """Raised when a product cannot cover the requested quantity."""
+
+    def __init__(self, product_id):
+        self.product_id = product_id
+        super().__init__(f"Product {product_id} does not have enough stock.")
+
+
+def reservation_ttl():
+    return getattr(settings, "STOCK_RESERVATION_TTL", timedelta(minutes=30))
+
+
+def take_stock(product_id, quantity):
+    """Atomically remove `quantity` units of a product, if it has them."""
+    updated = Product.objects.filter(
+        id=product_id, count_in_stock__gte=quantity
+    ).update(
+        count_in_stock=F("count_in_stock") - quantity,
+        # SET expressions see the row as it was before the update.
+        in_stock=Case(
+            When(count_in_stock__gt=quantity, then=Value(True)),
+            default=Value(False),
+        ),
+    )
+    if not updated:
+        raise InsufficientStock(product_id)
+
+
+def give_stock(product_id, quantity):
+    """Atomically put `quantity` units of a product back in stock."""
+    Product.objects.filter(id=product_id).update(
+        count_in_stock=Coalesce(F("count_in_stock"), 0) + quantity,
+        in_stock=Value(True),
+    )
+
+
+def _merge_lines(items):
+    quantities = Counter()
+    for product_id, quantity in items:
+        quantity = int(quantity)
+        if quantity <= 0:
+            raise ValueError("Order item quantity must be positive.")
+        quantities[int(product_id)] += quantity
+    # Always lock products in id order so concurrent carts cannot deadlock.
+    return sorted(quantities.items())
+
+
+@transaction.atomic
+def reserve_stock(order, items):
+    """
+    Take stock for every `(product_id, quantity)` pair in `items` and hold it
+    for `order`. Either every line is reserved or none is.
+    """
+    lines = _merge_lines(items)
+    for product_id, quantity in lines:
+        take_stock(product_id, quantity)
+
+    expires_at = timezone.now() + reservation_ttl()
+    return StockReservation.objects.bulk_create(
+        [
+            StockReservation(
+                order=order,
+                product_id=product_id,
+                quantity=quantity,
+                expires_at=expires_at,
+            )
+            for product_id, quantity in lines
+        ]
+    )
+
+
+@transaction.atomic
+def commit_reservations(order):
+    """
+    Turn the reservations of a paid order into a final sale. Stock that the
+    sweeper already released is taken again, failing if it has sold out.
+    """
+    reservations = list(
+        StockReservation.objects.select_for_update()
+        .filter(order=order)
+        .order_by("product_id")
+    )
+    for reservation in reservations:
+        if reservation.released_at is not None:
+            take_stock(reservation.product_id, reservation.quantity)
+
+    StockReservation.objects.filter(order=order).delete()
+
+
+def release_expired_reservations(now=None, batch_size=500):
+    """
+    Give back the stock held by expired reservations, `batch_size` rows per
+    transaction. Returns the number of reservations released.
+    """
+    now = now or timezone.now()
+    released = 0
+
+    while True:
+        with transaction.atomic():
+            ids = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(released_at__isnull=True, expires_at__lte=now)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return released
+
+            totals = (
+                StockReservation.objects.filter(id__in=ids)
+                .values("product_id")
+                .annotate(quantity=Sum("quantity"))
+                .order_by("product_id")
+            )
+            for row in totals:
+                give_stock(row["product_id"], row["quantity"])
+
+            StockReservation.objects.filter(id__in=ids).update(released_at=now)
+            released += len(ids)
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from store.archive import archive_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Move paid orders delivered more than ORDER_ARCHIVE_AFTER ago to the archive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Archive orders delivered more than this many days ago instead.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of orders moved per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        archived = archive_orders(
+            older_than=timedelta(days=days) if days is not None else None,
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} order(s)."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from ecommerce.api_docs import build_schema, save_schema
+
+
+class Command(BaseCommand):
+    help = "Generate the API docs schema and save it to API_SCHEMA_FILE."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help="File to write instead of API_SCHEMA_FILE.",
+        )
+
+    def handle(self, *args, **options):
+        schema = build_schema()
+        save_schema(schema, options["output"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Built the API schema for URL conf {schema.fingerprint[:12]}."
+            )
+        )
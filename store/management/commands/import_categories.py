@@ -0,0 +1,35 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from mptt.exceptions import InvalidMove
+
+from store.categories import import_categories
+from store.models import Category
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update categories from a CSV file with 'name', 'slug' and "
+        "'parent' (a parent slug, empty for the top level) columns and "
+        "renumber each affected tree once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="CSV file with a header row.")
+
+    def handle(self, *args, **options):
+        with open(options["file"], newline="") as file:
+            rows = [
+                (row["name"], row["slug"], row.get("parent") or None)
+                for row in csv.DictReader(file)
+            ]
+
+        try:
+            renumbered = import_categories(rows)
+        except (Category.DoesNotExist, InvalidMove) as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {len(rows)} category(ies); {renumbered} row(s) renumbered."
+            )
+        )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from mptt.exceptions import InvalidMove
+
+from store.categories import move_categories
+from store.models import Category
+
+
+class Command(BaseCommand):
+    help = (
+        "Move categories, with their subcategories, under another category "
+        "and renumber each affected tree once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("slugs", nargs="+", help="Slugs of the categories to move.")
+        parser.add_argument(
+            "--parent",
+            help="Slug of the new parent. Leave out to move them to the top level.",
+        )
+
+    def handle(self, *args, **options):
+        categories = Category.objects.filter(slug__in=options["slugs"])
+        missing = set(options["slugs"]) - {c.slug for c in categories}
+        if missing:
+            raise CommandError(f"Unknown categories: {', '.join(sorted(missing))}")
+
+        parent = None
+        if options["parent"]:
+            try:
+                parent = Category.objects.get(slug=options["parent"])
+            except Category.DoesNotExist:
+                raise CommandError(f"Unknown category: {options['parent']}")
+
+        try:
+            renumbered = move_categories(categories, parent)
+        except InvalidMove as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Moved {len(categories)} category(ies); "
+                f"{renumbered} row(s) renumbered."
+            )
+        )
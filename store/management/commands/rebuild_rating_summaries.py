@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from store.models import Product
+from store.ratings import rebuild_rating_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the rating, review count and star histogram of products "
+        "from their reviews."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "slugs", nargs="*", help="Products to rebuild (default: all)."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of product ids updated per statement.",
+        )
+
+    def handle(self, *args, **options):
+        products = Product.objects.all()
+        if options["slugs"]:
+            products = products.filter(slug__in=options["slugs"])
+        rebuild_rating_summaries(products, batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt the rating summaries of {products.count()} product(s)."
+            )
+        )
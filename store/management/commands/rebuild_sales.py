@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from store.analytics import rebuild_sales
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily sales table from the orders, one month at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            help="First day to rebuild, as YYYY-MM-DD (default: the first order).",
+        )
+        parser.add_argument(
+            "--end",
+            type=date.fromisoformat,
+            help="Last day to rebuild, as YYYY-MM-DD (default: today).",
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild_sales(options["start"], options["end"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily sales row(s)."))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from store.recommendations import BATCH_SIZE, TOP, rebuild_similar, refresh_similar
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the similar products of every active product from their "
+        "type, category, brand, price and specifications."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--changed",
+            action="store_true",
+            help="Only update the products saved since the last run.",
+        )
+        parser.add_argument(
+            "--top", type=int, default=TOP, help="Neighbours kept per product."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Number of products whose neighbours are stored per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        rebuild = refresh_similar if options["changed"] else rebuild_similar
+        rebuilt = rebuild(top=options["top"], batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt the similar products of {rebuilt} product(s).")
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from store.recommendations import BATCH_SIZE, TOP, refresh_bought_together
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the products frequently bought together with the products "
+        "of orders paid since the last run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute every product instead of the recently sold ones.",
+        )
+        parser.add_argument(
+            "--top", type=int, default=TOP, help="Neighbours kept per product."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Number of products recomputed per query.",
+        )
+
+    def handle(self, *args, **options):
+        refreshed = refresh_bought_together(
+            full=options["full"], top=options["top"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Refreshed the neighbours of {refreshed} product(s).")
+        )
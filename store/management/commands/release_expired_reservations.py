@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from store.inventory import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = "Give back the stock held by expired reservations of unpaid orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of reservations released per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        released = release_expired_reservations(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Released {released} expired stock reservation(s).")
+        )
@@ -0,0 +1,30 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.categories import rename_categories
+from store.models import Category
+
+
+class Command(BaseCommand):
+    help = (
+        "Rename categories from a CSV file with 'slug' and 'name' columns and "
+        "renumber each affected tree once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="CSV file with a header row.")
+
+    def handle(self, *args, **options):
+        with open(options["file"], newline="") as file:
+            names = {row["slug"]: row["name"] for row in csv.DictReader(file)}
+
+        try:
+            renumbered = rename_categories(names)
+        except Category.DoesNotExist as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Renamed {len(names)} category(ies); {renumbered} row(s) renumbered."
+            )
+        )
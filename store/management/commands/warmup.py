@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from ecommerce.warmup import format_timings, preload, warm_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the gunicorn master and worker warm-up in this process and report "
+        "how long each phase took."
+    )
+
+    def handle(self, *args, **options):
+        application = get_wsgi_application()
+        self.stdout.write(f"Master warm-up: {format_timings(preload())}")
+        self.stdout.write(f"Worker warm-up: {format_timings(warm_worker(application))}")
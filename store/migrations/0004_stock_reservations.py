@@ -0,0 +1,38 @@
+# Generated by Django 3.2.6 on 2026-10-19 00:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def sync_in_stock(apps, schema_editor):
+    Product = apps.get_model("store", "Product")
+    Product.objects.filter(count_in_stock__gt=0).update(in_stock=True)
+    Product.objects.exclude(count_in_stock__gt=0).update(in_stock=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_shippingaddress_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(help_text='Quantity Of Product Held For The Order', verbose_name='Reserved Quantity')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Reservation Expires At Timestamp')),
+                ('released_at', models.DateTimeField(blank=True, null=True, verbose_name='Reservation Released At Timestamp')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Reservation Created At Timestamp')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.product')),
+            ],
+            options={
+                'verbose_name': 'Stock Reservation',
+                'verbose_name_plural': 'Stock Reservations',
+                'ordering': ('created_at',),
+            },
+        ),
+        migrations.RunPython(sync_in_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.6 on 2026-10-19 00:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_by', 'created_at', 'id'], name='order_creator_created_idx'),
+        ),
+    ]
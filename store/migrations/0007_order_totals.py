@@ -0,0 +1,106 @@
+# Generated by Django 3.2.6 on 2026-10-19 00:44
+
+from django.db import migrations, models, transaction
+from django.db.models import DecimalField, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def _batches(queryset):
+    # Id ranges, each updated and committed in its own transaction, keep
+    # every UPDATE and the locks it holds small.
+    last = queryset.aggregate(Max("id"))["id__max"] or 0
+    for start in range(0, last, BATCH_SIZE):
+        yield queryset.filter(id__gt=start, id__lte=start + BATCH_SIZE)
+
+
+def backfill_totals(apps, schema_editor):
+    Order = apps.get_model("store", "Order")
+    OrderItem = apps.get_model("store", "OrderItem")
+    Product = apps.get_model("store", "Product")
+    ProductImage = apps.get_model("store", "ProductImage")
+    money = DecimalField(max_digits=12, decimal_places=2)
+
+    # Existing items are priced as they always were shown: at the current
+    # product price.
+    product = Product.objects.filter(id=OuterRef("product_id"))
+    image = ProductImage.objects.filter(product=OuterRef("product_id")).order_by(
+        "created_at", "id"
+    )
+    for items in _batches(OrderItem.objects.all()):
+        with transaction.atomic():
+            items.update(
+                name=Subquery(product.values("title")[:1]),
+                price=Subquery(product.values("discount_price")[:1]),
+                image=Subquery(image.values("image")[:1]),
+            )
+
+    lines = OrderItem.objects.filter(order=OuterRef("pk")).order_by().values("order")
+    for orders in _batches(Order.objects.all()):
+        with transaction.atomic():
+            orders.update(
+                items_price=Coalesce(
+                    Subquery(
+                        lines.annotate(
+                            total=Sum(F("price") * F("quantity"), output_field=money)
+                        ).values("total")
+                    ),
+                    Value(0),
+                    output_field=money,
+                ),
+                total_items=Coalesce(
+                    Subquery(lines.annotate(count=Sum("quantity")).values("count")), 0
+                ),
+            )
+            # A second UPDATE, as SET expressions see the row before the first.
+            orders.update(
+                total_price=F("items_price")
+                + Coalesce("shipping_charge", Value(0), output_field=money)
+                + Coalesce("tax", Value(0), output_field=money)
+            )
+
+
+class Migration(migrations.Migration):
+
+    # The backfill commits batch by batch instead of holding every lock to
+    # the end.
+    atomic = False
+
+    dependencies = [
+        ('store', '0006_order_creator_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='items_price',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Total Price Of Order Items', max_digits=12, verbose_name='Items Price'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_items',
+            field=models.PositiveIntegerField(default=0, help_text='Total Quantity Of Order Items', verbose_name='Total Items'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Items Price Plus Shipping Charge And Tax', max_digits=12, verbose_name='Total Price'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Product Image At Checkout', null=True, upload_to='images/', verbose_name='Image'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='name',
+            field=models.CharField(blank=True, default='', help_text='Product Title At Checkout', max_length=255, verbose_name='Product Title'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='price',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Product Price At Checkout', max_digits=7, null=True, verbose_name='Unit Price'),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 3.2.6 on 2026-10-19 01:02
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def backfill_histograms(apps, schema_editor):
+    Product = apps.get_model("store", "Product")
+    Review = apps.get_model("store", "Review")
+
+    # The nearest star, halves rounding up, as `store.ratings.star_filter`.
+    stars = {
+        1: Q(rating__gt=0, rating__lt=1.5),
+        2: Q(rating__gte=1.5, rating__lt=2.5),
+        3: Q(rating__gte=2.5, rating__lt=3.5),
+        4: Q(rating__gte=3.5, rating__lt=4.5),
+        5: Q(rating__gte=4.5),
+    }
+    reviews = Review.objects.filter(product=OuterRef("pk")).order_by().values("product")
+    counts = {
+        f"ratings_{star}": Coalesce(
+            Subquery(reviews.filter(condition).annotate(n=Count("id")).values("n")), 0
+        )
+        for star, condition in stars.items()
+    }
+
+    last = Product.objects.aggregate(Max("id"))["id__max"] or 0
+    for start in range(0, last, BATCH_SIZE):
+        Product.objects.filter(id__gt=start, id__lte=start + BATCH_SIZE).update(
+            **counts
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_review_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='ratings_1',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number Of Reviews Rated 1 Star', verbose_name='One Star Reviews'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='ratings_2',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number Of Reviews Rated 2 Stars', verbose_name='Two Star Reviews'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='ratings_3',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number Of Reviews Rated 3 Stars', verbose_name='Three Star Reviews'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='ratings_4',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number Of Reviews Rated 4 Stars', verbose_name='Four Star Reviews'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='ratings_5',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number Of Reviews Rated 5 Stars', verbose_name='Five Star Reviews'),
+        ),
+        migrations.RunPython(backfill_histograms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2.6 on 2026-10-19 01:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_rating_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Day')),
+                ('ordered_units', models.PositiveIntegerField(default=0, help_text='Units Checked Out That Day', verbose_name='Ordered Units')),
+                ('ordered_revenue', models.DecimalField(decimal_places=2, default=0, help_text='Price Of The Units Checked Out That Day', max_digits=14, verbose_name='Ordered Revenue')),
+                ('paid_units', models.PositiveIntegerField(default=0, help_text='Units Paid For That Day', verbose_name='Paid Units')),
+                ('paid_revenue', models.DecimalField(decimal_places=2, default=0, help_text='Price Of The Units Paid For That Day', max_digits=14, verbose_name='Paid Revenue')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.category')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.product')),
+                ('product_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.producttype')),
+            ],
+            options={
+                'verbose_name': 'Daily Sales',
+                'verbose_name_plural': 'Daily Sales',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='dailysales',
+            index=models.Index(fields=['category', 'day'], name='daily_sales_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailysales',
+            index=models.Index(fields=['product_type', 'day'], name='daily_sales_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailysales',
+            index=models.Index(fields=['product', 'day'], name='daily_sales_product_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailysales',
+            constraint=models.UniqueConstraint(fields=('day', 'product'), name='unique_daily_sales_per_product'),
+        ),
+    ]
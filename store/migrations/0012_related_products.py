@@ -0,0 +1,34 @@
+# Generated by Django 3.2.6 on 2026-10-19 01:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_daily_sales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('bought_together', 'Frequently Bought Together')], max_length=32, verbose_name='Kind')),
+                ('rank', models.PositiveSmallIntegerField(help_text='Position Among The Neighbours, From 1', verbose_name='Rank')),
+                ('score', models.FloatField(help_text='Orders Bought Together, Or Similarity', verbose_name='Score')),
+                ('computed_at', models.DateTimeField(db_index=True, verbose_name='Computed At Timestamp')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='store.product')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.product')),
+            ],
+            options={
+                'verbose_name': 'Related Product',
+                'verbose_name_plural': 'Related Products',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='relatedproduct',
+            constraint=models.UniqueConstraint(fields=('product', 'kind', 'rank'), name='unique_related_product_rank'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.6 on 2026-10-19 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_related_products'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='relatedproduct',
+            name='kind',
+            field=models.CharField(choices=[('bought_together', 'Frequently Bought Together'), ('similar', 'Similar')], max_length=32, verbose_name='Kind'),
+        ),
+    ]
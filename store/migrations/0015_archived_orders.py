@@ -0,0 +1,40 @@
+# Generated by Django 3.2.6 on 2026-10-19 01:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import rest_framework.utils.encoders
+import store.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('store', '0014_product_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('total_price', models.DecimalField(decimal_places=2, help_text='Items Price Plus Shipping Charge And Tax', max_digits=12, verbose_name='Total Price')),
+                ('created_at', models.DateTimeField(verbose_name='Order Created At Timestamp')),
+                ('paid_at', models.DateTimeField(blank=True, null=True, verbose_name='Order Amount Paid At Timestamp')),
+                ('delivered_at', models.DateTimeField(blank=True, null=True, verbose_name='Order Delivered At Timestamp')),
+                ('document', models.JSONField(decoder=store.models.DecimalJSONDecoder, encoder=rest_framework.utils.encoders.JSONEncoder, help_text='The Order With Its Items And Shipping Address', verbose_name='Order Document')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Order Archived At Timestamp')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Order',
+                'verbose_name_plural': 'Archived Orders',
+                'ordering': ('created_at',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['created_by', 'created_at', 'id'], name='archived_order_creator_idx'),
+        ),
+    ]
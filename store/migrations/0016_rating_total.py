@@ -0,0 +1,58 @@
+# Generated by Django 3.2.6 on 2026-10-19 01:59
+
+from django.db import migrations, models
+from django.db.models import Avg, DecimalField, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def backfill_rating_totals(apps, schema_editor):
+    Product = apps.get_model("store", "Product")
+    Review = apps.get_model("store", "Review")
+
+    # Only rated reviews count, as in `store.ratings`.
+    reviews = (
+        Review.objects.filter(product=OuterRef("pk"), rating__gt=0)
+        .order_by()
+        .values("product")
+    )
+    summary = {
+        "rating_total": Coalesce(
+            Subquery(
+                reviews.annotate(
+                    total=Sum("rating", output_field=DecimalField())
+                ).values("total")
+            ),
+            0,
+            output_field=DecimalField(),
+        ),
+        # The averages rounded on every review drifted; take them afresh.
+        "rating": Subquery(
+            reviews.annotate(
+                average=Avg("rating", output_field=DecimalField())
+            ).values("average")
+        ),
+    }
+
+    last = Product.objects.aggregate(Max("id"))["id__max"] or 0
+    for start in range(0, last, BATCH_SIZE):
+        Product.objects.filter(id__gt=start, id__lte=start + BATCH_SIZE).update(
+            **summary
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_archived_orders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Sum Of The Counted Review Ratings', max_digits=12, verbose_name='Rating Total'),
+        ),
+        migrations.RunPython(backfill_rating_totals, migrations.RunPython.noop),
+    ]
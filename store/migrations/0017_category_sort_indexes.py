@@ -0,0 +1,35 @@
+# Generated by Django 3.2.6 on 2026-10-19 02:05
+
+from django.db import migrations, models
+import django.db.models.expressions
+import store.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0016_rating_total'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_active_popular_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=store.models.NullsLastIndex(django.db.models.expressions.OrderBy(django.db.models.expressions.F('num_reviews'), descending=True, nulls_last=True), django.db.models.expressions.OrderBy(django.db.models.expressions.F('id'), descending=True), condition=models.Q(('is_active', True)), name='product_active_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'discount_price', 'id'], name='product_category_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=store.models.NullsLastIndex(django.db.models.expressions.F('category'), django.db.models.expressions.OrderBy(django.db.models.expressions.F('rating'), descending=True, nulls_last=True), django.db.models.expressions.OrderBy(django.db.models.expressions.F('id'), descending=True), condition=models.Q(('is_active', True)), name='product_category_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=store.models.NullsLastIndex(django.db.models.expressions.F('category'), django.db.models.expressions.OrderBy(django.db.models.expressions.F('num_reviews'), descending=True, nulls_last=True), django.db.models.expressions.OrderBy(django.db.models.expressions.F('id'), descending=True), condition=models.Q(('is_active', True)), name='product_category_popular_idx'),
+        ),
+    ]
@@ -1,10 +1,44 @@
-from django.db import models
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, models
+from django.db.models import F, Q, Sum, Window
+from django.db.models.expressions import OrderBy, RawSQL
+from django.db.models.functions import RowNumber
+from rest_framework.utils.encoders import JSONEncoder
 from mptt.models import MPTTModel, TreeForeignKey
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
+class NullsLastIndex(models.Index):
+    """
+    An expression index whose descending columns keep NULLs last, to match
+    ``F(...).desc(nulls_last=True)`` orderings on PostgreSQL. SQLite already
+    sorts NULLs last in descending columns and rejects the modifier in an
+    index, so it is left out there.
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.vendor != "sqlite":
+            return super().create_sql(model, schema_editor, using=using, **kwargs)
+        # As a plain column index, which SQLite's table rebuilds can rename.
+        _, expressions, options = self.deconstruct()
+        fields = [
+            "-" + expression.expression.name
+            if isinstance(expression, OrderBy) and expression.descending
+            else getattr(expression, "expression", expression).name
+            for expression in expressions
+        ]
+        return models.Index(fields=fields, **options).create_sql(
+            model, schema_editor, using=using, **kwargs
+        )
+
+
 class Category(MPTTModel):
     """
     The Category table implimented using MPTT.
@@ -89,6 +123,32 @@ class ProductSpecification(models.Model):
         verbose_name = _("Product Specification")
         verbose_name_plural = _("Product Specifications")
 
+    @staticmethod
+    def names_cache_key(product_type_id):
+        return f"store:specification-names:{product_type_id}"
+
+    @classmethod
+    def names_for_type(cls, product_type_id):
+        """Specification id to name map of a product type, cached."""
+        key = cls.names_cache_key(product_type_id)
+        names = cache.get(key)
+        if names is None:
+            names = dict(
+                cls.objects.filter(product_type_id=product_type_id).values_list(
+                    "id", "name"
+                )
+            )
+            cache.set(key, names, settings.SPECIFICATION_NAMES_TTL)
+        return names
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        cache.delete(self.names_cache_key(self.product_type_id))
+
+    def delete(self, *args, **kwargs):
+        cache.delete(self.names_cache_key(self.product_type_id))
+        return super().delete(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
@@ -148,6 +208,44 @@ class Product(models.Model):
         blank=True,
         default=0,
     )
+    rating_total = models.DecimalField(
+        verbose_name=_("Rating Total"),
+        help_text=_("Sum Of The Counted Review Ratings"),
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        editable=False,
+    )
+    ratings_1 = models.PositiveIntegerField(
+        verbose_name=_("One Star Reviews"),
+        help_text=_("Number Of Reviews Rated 1 Star"),
+        default=0,
+        editable=False,
+    )
+    ratings_2 = models.PositiveIntegerField(
+        verbose_name=_("Two Star Reviews"),
+        help_text=_("Number Of Reviews Rated 2 Stars"),
+        default=0,
+        editable=False,
+    )
+    ratings_3 = models.PositiveIntegerField(
+        verbose_name=_("Three Star Reviews"),
+        help_text=_("Number Of Reviews Rated 3 Stars"),
+        default=0,
+        editable=False,
+    )
+    ratings_4 = models.PositiveIntegerField(
+        verbose_name=_("Four Star Reviews"),
+        help_text=_("Number Of Reviews Rated 4 Stars"),
+        default=0,
+        editable=False,
+    )
+    ratings_5 = models.PositiveIntegerField(
+        verbose_name=_("Five Star Reviews"),
+        help_text=_("Number Of Reviews Rated 5 Stars"),
+        default=0,
+        editable=False,
+    )
     count_in_stock = models.IntegerField(
         verbose_name=_("Product Count In Stock"),
         help_text=_("Total Number Of Product in Stock"),
@@ -178,10 +276,66 @@ class Product(models.Model):
         verbose_name = _("Product")
         verbose_name_plural = _("Products")
         ordering = ("-created_at",)
+        # One per sort of the product lists, on the active products only.
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="product_active_newest_idx",
+                condition=Q(is_active=True),
+            ),
+            models.Index(
+                fields=["discount_price", "id"],
+                name="product_active_price_idx",
+                condition=Q(is_active=True),
+            ),
+            NullsLastIndex(
+                F("rating").desc(nulls_last=True),
+                F("id").desc(),
+                name="product_active_rating_idx",
+                condition=Q(is_active=True),
+            ),
+            NullsLastIndex(
+                F("num_reviews").desc(nulls_last=True),
+                F("id").desc(),
+                name="product_active_popular_idx",
+                condition=Q(is_active=True),
+            ),
+            # The same orderings within a category, for the category pages.
+            models.Index(
+                fields=["category", "-created_at", "-id"],
+                name="product_category_newest_idx",
+                condition=Q(is_active=True),
+            ),
+            models.Index(
+                fields=["category", "discount_price", "id"],
+                name="product_category_price_idx",
+                condition=Q(is_active=True),
+            ),
+            NullsLastIndex(
+                F("category"),
+                F("rating").desc(nulls_last=True),
+                F("id").desc(),
+                name="product_category_rating_idx",
+                condition=Q(is_active=True),
+            ),
+            NullsLastIndex(
+                F("category"),
+                F("num_reviews").desc(nulls_last=True),
+                F("id").desc(),
+                name="product_category_popular_idx",
+                condition=Q(is_active=True),
+            ),
+        ]
 
     def get_absolute_url(self):
         return reverse("store:get_individual_product", args=[self.slug])
 
+    def save(self, *args, **kwargs):
+        # Availability always follows the stock count so it can never drift
+        # from what checkout is actually able to sell.
+        self.in_stock = bool(self.count_in_stock and self.count_in_stock > 0)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.title
 
@@ -204,6 +358,19 @@ class ProductSpecificationValue(models.Model):
         verbose_name = _("Product Specification Value")
         verbose_name_plural = _("Product Specification Values")
 
+    # Specifications make products similar, so changing one marks the product
+    # changed for the next `refresh_similar`.
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.touch_product()
+
+    def delete(self, *args, **kwargs):
+        self.touch_product()
+        return super().delete(*args, **kwargs)
+
+    def touch_product(self):
+        Product.objects.filter(id=self.product_id).update(updated_at=timezone.now())
+
     def __str__(self):
         return self.value
 
@@ -285,6 +452,63 @@ class Review(models.Model):
         verbose_name = _("Product Review")
         verbose_name_plural = _("Product Reviews")
         ordering = ("created_at",)
+        indexes = [
+            models.Index(
+                fields=["product", "created_at", "id"],
+                name="review_product_created_idx",
+            ),
+            models.Index(
+                fields=["product", "rating", "created_at", "id"],
+                name="review_product_rating_idx",
+            ),
+        ]
+
+    @classmethod
+    def newest_for_products(cls, product_ids, limit):
+        """
+        The newest `limit` reviews of each product, in one query whose size
+        does not grow with the number of products. On PostgreSQL a lateral
+        join reads each product's reviews newest first from its index range
+        and stops after `limit`, so the cost follows the number of products,
+        not the number of reviews they have. Elsewhere the reviews of the
+        products are numbered per product with ``ROW_NUMBER()``.
+        """
+        product_ids = list(product_ids)
+        if not product_ids:
+            return cls.objects.none()
+
+        reviews = cls.objects.all()
+        connection = connections[reviews.db]
+        if connection.vendor == "postgresql":
+            newest = RawSQL(
+                "SELECT newest.id FROM unnest(%s::bigint[]) AS product(id) "
+                "CROSS JOIN LATERAL ("
+                f"SELECT id FROM {connection.ops.quote_name(cls._meta.db_table)} "
+                "WHERE product_id = product.id "
+                "ORDER BY created_at DESC, id DESC LIMIT %s"
+                ") newest",
+                [product_ids, limit],
+            )
+        else:
+            ranked = (
+                reviews.filter(product_id__in=product_ids)
+                .annotate(
+                    newest_rank=Window(
+                        RowNumber(),
+                        partition_by=[F("product_id")],
+                        order_by=[F("created_at").desc(), F("id").desc()],
+                    )
+                )
+                .values("id", "newest_rank")
+            )
+            sql, params = ranked.query.sql_with_params()
+            newest = RawSQL(
+                f"SELECT id FROM ({sql}) ranked WHERE newest_rank <= %s",
+                (*params, limit),
+            )
+        return reviews.filter(id__in=newest).order_by(
+            "product_id", "-created_at", "-id"
+        )
 
     def __str__(self):
         return str(self.rating)
@@ -353,28 +577,76 @@ class Order(models.Model):
         verbose_name=_("Order Created At Timestamp"),
         auto_now_add=True,
         editable=False,
+        db_index=True,
     )
 
-    @property
-    def total_price(self):
-        orderitems = self.orderitem_set.all()
-        total_price = (
-            sum([item.total_price for item in orderitems])
-            + self.shipping_charge
-            + self.tax
+    items_price = models.DecimalField(
+        verbose_name=_("Items Price"),
+        help_text=_("Total Price Of Order Items"),
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+    )
+    total_items = models.PositiveIntegerField(
+        verbose_name=_("Total Items"),
+        help_text=_("Total Quantity Of Order Items"),
+        default=0,
+    )
+    total_price = models.DecimalField(
+        verbose_name=_("Total Price"),
+        help_text=_("Items Price Plus Shipping Charge And Tax"),
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+    )
+
+    def save(self, *args, **kwargs):
+        # The total follows edits of the tax and shipping charge, as in the
+        # admin. Queryset updates of them must call `update_totals` after.
+        self.total_price = (
+            Decimal(str(self.items_price or 0))
+            + Decimal(str(self.shipping_charge or 0))
+            + Decimal(str(self.tax or 0))
         )
-        return total_price
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"tax", "shipping_charge"} & set(
+            update_fields
+        ):
+            kwargs["update_fields"] = {*update_fields, "total_price"}
+        super().save(*args, **kwargs)
 
-    @property
-    def total_items(self):
-        orderitems = self.orderitem_set.all()
-        total_items = sum([item.quantity for item in orderitems])
-        return total_items
+    def update_totals(self):
+        """Store the totals of the order items on the order."""
+        totals = self.orderitem_set.aggregate(
+            items_price=Sum(F("price") * F("quantity")),
+            total_items=Sum("quantity"),
+        )
+        self.items_price = totals["items_price"] or Decimal("0.00")
+        self.total_items = totals["total_items"] or 0
+        self.save(update_fields=["items_price", "total_items", "total_price"])
 
     class Meta:
         verbose_name = _("Order")
         verbose_name_plural = _("Orders")
         ordering = ("created_at",)
+        indexes = [
+            models.Index(
+                fields=["created_by", "created_at", "id"],
+                name="order_creator_created_idx",
+            ),
+            # Small partial indexes behind the admin's paid and delivered
+            # filters, which mostly look for the few open orders.
+            models.Index(
+                fields=["-id"],
+                name="order_unpaid_idx",
+                condition=models.Q(is_paid=False),
+            ),
+            models.Index(
+                fields=["-id"],
+                name="order_undelivered_idx",
+                condition=models.Q(is_delivered=False),
+            ),
+        ]
 
     def __str__(self):
         return str(self.id)
@@ -394,6 +666,28 @@ class OrderItem(models.Model):
         blank=True,
         default=0,
     )
+    name = models.CharField(
+        verbose_name=_("Product Title"),
+        help_text=_("Product Title At Checkout"),
+        max_length=255,
+        blank=True,
+        default="",
+    )
+    price = models.DecimalField(
+        verbose_name=_("Unit Price"),
+        help_text=_("Product Price At Checkout"),
+        max_digits=7,
+        decimal_places=2,
+        null=True,
+        blank=True,
+    )
+    image = models.ImageField(
+        verbose_name=_("Image"),
+        help_text=_("Product Image At Checkout"),
+        upload_to="images/",
+        null=True,
+        blank=True,
+    )
     created_at = models.DateTimeField(
         verbose_name=_("Order Item Created At Timestamp"),
         auto_now_add=True,
@@ -402,23 +696,31 @@ class OrderItem(models.Model):
 
     @property
     def total_price(self):
-        total_price = self.product.discount_price * self.quantity
+        total_price = self.price * self.quantity
         return total_price
 
-    @property
-    def name(self):
-        name = self.product.title
-        return name
+    def snapshot_product(self):
+        """Copy the current price, title and first image of the product."""
+        product = self.product
+        images = product.product_image.all()
+        self.name = product.title
+        self.price = product.discount_price
+        self.image = images[0].image.name if images else None
 
-    @property
-    def price(self):
-        price = self.product.discount_price
-        return price
+    def save(self, *args, **kwargs):
+        # Items keep what they were sold for, so later catalog changes never
+        # rewrite past orders.
+        if self.price is None:
+            self.snapshot_product()
+        super().save(*args, **kwargs)
+        # Items edited one by one, as in the admin, keep the order's stored
+        # totals right. Checkout creates its items in bulk and totals once.
+        self.order.update_totals()
 
-    @property
-    def image(self):
-        image = self.product.product_image.first().image.url
-        return image
+    def delete(self, *args, **kwargs):
+        deleted = super().delete(*args, **kwargs)
+        self.order.update_totals()
+        return deleted
 
     @property
     def slug(self):
@@ -495,3 +797,234 @@ class ShippingAddress(models.Model):
 
     def __str__(self):
         return self.address
+
+
+class DecimalJSONDecoder(json.JSONDecoder):
+    """Reads JSON numbers with a fraction as exact decimals, as they were."""
+
+    def __init__(self, **kwargs):
+        super().__init__(parse_float=Decimal, **kwargs)
+
+
+class ArchivedOrder(models.Model):
+    """
+    The Archived Orders table keeps paid and delivered orders moved out of
+    the order tables, each as one document holding its items and shipping
+    address. Archived orders keep their id.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    created_by = models.ForeignKey(
+        User, related_name="archived_orders", on_delete=models.CASCADE
+    )
+    total_price = models.DecimalField(
+        verbose_name=_("Total Price"),
+        help_text=_("Items Price Plus Shipping Charge And Tax"),
+        max_digits=12,
+        decimal_places=2,
+    )
+    created_at = models.DateTimeField(verbose_name=_("Order Created At Timestamp"))
+    paid_at = models.DateTimeField(
+        verbose_name=_("Order Amount Paid At Timestamp"), null=True, blank=True
+    )
+    delivered_at = models.DateTimeField(
+        verbose_name=_("Order Delivered At Timestamp"), null=True, blank=True
+    )
+    document = models.JSONField(
+        verbose_name=_("Order Document"),
+        help_text=_("The Order With Its Items And Shipping Address"),
+        encoder=JSONEncoder,
+        decoder=DecimalJSONDecoder,
+    )
+    archived_at = models.DateTimeField(
+        verbose_name=_("Order Archived At Timestamp"), auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = _("Archived Order")
+        verbose_name_plural = _("Archived Orders")
+        ordering = ("created_at",)
+        indexes = [
+            models.Index(
+                fields=["created_by", "created_at", "id"],
+                name="archived_order_creator_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.id)
+
+
+class StockReservation(models.Model):
+    """
+    The Stock Reservations table holds the stock taken by unpaid orders until
+    they are paid or the reservation expires.
+    """
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(
+        verbose_name=_("Reserved Quantity"),
+        help_text=_("Quantity Of Product Held For The Order"),
+    )
+    expires_at = models.DateTimeField(
+        verbose_name=_("Reservation Expires At Timestamp"), db_index=True
+    )
+    released_at = models.DateTimeField(
+        verbose_name=_("Reservation Released At Timestamp"),
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        verbose_name=_("Reservation Created At Timestamp"),
+        auto_now_add=True,
+        editable=False,
+    )
+
+    class Meta:
+        verbose_name = _("Stock Reservation")
+        verbose_name_plural = _("Stock Reservations")
+        ordering = ("created_at",)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} for order {self.order_id}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    The Idempotency Keys table stores the first response given to an
+    `Idempotency-Key` so retried requests can be answered by replaying it.
+    """
+
+    created_by = models.ForeignKey(
+        User, related_name="idempotency_keys", on_delete=models.CASCADE
+    )
+    key = models.CharField(
+        verbose_name=_("Idempotency Key"),
+        help_text=_("Client Supplied Request Key"),
+        max_length=255,
+    )
+    request_hash = models.CharField(
+        verbose_name=_("Request Fingerprint"),
+        help_text=_("SHA-256 Of The Request Method, Path And Body"),
+        max_length=64,
+    )
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name=_("Response Status Code"), null=True, blank=True
+    )
+    response = models.JSONField(
+        verbose_name=_("Response Body"), encoder=JSONEncoder, null=True, blank=True
+    )
+    created_at = models.DateTimeField(
+        verbose_name=_("Idempotency Key Created At Timestamp"),
+        auto_now_add=True,
+        editable=False,
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = _("Idempotency Key")
+        verbose_name_plural = _("Idempotency Keys")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["created_by", "key"], name="unique_idempotency_key_per_user"
+            )
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class DailySales(models.Model):
+    """
+    The Daily Sales table holds the units and revenue of each product per
+    day, ordered at checkout and paid, kept up to date by `store.analytics`.
+    """
+
+    day = models.DateField(verbose_name=_("Day"))
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    product_type = models.ForeignKey(ProductType, on_delete=models.CASCADE)
+    ordered_units = models.PositiveIntegerField(
+        verbose_name=_("Ordered Units"),
+        help_text=_("Units Checked Out That Day"),
+        default=0,
+    )
+    ordered_revenue = models.DecimalField(
+        verbose_name=_("Ordered Revenue"),
+        help_text=_("Price Of The Units Checked Out That Day"),
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+    )
+    paid_units = models.PositiveIntegerField(
+        verbose_name=_("Paid Units"),
+        help_text=_("Units Paid For That Day"),
+        default=0,
+    )
+    paid_revenue = models.DecimalField(
+        verbose_name=_("Paid Revenue"),
+        help_text=_("Price Of The Units Paid For That Day"),
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = _("Daily Sales")
+        verbose_name_plural = _("Daily Sales")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "product"], name="unique_daily_sales_per_product"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["category", "day"], name="daily_sales_category_idx"),
+            models.Index(fields=["product_type", "day"], name="daily_sales_type_idx"),
+            models.Index(fields=["product", "day"], name="daily_sales_product_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.day}"
+
+
+class RelatedProduct(models.Model):
+    """
+    The Related Products table holds the nearest neighbours of each product,
+    best first, as computed by `store.recommendations`.
+    """
+
+    BOUGHT_TOGETHER = "bought_together"
+    SIMILAR = "similar"
+    KINDS = [
+        (BOUGHT_TOGETHER, _("Frequently Bought Together")),
+        (SIMILAR, _("Similar")),
+    ]
+
+    product = models.ForeignKey(
+        Product, related_name="neighbours", on_delete=models.CASCADE
+    )
+    related = models.ForeignKey(Product, related_name="+", on_delete=models.CASCADE)
+    kind = models.CharField(verbose_name=_("Kind"), max_length=32, choices=KINDS)
+    rank = models.PositiveSmallIntegerField(
+        verbose_name=_("Rank"), help_text=_("Position Among The Neighbours, From 1")
+    )
+    score = models.FloatField(
+        verbose_name=_("Score"),
+        help_text=_("Orders Bought Together, Or Similarity"),
+    )
+    computed_at = models.DateTimeField(
+        verbose_name=_("Computed At Timestamp"), db_index=True
+    )
+
+    class Meta:
+        verbose_name = _("Related Product")
+        verbose_name_plural = _("Related Products")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "kind", "rank"], name="unique_related_product_rank"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.related_id} for {self.product_id} ({self.kind})"
@@ -0,0 +1,143 @@
+"""
+Cart validation and pricing.
+
+``quote_cart`` checks a whole cart against the catalog with one query and
+prices it: items at their current ``discount_price``, tax and shipping from
+the ``CART_*`` settings. Checkout prices orders with the same functions, so
+a shopper is charged what the quote showed and tax and shipping are never
+taken from the client.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.conf import settings
+
+from .models import Product
+
+CENT = Decimal("0.01")
+
+NOT_FOUND = "not_found"
+INACTIVE = "inactive"
+INSUFFICIENT_STOCK = "insufficient_stock"
+PRICE_CHANGED = "price_changed"
+
+
+def money(amount):
+    return None if amount is None else amount.quantize(CENT)
+
+
+def charges(items_price):
+    """Tax and shipping charge for an order whose items cost `items_price`."""
+    tax = (items_price * settings.CART_TAX_RATE).quantize(CENT, ROUND_HALF_UP)
+    if not items_price or items_price >= settings.CART_FREE_SHIPPING_OVER:
+        shipping_charge = Decimal("0.00")
+    else:
+        shipping_charge = settings.CART_SHIPPING_CHARGE
+    return tax, shipping_charge
+
+
+class CartLine:
+    """One product of a cart, with the quantity and price asked for."""
+
+    def __init__(self, product_id, quantity, price=None):
+        self.product_id = product_id
+        self.quantity = quantity
+        self.expected_price = price
+        self.product = None
+        self.problems = []
+
+    @property
+    def price(self):
+        return self.product.discount_price if self.product else None
+
+    @property
+    def total_price(self):
+        return self.price * self.quantity if self.product else None
+
+    def check(self):
+        product = self.product
+        if product is None:
+            self.problems.append(NOT_FOUND)
+            return
+        if not product.is_active:
+            self.problems.append(INACTIVE)
+        if (product.count_in_stock or 0) < self.quantity:
+            self.problems.append(INSUFFICIENT_STOCK)
+        if self.expected_price is not None and self.expected_price != self.price:
+            self.problems.append(PRICE_CHANGED)
+
+    def to_json(self):
+        product = self.product
+        return {
+            "product": self.product_id,
+            "qty": self.quantity,
+            "name": product.title if product else None,
+            "price": money(self.price),
+            "totalPrice": money(self.total_price),
+            "countInStock": product.count_in_stock if product else 0,
+            "problems": self.problems,
+        }
+
+
+class Quote:
+    """A priced cart. Only a valid quote can be checked out."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.valid = not any(line.problems for line in lines)
+        self.items_price = sum(
+            (line.total_price for line in lines if line.product), Decimal("0.00")
+        )
+        self.total_items = sum(line.quantity for line in lines)
+        self.tax, self.shipping_charge = charges(self.items_price)
+        self.total_price = self.items_price + self.tax + self.shipping_charge
+
+    def to_json(self):
+        # Keys as checkout takes them, so a quote can be posted back as is.
+        return {
+            "orderItems": [line.to_json() for line in self.lines],
+            "itemsPrice": money(self.items_price),
+            "tax": money(self.tax),
+            "shippingCharge": money(self.shipping_charge),
+            "totalPrice": money(self.total_price),
+            "totalItems": self.total_items,
+            "valid": self.valid,
+        }
+
+
+def parse_cart(items):
+    """
+    Cart lines from checkout style ``{"product", "qty", "price"}`` items, with
+    repeated products merged. Raises ValueError on a malformed cart.
+    """
+    lines = {}
+    for item in items:
+        try:
+            product_id, quantity = int(item["product"]), int(item["qty"])
+            price = item.get("price")
+            price = None if price is None else Decimal(str(price))
+        except (KeyError, TypeError, ValueError, InvalidOperation, AttributeError):
+            raise ValueError("Each order item needs a product id and a qty.")
+        if quantity <= 0:
+            raise ValueError("Order item quantity must be positive.")
+
+        if product_id in lines:
+            lines[product_id].quantity += quantity
+        else:
+            lines[product_id] = CartLine(product_id, quantity, price)
+    return list(lines.values())
+
+
+def quote_cart(items, products=None):
+    """
+    Check and price a cart of checkout style items, loading every product in
+    one query from `products` (default: all products).
+    """
+    if products is None:
+        products = Product.objects.all()
+    lines = parse_cart(items)
+    found = products.in_bulk([line.product_id for line in lines])
+    for line in lines:
+        line.product = found.get(line.product_id)
+        line.check()
+    return Quote(lines)
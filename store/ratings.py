@@ -0,0 +1,120 @@
+"""
+Product rating summaries.
+
+Every product stores its average ``rating``, ``num_reviews`` and a star
+histogram, the ``ratings_1`` to ``ratings_5`` counts, so showing them costs
+nothing at read time. `record_review` adds one review to them in place,
+with the product row locked so concurrent reviews never lose a count. The
+exact sum of the ratings is kept in ``rating_total`` and the average is
+taken from it each time, so rounding the shown average never builds up.
+`rebuild_rating_summaries` recomputes them from the reviews with set-based
+updates, after reviews are deleted or loaded in bulk.
+
+A review counts for the star nearest its rating, halves rounding up;
+unrated reviews and ratings of zero are not counted.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Avg,
+    Count,
+    DecimalField,
+    F,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce
+
+from .models import Product, Review
+
+STARS = range(1, 6)
+CENT = Decimal("0.01")
+
+
+def star(rating):
+    """The star of the histogram `rating` counts for, or None."""
+    rating = Decimal(str(rating)) if rating is not None else Decimal(0)
+    if rating <= 0:
+        return None
+    return min(max(int(rating.quantize(Decimal("1"), ROUND_HALF_UP)), 1), 5)
+
+
+def star_filter(stars):
+    """Filter for the reviews whose rating counts for `stars`."""
+    condition = Q(rating__gt=0) if stars == 1 else Q(rating__gte=stars - 0.5)
+    if stars < 5:
+        condition &= Q(rating__lt=stars + 0.5)
+    return condition
+
+
+def histogram(product):
+    """Review counts per star, as ``{"1": n, ..., "5": n}``."""
+    return {str(stars): getattr(product, f"ratings_{stars}") for stars in STARS}
+
+
+@transaction.atomic
+def record_review(review):
+    """Add `review` to the rating summary of its product."""
+    stars = star(review.rating)
+    if stars is None:
+        return
+
+    product = (
+        Product.objects.select_for_update()
+        .only("num_reviews", "rating_total")
+        .get(id=review.product_id)
+    )
+    rating = Decimal(str(review.rating))
+    count = (product.num_reviews or 0) + 1
+    total = product.rating_total + rating
+    Product.objects.filter(id=product.id).update(
+        **{f"ratings_{stars}": F(f"ratings_{stars}") + 1},
+        num_reviews=Coalesce(F("num_reviews"), 0) + 1,
+        rating_total=F("rating_total") + rating,
+        rating=(total / count).quantize(CENT, ROUND_HALF_UP),
+    )
+
+
+def rebuild_rating_summaries(products=None, batch_size=1000):
+    """
+    Recompute the rating summaries of `products` (default: all), updating
+    one range of `batch_size` ids per statement.
+    """
+    if products is None:
+        products = Product.objects.all()
+
+    rated = Q()
+    for stars in STARS:
+        rated |= star_filter(stars)
+    reviews = Review.objects.filter(product=OuterRef("pk")).order_by().values("product")
+
+    def count(condition):
+        return Coalesce(
+            Subquery(reviews.filter(condition).annotate(n=Count("id")).values("n")), 0
+        )
+
+    summary = {f"ratings_{stars}": count(star_filter(stars)) for stars in STARS}
+    summary["num_reviews"] = count(rated)
+    summary["rating_total"] = Coalesce(
+        Subquery(
+            reviews.filter(rated)
+            .annotate(total=Sum("rating", output_field=DecimalField()))
+            .values("total")
+        ),
+        0,
+        output_field=DecimalField(),
+    )
+    summary["rating"] = Subquery(
+        reviews.filter(rated)
+        .annotate(average=Avg("rating", output_field=DecimalField()))
+        .values("average")
+    )
+
+    last = products.aggregate(Max("id"))["id__max"] or 0
+    for start in range(0, last, batch_size):
+        products.filter(id__gt=start, id__lte=start + batch_size).update(**summary)
@@ -0,0 +1,321 @@
+"""
+Product recommendations.
+
+"Frequently bought together" counts, for every pair of products, the paid
+orders that hold both. That is the item-item co-occurrence matrix, the
+order-by-product matrix multiplied by its own transpose. The database
+computes it with one grouped self-join of the order items per batch of
+products, and only the pairs that occur come back, so the matrix stays
+sparse. The `top` best neighbours of each product are stored as
+`RelatedProduct` rows, and serving them is a single indexed read.
+
+`refresh_bought_together` only recomputes the products in orders paid since
+the last run. A pair's count can only change through an order holding both
+products, so the products of the new orders are exactly the rows that
+change.
+
+"Similar products" need no sales, so they work for new products too. Each
+product is a sparse feature vector: its product type, its category and
+every ancestor of it (products deeper in the same branch share more), its
+brand, its price band and its specification values, weighted by
+`SIMILAR_WEIGHTS` and scaled to unit length. Similarity is the dot product
+of two vectors, their cosine. An inverted index from each feature to the
+products that have it picks the candidates a product is compared to: the
+products sharing one of its selective features, those held by at most
+`MAX_POSTING` products, such as a brand, a specification value or a small
+category. Broad features, a product type or a top level category, still
+count in the scores but bring in no candidates, so the work grows with the
+catalog, not with its square. A product with no selective feature is
+compared to the first `MAX_POSTING` products of its narrowest one.
+
+Saving a product or its specifications marks it changed through
+``updated_at``, and `refresh_similar`, run on a schedule, updates the
+products changed since its last run with `update_similar`, loading the
+catalog's vectors once per run.
+"""
+
+import heapq
+import math
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from .models import (
+    Category,
+    OrderItem,
+    Product,
+    ProductSpecificationValue,
+    RelatedProduct,
+)
+
+TOP = 10
+BATCH_SIZE = 500
+# Features held by more products than this bring in no candidates.
+MAX_POSTING = 1000
+SIMILAR_WEIGHTS = {
+    "type": 1.0,
+    "category": 0.5,
+    "brand": 1.0,
+    "price": 0.5,
+    "spec": 1.0,
+}
+# Orders paid just before a refresh may commit just after it, so each
+# refresh looks back this much further. Recomputing a row twice is harmless.
+OVERLAP = timedelta(minutes=10)
+
+
+def _chunks(ids, size):
+    ids = sorted(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start : start + size]
+
+
+def co_purchases(product_ids):
+    """
+    ``(product_id, other_id, orders)`` for every product of `product_ids`
+    and every product bought with it in paid orders, by product.
+    """
+    return (
+        OrderItem.objects.filter(product_id__in=product_ids, order__is_paid=True)
+        .annotate(other=F("order__orderitem__product_id"))
+        .exclude(other=F("product_id"))
+        .values("product_id", "other")
+        .annotate(orders=Count("order_id", distinct=True))
+        .values_list("product_id", "other", "orders")
+        .order_by("product_id")
+    )
+
+
+def _store(kind, product_ids, neighbours, now):
+    """Replace the `kind` neighbours of `product_ids`."""
+    with transaction.atomic():
+        RelatedProduct.objects.filter(kind=kind, product_id__in=product_ids).delete()
+        RelatedProduct.objects.bulk_create(
+            [
+                RelatedProduct(
+                    product_id=product_id,
+                    related_id=related_id,
+                    kind=kind,
+                    rank=rank,
+                    score=score,
+                    computed_at=now,
+                )
+                for product_id, best in neighbours.items()
+                for rank, (score, related_id) in enumerate(best, 1)
+            ]
+        )
+
+
+def _bought_together(product_ids, top, now):
+    neighbours = {}
+    for product_id, rows in groupby(co_purchases(product_ids), lambda row: row[0]):
+        # Ties go to the older product, so the order is stable between runs.
+        best = heapq.nlargest(top, ((orders, -other) for _, other, orders in rows))
+        neighbours[product_id] = [(orders, -negated) for orders, negated in best]
+    _store(RelatedProduct.BOUGHT_TOGETHER, product_ids, neighbours, now)
+
+
+def refresh_bought_together(full=False, top=TOP, batch_size=BATCH_SIZE):
+    """
+    Recompute the bought together neighbours of the products in orders paid
+    since the last refresh, or of every product sold if `full`. Returns the
+    number of products recomputed.
+    """
+    now = timezone.now()
+    items = OrderItem.objects.filter(order__is_paid=True)
+    if not full:
+        last = RelatedProduct.objects.filter(
+            kind=RelatedProduct.BOUGHT_TOGETHER
+        ).aggregate(last=Max("computed_at"))["last"]
+        if last is not None:
+            items = items.filter(order__paid_at__gte=last - OVERLAP)
+
+    product_ids = set(items.values_list("product_id", flat=True).distinct())
+    if full:
+        # Products that are no longer sold together with anything.
+        product_ids.update(
+            RelatedProduct.objects.filter(
+                kind=RelatedProduct.BOUGHT_TOGETHER
+            ).values_list("product_id", flat=True)
+        )
+    for chunk in _chunks(product_ids, batch_size):
+        _bought_together(chunk, top, now)
+    return len(product_ids)
+
+
+def price_band(price):
+    """Price bands are about 41% wide, so bands grow with the price."""
+    if not price or price <= 0:
+        return None
+    return math.floor(math.log2(float(price)) * 2)
+
+
+def product_vectors(products):
+    """Unit feature vectors ``{product_id: {feature: weight}}`` of `products`."""
+    weights = SIMILAR_WEIGHTS
+    parents = dict(Category.objects.values_list("id", "parent_id"))
+    vectors = {}
+    for id, product_type_id, category_id, brand, price in products.values_list(
+        "id", "product_type_id", "category_id", "brand", "discount_price"
+    ):
+        vector = vectors[id] = {("type", product_type_id): weights["type"]}
+        while category_id is not None:
+            vector[("category", category_id)] = weights["category"]
+            category_id = parents.get(category_id)
+        if brand and brand.strip():
+            vector[("brand", brand.strip().lower())] = weights["brand"]
+        band = price_band(price)
+        if band is not None:
+            vector[("price", band)] = weights["price"]
+
+    for product_id, specification_id, value in (
+        ProductSpecificationValue.objects.filter(product__in=products)
+        .values_list("product_id", "specification_id", "value")
+        .iterator()
+    ):
+        if product_id in vectors and value.strip():
+            feature = ("spec", specification_id, value.strip().lower())
+            vectors[product_id][feature] = weights["spec"]
+
+    for vector in vectors.values():
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        for feature in vector:
+            vector[feature] /= norm
+    return vectors
+
+
+def _index(vectors):
+    """The products that have each feature, oldest first."""
+    index = defaultdict(list)
+    for id in sorted(vectors):
+        for feature in vectors[id]:
+            index[feature].append(id)
+    return index
+
+
+def _candidates(id, vectors, index):
+    """The products `id` is compared to; see the module docstring."""
+    postings = [index[feature] for feature in vectors[id]]
+    candidates = {
+        other
+        for posting in postings
+        if len(posting) <= MAX_POSTING
+        for other in posting
+    }
+    candidates.discard(id)
+    shared = [posting for posting in postings if len(posting) > 1]
+    if not candidates and shared:
+        narrowest = [other for other in min(shared, key=len) if other != id]
+        candidates.update(narrowest[:MAX_POSTING])
+    return candidates
+
+
+def _similarities(product_ids, vectors, index):
+    """The similarity of each of `product_ids` to its candidates."""
+    for id in product_ids:
+        vector = vectors[id]
+        scores = {}
+        for other in _candidates(id, vectors, index):
+            other_vector = vectors[other]
+            score = sum(
+                weight * other_vector.get(feature, 0)
+                for feature, weight in vector.items()
+            )
+            scores[other] = round(score, 6)
+        yield id, scores
+
+
+def _best(scores, top):
+    # Ties go to the older product, so the order is stable between runs.
+    best = heapq.nlargest(top, ((score, -other) for other, score in scores.items()))
+    return [(score, -negated) for score, negated in best]
+
+
+def rebuild_similar(top=TOP, batch_size=BATCH_SIZE):
+    """Recompute the similar products of every active product."""
+    now = timezone.now()
+    vectors = product_vectors(Product.objects.filter(is_active=True))
+    RelatedProduct.objects.filter(kind=RelatedProduct.SIMILAR).exclude(
+        product_id__in=vectors
+    ).delete()
+    index = _index(vectors)
+    for chunk in _chunks(vectors, batch_size):
+        neighbours = {
+            id: _best(scores, top)
+            for id, scores in _similarities(chunk, vectors, index)
+        }
+        _store(RelatedProduct.SIMILAR, chunk, neighbours, now)
+    return len(vectors)
+
+
+def update_similar(product_ids, top=TOP, vectors=None, index=None):
+    """
+    Recompute the similar products of `product_ids` after they changed, and
+    move them up, down or out of the lists of the products they compare to.
+    `vectors` and `index` are those of the active catalog, loaded here when
+    not given. When a changed product drops out of a list, the list is one
+    shorter until the next `rebuild_similar`.
+    """
+    now = timezone.now()
+    product_ids = set(product_ids)
+    if vectors is None:
+        vectors = product_vectors(Product.objects.filter(is_active=True))
+        index = _index(vectors)
+
+    neighbours, reverse = {}, defaultdict(dict)
+    for id, scores in _similarities(product_ids & vectors.keys(), vectors, index):
+        neighbours[id] = _best(scores, top)
+        for other, score in scores.items():
+            reverse[other][id] = score
+
+    # The lists that held a changed product, or that it may now join. Only
+    # the ones whose top products change are written.
+    similar = RelatedProduct.objects.filter(kind=RelatedProduct.SIMILAR)
+    lists = {other: {} for other in reverse}
+    lists.update(
+        (product_id, {})
+        for product_id in similar.filter(related_id__in=product_ids).values_list(
+            "product_id", flat=True
+        )
+    )
+    for product_id, related_id, score in similar.filter(
+        product_id__in=lists.keys()
+    ).values_list("product_id", "related_id", "score"):
+        lists[product_id][related_id] = score
+    for other, scores in lists.items():
+        if other in product_ids:
+            continue
+        kept = {id: score for id, score in scores.items() if id not in product_ids}
+        kept.update(reverse.get(other, {}))
+        best = _best(kept, top)
+        if best != _best(scores, top):
+            neighbours[other] = best
+
+    _store(RelatedProduct.SIMILAR, product_ids | neighbours.keys(), neighbours, now)
+
+
+def refresh_similar(top=TOP, batch_size=BATCH_SIZE):
+    """
+    Update the similar products of the products saved since the last
+    refresh, `batch_size` products at a time, or rebuild them all if there
+    are no similar products yet. Returns the number of products updated.
+    """
+    last = RelatedProduct.objects.filter(kind=RelatedProduct.SIMILAR).aggregate(
+        last=Max("computed_at")
+    )["last"]
+    if last is None:
+        return rebuild_similar(top, batch_size)
+
+    changed = Product.objects.filter(updated_at__gte=last - OVERLAP)
+    product_ids = list(changed.values_list("id", flat=True))
+    if not product_ids:
+        return 0
+    vectors = product_vectors(Product.objects.filter(is_active=True))
+    index = _index(vectors)
+    for chunk in _chunks(product_ids, batch_size):
+        update_similar(chunk, top, vectors, index)
+    return len(product_ids)
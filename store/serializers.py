@@ -1,7 +1,9 @@
+from django.db import models
 from rest_framework import serializers
 from rest_framework.settings import import_from_string
 
 from .models import *
+from .ratings import histogram
 
 from accounts.serializers import UserSerializer
 
@@ -25,16 +27,88 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class ProductListSerializer(serializers.ListSerializer):
+    """Loads the embedded reviews of a whole page of products at once."""
+
+    def to_representation(self, data):
+        products = list(data.all() if isinstance(data, models.Manager) else data)
+        if "reviews" in self.child.fields:
+            reviews = {product.id: [] for product in products}
+            for review in Review.newest_for_products(
+                reviews, self.child.embedded_reviews
+            ):
+                reviews[review.product_id].append(review)
+            for product in products:
+                product.newest_reviews = reviews[product.id]
+        return super().to_representation(products)
+
+
 class ProductSerializer(serializers.ModelSerializer):
+    """
+    Pass `fields` to serialize only those fields. Without it, every field but
+    the ones in `optional_fields` is serialized.
+
+    Only the newest `embedded_reviews` reviews are embedded; the rest are on
+    the product reviews endpoint.
+    """
+
     category = CategorySerializer()
     product_image = ImageSerializer(many=True, read_only=True)
-    reviews = ReviewSerializer(many=True, read_only=True)
+    reviews = serializers.SerializerMethodField(read_only=True)
+    specifications = serializers.SerializerMethodField(read_only=True)
+    rating_histogram = serializers.SerializerMethodField(read_only=True)
+
+    optional_fields = ["specifications", "rating_histogram"]
+    embedded_reviews = 5
 
     class Meta:
         model = Product
-        fields = "__all__"
+        # The histogram counts are served as `rating_histogram`.
+        exclude = ["ratings_1", "ratings_2", "ratings_3", "ratings_4", "ratings_5"]
+        list_serializer_class = ProductListSerializer
         # exclude = ["created_at", "updated_at"]
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            fields = set(self.fields) - set(self.optional_fields)
+        for name in set(self.fields) - set(fields):
+            self.fields.pop(name)
+
+    def get_reviews(self, obj):
+        reviews = getattr(obj, "newest_reviews", None)
+        if reviews is None:
+            reviews = obj.review_set.order_by("-created_at", "-id")[
+                : self.embedded_reviews
+            ]
+        return ReviewSerializer(reviews, many=True).data
+
+    def get_rating_histogram(self, obj):
+        return histogram(obj)
+
+    def get_specifications(self, obj):
+        values = getattr(obj, "specification_values", None)
+        if values is None:
+            values = obj.productspecificationvalue_set.all()
+
+        names = ProductSpecification.names_for_type(obj.product_type_id)
+        missing = {value.specification_id for value in values} - names.keys()
+        if missing:
+            # Specifications that belong to another product type.
+            names = dict(names)
+            names.update(
+                ProductSpecification.objects.filter(id__in=missing).values_list(
+                    "id", "name"
+                )
+            )
+        return {names[value.specification_id]: value.value for value in values}
+
+
+class ProductDetailSerializer(ProductSerializer):
+    """Product with its specifications as a name to value map."""
+
+    optional_fields = []
+
 
 class ShippingAddressSerializer(serializers.ModelSerializer):
     class Meta:
@@ -61,9 +135,10 @@ class OrderItemSerializer(serializers.ModelSerializer):
         ]
 
     def get_image(self, obj):
+        if not obj.image:
+            return None
         request = self.context.get("request")
-        image = obj.image
-        return request.build_absolute_uri(image)
+        return request.build_absolute_uri(obj.image.url)
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -108,3 +183,73 @@ class OrderSerializer(serializers.ModelSerializer):
         user = obj.created_by
         serializer = UserSerializer(user, many=False)
         return serializer.data
+
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """Order without its line items, for lists that only need the totals."""
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "total_price",
+            "total_items",
+            "payment_method",
+            "shipping_charge",
+            "tax",
+            "is_paid",
+            "is_delivered",
+            "paid_at",
+            "delivered_at",
+            "created_at",
+        ]
+
+
+class OrderItemArchiveSerializer(OrderItemSerializer):
+    """Order item as archived: the image is kept as its file name."""
+
+    image = serializers.CharField(source="image.name", default="")
+
+
+class OrderArchiveSerializer(OrderSerializer):
+    """
+    The document an order is archived as. The customer is left out and read
+    from the user when the archived order is shown.
+    """
+
+    class Meta(OrderSerializer.Meta):
+        fields = [
+            field for field in OrderSerializer.Meta.fields if field != "created_by"
+        ]
+
+    def get_orderItems(self, obj):
+        items = obj.orderitem_set.all()
+        return OrderItemArchiveSerializer(items, many=True).data
+
+
+class ArchivedOrderSerializer(serializers.BaseSerializer):
+    """An archived order in the shape `OrderSerializer` gives an order."""
+
+    def to_representation(self, obj):
+        request = self.context.get("request")
+        storage = OrderItem._meta.get_field("image").storage
+        order = dict(obj.document)
+        order["created_by"] = UserSerializer(obj.created_by).data
+        order["orderItems"] = [
+            dict(
+                item,
+                image=request.build_absolute_uri(storage.url(item["image"]))
+                if item["image"]
+                else None,
+            )
+            for item in order["orderItems"]
+        ]
+        return {field: order[field] for field in OrderSerializer.Meta.fields}
+
+
+class ArchivedOrderSummarySerializer(serializers.BaseSerializer):
+    """An archived order in the shape `OrderSummarySerializer` gives an order."""
+
+    def to_representation(self, obj):
+        fields = OrderSummarySerializer.Meta.fields
+        return {field: obj.document[field] for field in fields}
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent once per batch of orders moved to a new status, after the change is
+# committed, with `status` ("paid" or "delivered") and the `order_ids`.
+# Receivers get one call for a whole shift of deliveries, not one per order.
+orders_transitioned = Signal()
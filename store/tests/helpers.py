@@ -0,0 +1,46 @@
+from django.urls import reverse
+from django.utils import timezone
+
+from store.models import Category, Product, ProductType
+
+
+def make_product(user, stock, slug="django-stars"):
+    category, _ = Category.objects.get_or_create(name="django", slug="django")
+    product_type, _ = ProductType.objects.get_or_create(name="book")
+    return Product.objects.create(
+        product_type=product_type,
+        category=category,
+        created_by=user,
+        title=slug,
+        slug=slug,
+        regular_price="20.99",
+        discount_price="10.99",
+        count_in_stock=stock,
+        created_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+def checkout(client, *lines, tax="0.00", shipping_charge="0.00", **extra):
+    """Post an order of `(product, quantity)` lines to the checkout view."""
+    return client.post(
+        reverse("store:add_order_items"),
+        {
+            "orderItems": [
+                {"product": product.id, "qty": quantity} for product, quantity in lines
+            ],
+            "paymentMethod": "PayPal",
+            "tax": tax,
+            "shippingCharge": shipping_charge,
+            "shippingAddress": {
+                "name": "Shopper",
+                "address": "1 Main St",
+                "city": "Pune",
+                "state": "MH",
+                "zipcode": "411001",
+                "country": "India",
+            },
+        },
+        format="json",
+        **extra,
+    )
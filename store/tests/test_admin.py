@@ -0,0 +1,106 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.forms import FileField
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ecommerce.pagination import EstimatedCountPaginator
+from store.models import Order, OrderItem, Review, ShippingAddress
+
+from .helpers import make_product
+
+
+class LargeTableAdminTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(
+            username="admin", is_staff=True, is_superuser=True
+        )
+        self.product = make_product(self.admin, stock=100)
+        self.client.force_login(self.admin)
+
+    def add_orders(self, count):
+        for _ in range(count):
+            customer = User.objects.create(username=f"shopper{User.objects.count()}")
+            order = Order.objects.create(created_by=customer, tax=0, shipping_charge=0)
+            OrderItem.objects.create(product=self.product, order=order, quantity=1)
+            ShippingAddress.objects.create(
+                order=order,
+                customer=customer,
+                address="1 Main St",
+                city="Pune",
+                state="MH",
+                zipcode="411001",
+                country="India",
+            )
+            Review.objects.create(product=self.product, created_by=customer, rating=4)
+
+    def changelist_queries(self, model, **params):
+        url = reverse(f"admin:store_{model._meta.model_name}_changelist")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        models = [Order, OrderItem, ShippingAddress, Review]
+        self.add_orders(2)
+        few = [self.changelist_queries(model) for model in models]
+        self.add_orders(8)
+        many = [self.changelist_queries(model) for model in models]
+
+        self.assertEqual(few, many)
+
+    def test_search_is_by_exact_id(self):
+        self.add_orders(3)
+        order = Order.objects.first()
+        url = reverse("admin:store_order_changelist")
+
+        response = self.client.get(url, {"q": str(order.id)})
+        self.assertEqual(list(response.context["cl"].result_list), [order])
+
+        response = self.client.get(url, {"q": "shopper"})
+        self.assertEqual(list(response.context["cl"].result_list), [])
+
+    def test_order_page_shows_items_and_address_inline(self):
+        self.add_orders(1)
+        order = Order.objects.get()
+
+        response = self.client.get(reverse("admin:store_order_change", args=[order.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "1 Main St")
+        self.assertContains(response, self.product.title)
+
+    def test_editing_the_tax_updates_the_order_total(self):
+        self.add_orders(1)
+        order = Order.objects.get()
+        url = reverse("admin:store_order_change", args=[order.id])
+        response = self.client.get(url)
+
+        # Post the change form back as shown, with a new tax and the
+        # transaction id the form requires.
+        forms = [response.context["adminform"].form]
+        for inline in response.context["inline_admin_formsets"]:
+            forms += [inline.formset.management_form, *inline.formset.forms]
+        data = {
+            form.add_prefix(name): form[name].value()
+            for form in forms
+            for name, field in form.fields.items()
+            if form[name].value() is not None and not isinstance(field, FileField)
+        }
+        data.update(transaction_id="PAY-1", tax="2.50")
+        response = self.client.post(url, data)
+
+        self.assertEqual(response.status_code, 302)
+        order.refresh_from_db()
+        self.assertEqual(order.total_price, Decimal("13.49"))
+
+    def test_filtered_counts_stop_at_the_limit(self):
+        self.add_orders(3)
+        paginator = EstimatedCountPaginator(Order.objects.filter(is_paid=False), 100)
+        paginator.count_limit = 2
+
+        self.assertEqual(paginator.count, 2)
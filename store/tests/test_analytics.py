@@ -0,0 +1,181 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+
+from store import fulfillment
+from store.analytics import rebuild_sales, sales_report
+from store.models import Category, DailySales, Product
+
+from .helpers import checkout, make_product
+
+
+@override_settings(DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage")
+class SalesCubeTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="admin", is_staff=True)
+        self.book = Product.objects.get(id=make_product(self.user, stock=50).id)
+        # django > web > python, and a separate top level category
+        self.web = Category.objects.create(
+            name="web", slug="web", parent=self.book.category
+        )
+        self.python = Category.objects.create(
+            name="python", slug="python", parent=self.web
+        )
+        self.games = Category.objects.create(name="games", slug="games")
+        self.web_book = self.product("web-book", self.web, "5.00")
+        self.python_book = self.product("python-book", self.python, "2.50")
+        self.game = self.product("chess", self.games, "1.00")
+        self.today = timezone.localdate()
+        self.client.force_authenticate(self.user)
+
+    def product(self, slug, category, price):
+        product = make_product(self.user, stock=50, slug=slug)
+        Product.objects.filter(id=product.id).update(
+            category=category, discount_price=price
+        )
+        return Product.objects.get(id=product.id)
+
+    def checkout(self, *lines):
+        return checkout(self.client, *lines).data["order"]["id"]
+
+    def test_checkout_and_payment_add_to_the_day(self):
+        first = self.checkout((self.book, 2), (self.web_book, 1))
+        self.checkout((self.book, 1))
+        fulfillment.mark_paid([first])
+        # Paying again changes nothing.
+        fulfillment.mark_paid([first])
+
+        row = DailySales.objects.get(day=self.today, product=self.book)
+        self.assertEqual(row.ordered_units, 3)
+        self.assertEqual(row.ordered_revenue, Decimal("32.97"))
+        self.assertEqual(row.paid_units, 2)
+        self.assertEqual(row.paid_revenue, Decimal("21.98"))
+        self.assertEqual(DailySales.objects.count(), 2)
+
+    def test_category_report_rolls_up_the_subtree(self):
+        self.checkout((self.book, 1), (self.web_book, 2), (self.python_book, 4))
+        self.checkout((self.game, 3))
+
+        top = sales_report(self.today, self.today, by="category")
+        self.assertEqual(
+            [(row["key"], row["ordered_units"]) for row in top["rows"]],
+            [("django", 7), ("games", 3)],
+        )
+        self.assertEqual(top["total"]["ordered_units"], 10)
+
+        # Drilling into django: its own products, then web with python in it.
+        django = Category.objects.get(slug="django")
+        drill = sales_report(self.today, self.today, by="category", category=django)
+        self.assertEqual(
+            [
+                (row["key"], row["ordered_units"], row["ordered_revenue"])
+                for row in drill["rows"]
+            ],
+            [("django", 1, Decimal("10.99")), ("web", 6, Decimal("20.00"))],
+        )
+        self.assertEqual(drill["total"]["ordered_units"], 7)
+
+    def test_report_by_day_and_product(self):
+        self.checkout((self.book, 1))
+        DailySales.objects.update(day=self.today - timedelta(days=1))
+        self.checkout((self.book, 2), (self.game, 1))
+
+        days = sales_report(self.today - timedelta(days=1), self.today)
+        self.assertEqual(
+            [(row["key"], row["ordered_units"]) for row in days["rows"]],
+            [
+                ((self.today - timedelta(days=1)).isoformat(), 1),
+                (self.today.isoformat(), 3),
+            ],
+        )
+
+        products = sales_report(self.today, self.today, by="product")
+        self.assertEqual(
+            {row["label"]: row["ordered_units"] for row in products["rows"]},
+            {"django-stars": 2, "chess": 1},
+        )
+
+    def test_rebuild_matches_incremental_updates(self):
+        first = self.checkout((self.book, 2), (self.python_book, 1))
+        self.checkout((self.book, 1), (self.game, 5))
+        fulfillment.mark_paid([first])
+
+        def table():
+            return set(
+                DailySales.objects.values_list(
+                    "day",
+                    "product_id",
+                    "category_id",
+                    "ordered_units",
+                    "ordered_revenue",
+                    "paid_units",
+                    "paid_revenue",
+                )
+            )
+
+        incremental = table()
+        DailySales.objects.all().delete()
+        self.assertEqual(rebuild_sales(), 3)
+        self.assertEqual(table(), incremental)
+
+
+@override_settings(DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage")
+class SalesReportViewTestCase(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username="admin", is_staff=True)
+        self.product = make_product(self.admin, stock=10)
+        self.client.force_authenticate(self.admin)
+
+    def get(self, **params):
+        return self.client.get(reverse("store:get_sales_report"), params)
+
+    def test_checkout_and_payment_views_feed_the_report(self):
+        shopper = User.objects.create(username="shopper")
+        self.client.force_authenticate(shopper)
+        response = checkout(self.client, (self.product, 2))
+        order_id = response.data["order"]["id"]
+        # A retry under a new Idempotency-Key does not count the payment again.
+        for key in ["first", "second"]:
+            self.client.put(
+                reverse("store:update_order_to_paid", args=[order_id]),
+                HTTP_IDEMPOTENCY_KEY=key,
+            )
+
+        self.client.force_authenticate(self.admin)
+        response = self.get(by="category", category="django")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["rows"],
+            [
+                {
+                    "key": "django",
+                    "label": "django",
+                    "ordered_units": 2,
+                    "ordered_revenue": Decimal("21.98"),
+                    "paid_units": 2,
+                    "paid_revenue": Decimal("21.98"),
+                }
+            ],
+        )
+
+    def test_admin_only(self):
+        self.client.force_authenticate(User.objects.create(username="shopper"))
+        self.assertEqual(self.get().status_code, 403)
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.get(start="yesterday").status_code, 400)
+        self.assertEqual(
+            self.get(start="2024-02-01", end="2024-01-01").status_code, 400
+        )
+        self.assertEqual(
+            self.get(start="2020-01-01", end="2024-01-01").status_code, 400
+        )
+        self.assertEqual(self.get(by="week").status_code, 400)
+        self.assertEqual(self.get(category="missing").status_code, 404)
@@ -0,0 +1,53 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from ecommerce import api_docs
+
+
+class ApiDocsTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.schema_file = os.path.join(directory.name, "api_schema.json")
+        settings = override_settings(API_SCHEMA_FILE=self.schema_file)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # Every test starts from a process that has not loaded the schema.
+        api_docs._schema = None
+        self.addCleanup(setattr, api_docs, "_schema", None)
+
+    def get_docs(self, **headers):
+        return self.client.get(
+            "/", {"format": "openapi"}, HTTP_HOST="localhost", **headers
+        )
+
+    def test_schema_is_served_with_an_etag(self):
+        response = self.get_docs()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("/api/products/", response.json()["paths"])
+        self.assertNotIn("host", response.json())
+        self.assertTrue(os.path.exists(self.schema_file))
+
+        revalidated = self.get_docs(HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated["ETag"], response["ETag"])
+
+    def test_saved_schema_is_reused_while_the_url_conf_is_unchanged(self):
+        api_docs.save_schema(api_docs.build_schema())
+
+        with mock.patch.object(api_docs, "build_schema") as build_schema:
+            self.assertEqual(self.get_docs().status_code, 200)
+        build_schema.assert_not_called()
+
+    def test_schema_is_rebuilt_when_the_url_conf_changed(self):
+        stale = api_docs.ApiSchema("stale", "{}", "{}")
+        api_docs.save_schema(stale)
+
+        response = self.get_docs()
+
+        self.assertIn("/api/products/", response.json()["paths"])
+        self.assertNotEqual(api_docs.load_schema().fingerprint, "stale")
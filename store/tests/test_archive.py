@@ -0,0 +1,205 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+
+from store import analytics
+from store.archive import archive_orders
+from store.models import (
+    ArchivedOrder,
+    DailySales,
+    Order,
+    OrderItem,
+    ProductImage,
+    ShippingAddress,
+)
+
+from .helpers import make_product
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage",
+    ORDER_ARCHIVE_AFTER=timedelta(days=365),
+)
+class OrderArchiveTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="shopper")
+        self.product = make_product(self.user, stock=100)
+        ProductImage.objects.create(product=self.product, image="images/book.png")
+
+    def order(self, days_ago, paid=True, delivered=True):
+        created_at = timezone.now() - timedelta(days=days_ago)
+        order = Order.objects.create(
+            created_by=self.user,
+            tax="1.00",
+            shipping_charge="2.00",
+            is_paid=paid,
+            paid_at=created_at if paid else None,
+            is_delivered=delivered,
+            delivered_at=created_at if delivered else None,
+        )
+        Order.objects.filter(id=order.id).update(created_at=created_at)
+        ShippingAddress.objects.create(
+            order=order,
+            customer=self.user,
+            address="1 Main St",
+            city="Pune",
+            state="MH",
+            zipcode="411001",
+            country="India",
+        )
+        OrderItem.objects.create(product=self.product, order=order, quantity=2)
+        order.update_totals()
+        return Order.objects.get(id=order.id)
+
+    def test_moves_only_old_paid_and_delivered_orders(self):
+        old = self.order(days_ago=400)
+        self.order(days_ago=400, paid=False)
+        self.order(days_ago=400, delivered=False)
+        self.order(days_ago=30)
+
+        self.assertEqual(archive_orders(), 1)
+
+        self.assertFalse(Order.objects.filter(id=old.id).exists())
+        self.assertFalse(OrderItem.objects.filter(order_id=old.id).exists())
+        self.assertFalse(ShippingAddress.objects.filter(order_id=old.id).exists())
+        self.assertEqual(Order.objects.count(), 3)
+
+        archived = ArchivedOrder.objects.get()
+        self.assertEqual(archived.id, old.id)
+        self.assertEqual(archived.created_by, self.user)
+        self.assertEqual(archived.total_price, Decimal("24.98"))
+        self.assertEqual(archived.document["orderItems"][0]["image"], "images/book.png")
+        self.assertEqual(archived.document["shippingAddress"]["city"], "Pune")
+        self.assertNotIn("created_by", archived.document)
+
+        self.assertEqual(archive_orders(), 0)
+        self.assertEqual(archive_orders(older_than=timedelta(days=7)), 1)
+
+    def test_moves_in_batches(self):
+        for _ in range(5):
+            self.order(days_ago=400)
+
+        self.assertEqual(archive_orders(batch_size=2), 5)
+
+        self.assertEqual(ArchivedOrder.objects.count(), 5)
+        self.assertFalse(Order.objects.exists())
+
+    def test_batch_query_count_does_not_grow_with_orders(self):
+        counts = []
+        for orders in [1, 4]:
+            for _ in range(orders):
+                self.order(days_ago=400)
+            with CaptureQueriesContext(connection) as queries:
+                archive_orders()
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_history_walks_live_and_archived_orders(self):
+        orders = [self.order(days_ago) for days_ago in [500, 400, 300, 200, 1]]
+        # An old order not delivered yet stays among the newer archived ones.
+        orders.insert(1, self.order(days_ago=450, delivered=False))
+        archive_orders()
+        self.client.force_authenticate(self.user)
+
+        seen = []
+        params = {"page_size": 2}
+        while True:
+            response = self.client.get(reverse("store:get_order_history"), params)
+            seen += response.data["orders"]
+            if response.data["next"] is None:
+                break
+            params["cursor"] = response.data["next"]
+
+        self.assertEqual(
+            [order["id"] for order in seen], [order.id for order in reversed(orders)]
+        )
+        live, archived = seen[0], seen[-1]
+        self.assertEqual(list(archived), list(live))
+        self.assertEqual(archived["created_by"]["username"], "shopper")
+        self.assertEqual(
+            archived["orderItems"],
+            [
+                dict(
+                    live["orderItems"][0],
+                    id=archived["orderItems"][0]["id"],
+                    created_at=archived["orderItems"][0]["created_at"],
+                )
+            ],
+        )
+        self.assertEqual(archived["total_price"], live["total_price"])
+
+        response = self.client.get(
+            reverse("store:get_order_history"), {"summary": "true"}
+        )
+        summaries = response.data["orders"]
+        self.assertEqual(list(summaries[-1]), list(summaries[0]))
+        self.assertNotIn("orderItems", summaries[-1])
+
+    def test_detail_falls_back_to_the_archive(self):
+        order = self.order(days_ago=400)
+        archive_orders()
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse("store:get_order_by_id", args=[order.id]))
+        self.assertEqual(response.data["order"]["id"], order.id)
+        self.assertEqual(response.data["order"]["shippingAddress"]["city"], "Pune")
+
+        self.client.force_authenticate(User.objects.create(username="other"))
+        response = self.client.get(reverse("store:get_order_by_id", args=[order.id]))
+        self.assertEqual(response.data["detail"], "Not authorized to view this order!")
+
+    def test_admin_summary_counts_archived_orders(self):
+        old = self.order(days_ago=400)
+        self.order(days_ago=1)
+        archive_orders()
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(reverse("store:get_summary_for_admin_dashboard"))
+
+        self.assertEqual(response.data["ordersCount"], 2)
+        self.assertEqual(response.data["ordersPrice"], 2 * Decimal("24.98"))
+        self.assertEqual(
+            response.data["salesData"][0],
+            {"id": old.created_at.strftime("%Y-%m"), "totalSales": Decimal("24.98")},
+        )
+
+    def test_admin_order_page_redirects_to_the_archive(self):
+        order = self.order(days_ago=400)
+        archive_orders()
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("admin:store_order_change", args=[order.id]))
+
+        url = reverse("admin:store_archivedorder_change", args=[order.id])
+        self.assertRedirects(response, url)
+        self.assertContains(self.client.get(url), "Archived Order")
+
+    def test_rebuilding_sales_keeps_archived_days(self):
+        old = self.order(days_ago=400)
+        analytics.record_checkout(old.orderitem_set.all(), old.created_at.date())
+        archive_orders()
+        self.order(days_ago=1)
+
+        analytics.rebuild_sales(start=timezone.localdate() - timedelta(days=500))
+
+        days = DailySales.objects.order_by("day").values_list("day", flat=True)
+        self.assertEqual(
+            list(days),
+            [
+                timezone.localtime(old.created_at).date(),
+                timezone.localdate() - timedelta(days=1),
+            ],
+        )
@@ -0,0 +1,43 @@
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from .helpers import make_product
+
+
+@override_settings(DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage")
+class AsyncCatalogViewsTestCase(TransactionTestCase):
+    # The async views query from pool threads with their own connections, so
+    # the data has to be committed for them to see it. Catalog reads may also
+    # be routed to a replica alias.
+    databases = "__all__"
+
+    def setUp(self):
+        self.user = User.objects.create(username="shopper")
+        make_product(self.user, stock=3)
+        self.client = APIClient()
+
+    def test_async_views_match_sync_payloads(self):
+        for name, kwargs in [
+            ("all_products", {}),
+            ("top_products", {}),
+            ("get_individual_product", {"slug": "django-stars"}),
+            ("all_top_level_categories", {}),
+            ("get_products_by_category", {"slug": "django"}),
+        ]:
+            with self.subTest(name):
+                sync = self.client.get(reverse(f"store:{name}", kwargs=kwargs))
+                pooled = self.client.get(reverse(f"store_async:{name}", kwargs=kwargs))
+
+                self.assertEqual(pooled.status_code, sync.status_code)
+                self.assertEqual(pooled.json(), sync.json())
+
+    def test_async_views_keep_authentication(self):
+        url = reverse("accounts_async:user_profile")
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.json()["user"]["username"], "shopper")
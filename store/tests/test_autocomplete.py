@@ -0,0 +1,142 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+
+from store.autocomplete import PrefixIndex, autocomplete, normalize
+from store.models import Category, DailySales, Product
+
+from .helpers import make_product
+
+
+class PrefixIndexTestCase(TestCase):
+    def test_matches_from_any_word_and_ranks(self):
+        index = PrefixIndex()
+        index.extend(
+            [
+                (1, "Two Scoops of Django", (1,), "two scoops"),
+                (2, "Django for APIs", (5,), "apis"),
+                (3, "Crème Brûlée", (0,), "creme"),
+            ]
+        )
+
+        self.assertEqual(index.search("dj", 10), ["apis", "two scoops"])
+        self.assertEqual(index.search("scoops of d", 10), ["two scoops"])
+        self.assertEqual(index.search("creme br", 10), ["creme"])
+        self.assertEqual(index.search("dj", 1), ["apis"])
+        self.assertEqual(index.search("  ", 10), [])
+
+        index.add(1, "Two Scoops of Flask", (9,), "flask")
+        index.remove(2)
+        self.assertEqual(index.search("dj", 10), [])
+        self.assertEqual(index.search("fl", 10), ["flask"])
+        self.assertEqual(len(index.keys), 6)
+
+    def test_normalize(self):
+        self.assertEqual(normalize("  Ñandú -- T-Shirt! "), "nandu t shirt")
+
+
+class AutocompleteTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="admin")
+        self.scoops = make_product(self.user, stock=5, slug="two-scoops")
+        self.apis = make_product(self.user, stock=5, slug="django-apis")
+        Product.objects.filter(id=self.scoops.id).update(
+            title="Two Scoops of Django", brand="Feldroy"
+        )
+        Product.objects.filter(id=self.apis.id).update(
+            title="Django for APIs", brand="Feldroy"
+        )
+        # Paid sales put Two Scoops first.
+        DailySales.objects.create(
+            day=timezone.localdate(),
+            product=self.scoops,
+            category=self.scoops.category,
+            product_type=self.scoops.product_type,
+            paid_units=3,
+        )
+        autocomplete.load()
+        self.addCleanup(setattr, autocomplete, "index", None)
+
+    def suggest(self, q, **params):
+        response = self.client.get(
+            reverse("store:autocomplete_products"), {"q": q, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [(row["type"], row["text"]) for row in response.data["suggestions"]]
+
+    def test_suggestions_are_answered_from_memory(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.suggest("dj"),
+                [
+                    ("product", "Two Scoops of Django"),
+                    ("category", "django"),
+                    ("product", "Django for APIs"),
+                ],
+            )
+        self.assertEqual(self.suggest("feld"), [("brand", "Feldroy")])
+        self.assertEqual(
+            self.suggest("dj", limit=1), [("product", "Two Scoops of Django")]
+        )
+
+    def test_signals_update_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            flask = make_product(self.user, stock=5, slug="flask-web")
+            flask.title = "Flask Web Development"
+            flask.brand = "O'Reilly"
+            flask.save()
+        self.assertEqual(self.suggest("fl"), [("product", "Flask Web Development")])
+        self.assertEqual(self.suggest("o rei"), [("brand", "O'Reilly")])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            flask.is_active = False
+            flask.save()
+            Category.objects.create(name="Flasks", slug="flasks")
+        self.assertEqual(self.suggest("fl"), [("category", "Flasks")])
+        self.assertEqual(self.suggest("o rei"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.apis.delete()
+        self.assertNotIn(("product", "Django for APIs"), self.suggest("dj"))
+        self.assertEqual(self.suggest("feld"), [("brand", "Feldroy")])
+
+    def test_stale_index_answers_while_reloading_in_the_background(self):
+        autocomplete.loaded_at -= settings.AUTOCOMPLETE_TTL + 1
+        Product.objects.filter(id=self.apis.id).update(title="Flask for APIs")
+
+        with mock.patch.object(autocomplete, "reload_in_background") as reload:
+            with self.assertNumQueries(0):
+                self.assertIn(("product", "Django for APIs"), self.suggest("dj"))
+                self.suggest("dj")
+        reload.assert_called_once_with()
+        self.assertTrue(autocomplete.reloading)
+
+        # What the background thread runs, less closing its connections.
+        autocomplete.load()
+        autocomplete.reloading = False
+        self.assertEqual(self.suggest("fl"), [("product", "Flask for APIs")])
+
+    def test_changes_made_during_a_reload_are_kept(self):
+        build = type(autocomplete).build
+
+        def build_then_change(fresh):
+            build(fresh)
+            autocomplete.product_changed(self.apis, deleted=True)
+
+        with mock.patch.object(type(autocomplete), "build", build_then_change):
+            autocomplete.load()
+
+        self.assertNotIn(("product", "Django for APIs"), self.suggest("dj"))
+
+    def test_bad_limit(self):
+        url = reverse("store:autocomplete_products")
+        self.assertEqual(
+            self.client.get(url, {"q": "a", "limit": "x"}).status_code, 400
+        )
+        self.assertEqual(self.client.get(url, {"q": "a", "limit": 99}).status_code, 400)
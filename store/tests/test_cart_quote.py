@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+
+from .helpers import make_product
+
+
+@override_settings(
+    CART_TAX_RATE=Decimal("0.10"),
+    CART_SHIPPING_CHARGE=Decimal("5.00"),
+    CART_FREE_SHIPPING_OVER=Decimal("50.00"),
+)
+class CartQuoteTestCase(APITestCase):
+    url = reverse("store:quote_cart")
+
+    def setUp(self):
+        user = User.objects.create(username="seller")
+        self.book = make_product(user, stock=3, slug="book")
+        self.pen = make_product(user, stock=10, slug="pen")
+
+    def quote(self, items):
+        response = self.client.post(self.url, {"orderItems": items}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.data["quote"]
+
+    def test_valid_cart_is_priced(self):
+        with self.assertNumQueries(1):
+            quote = self.quote(
+                [
+                    {"product": self.pen.id, "qty": 1},
+                    {"product": self.book.id, "qty": 2, "price": "10.99"},
+                    {"product": self.pen.id, "qty": 1},
+                ]
+            )
+
+        self.assertTrue(quote["valid"])
+        self.assertEqual(
+            [(line["product"], line["qty"]) for line in quote["orderItems"]],
+            [(self.pen.id, 2), (self.book.id, 2)],
+        )
+        self.assertEqual(quote["itemsPrice"], Decimal("43.96"))
+        self.assertEqual(quote["tax"], Decimal("4.40"))
+        self.assertEqual(quote["shippingCharge"], Decimal("5.00"))
+        self.assertEqual(quote["totalPrice"], Decimal("53.36"))
+        self.assertEqual(quote["totalItems"], 4)
+
+    def test_free_shipping_over_the_threshold(self):
+        quote = self.quote([{"product": self.pen.id, "qty": 5}])
+
+        self.assertEqual(quote["itemsPrice"], Decimal("54.95"))
+        self.assertEqual(quote["shippingCharge"], Decimal("0.00"))
+
+    def test_every_problem_is_reported_at_once(self):
+        self.pen.is_active = False
+        self.pen.save()
+
+        quote = self.quote(
+            [
+                {"product": self.book.id, "qty": 4, "price": "9.99"},
+                {"product": self.pen.id, "qty": 1},
+                {"product": 0, "qty": 1},
+            ]
+        )
+
+        self.assertFalse(quote["valid"])
+        self.assertEqual(
+            [line["problems"] for line in quote["orderItems"]],
+            [["insufficient_stock", "price_changed"], ["inactive"], ["not_found"]],
+        )
+
+    def test_checkout_rejects_a_cart_the_quote_rejects(self):
+        shopper = User.objects.create(username="shopper")
+        self.client.force_authenticate(shopper)
+
+        response = self.client.post(
+            reverse("store:add_order_items"),
+            {
+                "orderItems": [{"product": self.book.id, "qty": 1, "price": "1.00"}],
+                "paymentMethod": "PayPal",
+                "shippingAddress": {},
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["product"], self.book.id)
+        self.assertEqual(
+            response.data["quote"]["orderItems"][0]["problems"], ["price_changed"]
+        )
+
+    def test_malformed_cart(self):
+        for items in [
+            [{"product": self.book.id}],
+            [{"product": self.book.id, "qty": 0}],
+        ]:
+            with self.subTest(items):
+                response = self.client.post(
+                    self.url, {"orderItems": items}, format="json"
+                )
+                self.assertEqual(response.status_code, 400)
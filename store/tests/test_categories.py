@@ -0,0 +1,137 @@
+import csv
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from mptt.exceptions import InvalidMove
+
+from store.categories import import_categories, move_categories, rename_categories
+from store.models import Category
+
+
+class CategoryTreeTestCase(TestCase):
+    def setUp(self):
+        # books: fiction, science (physics); games: board
+        for name, parent in [
+            ("books", None),
+            ("fiction", "books"),
+            ("science", "books"),
+            ("physics", "science"),
+            ("games", None),
+            ("board", "games"),
+        ]:
+            Category.objects.create(
+                name=name,
+                slug=name,
+                parent=parent and Category.objects.get(slug=parent),
+            )
+
+    def category(self, slug):
+        return Category.objects.get(slug=slug)
+
+    def assertTreeIsSound(self):
+        # A full rebuild from the parent links must not move anything.
+        positions = list(
+            Category.objects.order_by("pk").values_list(
+                "pk", "tree_id", "lft", "rght", "level"
+            )
+        )
+        Category.objects.rebuild()
+        self.assertEqual(
+            positions,
+            list(
+                Category.objects.order_by("pk").values_list(
+                    "pk", "tree_id", "lft", "rght", "level"
+                )
+            ),
+        )
+
+    def test_move_renumbers_the_affected_trees_once(self):
+        renumbered = move_categories(
+            Category.objects.filter(slug="science"), self.category("games")
+        )
+
+        self.assertEqual(self.category("physics").get_root().slug, "games")
+        # Both roots, and the moved pair. fiction and board keep their places.
+        self.assertEqual(renumbered, 4)
+        self.assertTreeIsSound()
+
+    def test_move_into_own_subtree_is_refused(self):
+        with self.assertRaises(InvalidMove):
+            move_categories([self.category("science")], self.category("physics"))
+
+        self.assertEqual(self.category("science").parent.slug, "books")
+
+    def test_rename_reorders_siblings(self):
+        renumbered = rename_categories({"fiction": "tales"})
+
+        children = self.category("books").get_children()
+        self.assertEqual([c.slug for c in children], ["science", "fiction"])
+        self.assertEqual(renumbered, 3)
+        self.assertTreeIsSound()
+
+    def test_import_creates_and_moves_categories(self):
+        renumbered = import_categories(
+            [
+                ("chemistry", "chemistry", "science"),
+                ("organic", "organic", "chemistry"),
+                ("board", "board", "science"),
+            ]
+        )
+
+        self.assertEqual(self.category("organic").get_root().slug, "books")
+        self.assertEqual(
+            [c.slug for c in self.category("science").get_children()],
+            ["board", "chemistry", "physics"],
+        )
+        self.assertGreaterEqual(renumbered, 3)
+        self.assertTreeIsSound()
+
+    def test_import_with_new_top_level_category(self):
+        import_categories([("art", "art", None), ("paint", "paint", "art")])
+
+        roots = Category.objects.filter(parent=None).order_by("tree_id")
+        self.assertEqual([c.slug for c in roots], ["art", "books", "games"])
+        self.assertTreeIsSound()
+
+    def test_import_rejects_cycles(self):
+        with self.assertRaises(InvalidMove):
+            import_categories([("a", "a", "b"), ("b", "b", "a")])
+
+    def test_commands_report_renumbered_rows(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "names.csv")
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerows([["slug", "name"], ["fiction", "tales"]])
+
+        out = StringIO()
+        call_command("rename_categories", path, stdout=out)
+        call_command("move_categories", "board", "--parent", "books", stdout=out)
+
+        self.assertIn("Renamed 1 category(ies); 3 row(s) renumbered.", out.getvalue())
+        self.assertIn("Moved 1 category(ies)", out.getvalue())
+        self.assertTreeIsSound()
+
+    def test_admin_action_moves_selected_categories(self):
+        admin = User.objects.create(username="admin", is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+
+        response = self.client.post(
+            reverse("admin:store_category_changelist"),
+            {
+                "action": "move_to_parent",
+                "_selected_action": [self.category("board").pk],
+                "parent": self.category("science").pk,
+            },
+            follow=True,
+        )
+
+        self.assertContains(response, "row(s) renumbered")
+        self.assertEqual(self.category("board").parent.slug, "science")
+        self.assertTreeIsSound()
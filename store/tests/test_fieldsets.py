@@ -0,0 +1,94 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+
+from store.models import ProductImage, Review
+
+from .helpers import make_product
+
+
+@override_settings(DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage")
+class ProductFieldsetTestCase(APITestCase):
+    def setUp(self):
+        user = User.objects.create(username="seller")
+        for slug in ("first", "second"):
+            product = make_product(user, stock=5, slug=slug)
+            ProductImage.objects.create(product=product, alt_text=slug)
+            Review.objects.create(product=product, created_by=user, rating=4)
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, [query["sql"] for query in queries]
+
+    def test_fields_trim_payload_and_columns(self):
+        response, queries = self.get(
+            reverse("store:all_products"), {"fields": "id,title,slug"}
+        )
+
+        self.assertEqual(
+            [set(product) for product in response.data["products"]],
+            [{"id", "title", "slug"}] * 2,
+        )
+        # The page count and the products, without description or relations.
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("description", queries[1])
+        self.assertNotIn("store_category", queries[1])
+
+    def test_expand_loads_only_the_named_relations(self):
+        response, queries = self.get(
+            reverse("store:all_products"),
+            {"fields": "title", "expand": "product_image"},
+        )
+
+        self.assertEqual(
+            {
+                product["product_image"][0]["alt_text"]
+                for product in response.data["products"]
+            },
+            {"first", "second"},
+        )
+        self.assertEqual(set(response.data["products"][0]), {"title", "product_image"})
+        self.assertEqual(len(queries), 3)
+        self.assertFalse(any("store_review" in query for query in queries))
+
+    def test_defaults_are_unchanged(self):
+        response, _ = self.get(
+            reverse("store:get_individual_product", args=["first"]), {}
+        )
+
+        self.assertIn("description", response.data)
+        self.assertEqual(response.data["category"]["slug"], "django")
+        self.assertEqual(len(response.data["reviews"]), 1)
+        self.assertEqual(response.data["specifications"], {})
+
+    def test_detail_and_category_views_take_fields(self):
+        response, queries = self.get(
+            reverse("store:get_individual_product", args=["first"]), {"fields": "title"}
+        )
+        self.assertEqual(response.data, {"title": "first"})
+        self.assertEqual(len(queries), 1)
+
+        response, _ = self.get(
+            reverse("store:get_products_by_category", args=["django"]),
+            {"fields": "slug"},
+        )
+        self.assertEqual(
+            {product["slug"] for product in response.data}, {"first", "second"}
+        )
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(
+            reverse("store:all_products"),
+            {"fields": "title,secret", "expand": "rating"},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["detail"], "Unknown product fields: rating, secret."
+        )
@@ -0,0 +1,190 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+
+from store import fulfillment
+from store.inventory import release_expired_reservations, reserve_stock
+from store.models import Order, Product, StockReservation
+from store.signals import orders_transitioned
+
+from .helpers import make_product
+
+
+class BulkOrderTransitionTestCase(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(
+            username="admin", is_staff=True, is_superuser=True
+        )
+        self.product = make_product(self.admin, stock=10)
+        self.client.force_authenticate(self.admin)
+
+        self.notifications = []
+        receiver = lambda **kwargs: self.notifications.append(
+            (kwargs["status"], kwargs["order_ids"])
+        )
+        orders_transitioned.connect(receiver, weak=False)
+        self.addCleanup(orders_transitioned.disconnect, receiver)
+
+    def order(self, quantity=1, **state):
+        order = Order.objects.create(
+            created_by=self.admin, tax=0, shipping_charge=0, **state
+        )
+        reserve_stock(order, [(self.product.id, quantity)])
+        return order
+
+    def put(self, name, ids):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                reverse(f"store:{name}"), {"orders": ids}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        return {row["id"]: row["outcome"] for row in response.data["orders"]}
+
+    def test_deliver_checks_state_and_notifies_once(self):
+        paid = [self.order(is_paid=True) for _ in range(3)]
+        unpaid = self.order()
+        delivered = self.order(is_paid=True, is_delivered=True)
+        ids = [order.id for order in paid] + [unpaid.id, delivered.id, 0]
+
+        outcomes = self.put("deliver_orders", ids)
+
+        self.assertEqual(
+            outcomes,
+            {
+                **{order.id: "delivered" for order in paid},
+                unpaid.id: "unpaid",
+                delivered.id: "already_delivered",
+                0: "not_found",
+            },
+        )
+        self.assertEqual(Order.objects.filter(is_delivered=True).count(), len(paid) + 1)
+        self.assertEqual(self.notifications, [("delivered", [o.id for o in paid])])
+
+    def test_deliver_runs_one_update_for_the_batch(self):
+        orders = [self.order(is_paid=True) for _ in range(5)]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.put(
+                reverse("store:deliver_orders"),
+                {"orders": [order.id for order in orders]},
+                format="json",
+            )
+
+        # The locking read and the update.
+        statements = [
+            query["sql"].split()[0]
+            for query in queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+        self.assertEqual(statements, ["SELECT", "UPDATE"])
+
+    def test_pay_commits_reservations(self):
+        fresh = self.order(quantity=2)
+        lapsed = self.order(quantity=3)
+        sold_out = self.order(quantity=4)
+        later = timezone.now() + timedelta(hours=1)
+        StockReservation.objects.filter(order=fresh).update(
+            expires_at=later + timedelta(hours=1)
+        )
+        release_expired_reservations(now=later)
+        self.assertEqual(Product.objects.get().count_in_stock, 8)
+        # The lapsed order gets its stock back; the sold out one cannot.
+        Product.objects.update(count_in_stock=3)
+
+        outcomes = self.put("pay_orders", [fresh.id, lapsed.id, sold_out.id])
+
+        self.assertEqual(
+            outcomes, {fresh.id: "paid", lapsed.id: "paid", sold_out.id: "out_of_stock"}
+        )
+        self.assertEqual(Product.objects.get().count_in_stock, 0)
+        self.assertFalse(StockReservation.objects.exclude(order=sold_out).exists())
+        self.assertFalse(Order.objects.get(id=sold_out.id).is_paid)
+        self.assertEqual(self.notifications, [("paid", [fresh.id, lapsed.id])])
+
+    def put_one(self, name, id):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.put(reverse(f"store:{name}", args=[id]))
+
+    def test_single_order_endpoints_only_move_eligible_orders(self):
+        order = self.order()
+
+        response = self.put_one("update_order_to_delivered", order.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.get(id=order.id).is_delivered)
+
+        for _ in range(2):
+            response = self.put_one("update_order_to_paid", order.id)
+            self.assertEqual(response.status_code, 200)
+        for _ in range(2):
+            response = self.put_one("update_order_to_delivered", order.id)
+            self.assertEqual(response.status_code, 200)
+
+        order = Order.objects.get(id=order.id)
+        self.assertTrue(order.is_paid and order.is_delivered)
+        self.assertFalse(StockReservation.objects.filter(order=order).exists())
+        self.assertEqual(
+            self.notifications, [("paid", [order.id]), ("delivered", [order.id])]
+        )
+        self.assertEqual(self.put_one("update_order_to_paid", 0).status_code, 404)
+
+    def test_single_order_payment_reports_the_sold_out_product(self):
+        order = self.order(quantity=4)
+        release_expired_reservations(now=timezone.now() + timedelta(hours=1))
+        Product.objects.update(count_in_stock=3)
+
+        response = self.put_one("update_order_to_paid", order.id)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["product"], self.product.id)
+        self.assertFalse(Order.objects.get(id=order.id).is_paid)
+
+    def test_out_of_stock_outcome_names_the_product(self):
+        order = self.order(quantity=4)
+        release_expired_reservations(now=timezone.now() + timedelta(hours=1))
+        Product.objects.update(count_in_stock=3)
+
+        outcome = fulfillment.mark_paid([order.id])[order.id]
+        # Restocked right after: the outcome still names what ran out.
+        Product.objects.update(count_in_stock=10)
+
+        self.assertEqual(outcome, fulfillment.OUT_OF_STOCK)
+        self.assertEqual(outcome.product_id, self.product.id)
+        self.assertEqual(self.put("pay_orders", [order.id]), {order.id: "paid"})
+
+    def test_bulk_endpoints_are_admin_only(self):
+        self.client.force_authenticate(User.objects.create(username="shopper"))
+
+        response = self.client.put(
+            reverse("store:deliver_orders"), {"orders": [1]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_bad_requests(self):
+        for orders in [[], "1,2", ["one"], list(range(1001))]:
+            with self.subTest(orders=orders):
+                response = self.client.put(
+                    reverse("store:pay_orders"), {"orders": orders}, format="json"
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_admin_action(self):
+        self.client.force_login(self.admin)
+        orders = [self.order(is_paid=True), self.order()]
+
+        response = self.client.post(
+            reverse("admin:store_order_changelist"),
+            {
+                "action": "mark_delivered",
+                "_selected_action": [order.id for order in orders],
+            },
+            follow=True,
+        )
+
+        self.assertContains(response, "Orders: 1 delivered, 1 unpaid.")
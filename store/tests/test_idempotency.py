@@ -0,0 +1,46 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from rest_framework.test import APITestCase
+
+from store.models import IdempotencyKey, Order, ProductImage
+
+from .helpers import checkout, make_product
+
+
+@override_settings(DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage")
+class IdempotentCheckoutTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="shopper")
+        self.product = make_product(self.user, stock=5)
+        ProductImage.objects.create(product=self.product)
+        self.client.force_authenticate(self.user)
+
+    def checkout(self, qty, key):
+        return checkout(self.client, (self.product, qty), HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_first_response(self):
+        first = self.checkout(2, "retry-1")
+        second = self.checkout(2, "retry-1")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(second.json()["order"]["id"], first.json()["order"]["id"])
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.count_in_stock, 3)
+
+    def test_key_reused_for_different_request_is_rejected(self):
+        self.checkout(1, "retry-2")
+        response = self.checkout(3, "retry-2")
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_requests_without_key_are_not_stored(self):
+        self.checkout(1, "")
+        self.checkout(1, "")
+
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
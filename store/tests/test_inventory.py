@@ -0,0 +1,136 @@
+import multiprocessing
+import unittest
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+
+from store.inventory import (
+    InsufficientStock,
+    commit_reservations,
+    release_expired_reservations,
+    reserve_stock,
+)
+from store.models import Order, Product, StockReservation
+
+from .helpers import checkout, make_product
+
+
+class TestStockReservations(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="shopper")
+        self.product = make_product(self.user, stock=3)
+        self.order = Order.objects.create(
+            created_by=self.user, tax=0, shipping_charge=0
+        )
+
+    def test_in_stock_follows_count(self):
+        self.assertTrue(self.product.in_stock)
+        self.product.count_in_stock = 0
+        self.product.save()
+        self.assertFalse(Product.objects.get(id=self.product.id).in_stock)
+
+    def test_reserve_takes_stock_and_clears_availability(self):
+        reserve_stock(self.order, [(self.product.id, 1), (self.product.id, 2)])
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.count_in_stock, 0)
+        self.assertFalse(self.product.in_stock)
+        reservation = StockReservation.objects.get(order=self.order)
+        self.assertEqual(reservation.quantity, 3)
+
+    def test_reserve_never_oversells(self):
+        other = make_product(self.user, stock=5, slug="other")
+
+        with self.assertRaises(InsufficientStock):
+            reserve_stock(self.order, [(other.id, 1), (self.product.id, 4)])
+
+        # The whole cart is rolled back, including lines that had stock.
+        other.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual(other.count_in_stock, 5)
+        self.assertEqual(self.product.count_in_stock, 3)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_sweeper_releases_expired_reservations(self):
+        reserve_stock(self.order, [(self.product.id, 3)])
+
+        self.assertEqual(release_expired_reservations(), 0)
+        later = timezone.now() + timedelta(days=1)
+        self.assertEqual(release_expired_reservations(now=later), 1)
+        self.assertEqual(release_expired_reservations(now=later), 0)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.count_in_stock, 3)
+        self.assertTrue(self.product.in_stock)
+
+    def test_commit_takes_released_stock_again(self):
+        reserve_stock(self.order, [(self.product.id, 2)])
+        release_expired_reservations(now=timezone.now() + timedelta(days=1))
+
+        commit_reservations(self.order)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.count_in_stock, 1)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_commit_fails_when_released_stock_sold_out(self):
+        reserve_stock(self.order, [(self.product.id, 2)])
+        release_expired_reservations(now=timezone.now() + timedelta(days=1))
+        other_order = Order.objects.create(
+            created_by=self.user, tax=0, shipping_charge=0
+        )
+        reserve_stock(other_order, [(self.product.id, 3)])
+
+        with self.assertRaises(InsufficientStock):
+            commit_reservations(self.order)
+
+
+class AddOrderItemsTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="shopper")
+        self.product = make_product(self.user, stock=1)
+        self.client.force_authenticate(self.user)
+
+    def test_checkout_rejects_oversell(self):
+        response = checkout(self.client, (self.product, 2))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["product"], self.product.id)
+        self.assertFalse(Order.objects.exists())
+
+
+def _buy_one(product_id, user_id):
+    connections.close_all()
+    order = Order.objects.create(created_by_id=user_id, tax=0, shipping_charge=0)
+    try:
+        reserve_stock(order, [(product_id, 1)])
+        return True
+    except InsufficientStock:
+        return False
+    finally:
+        connections.close_all()
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql", "needs a database shared between processes"
+)
+class StockContentionTestCase(TransactionTestCase):
+    def test_concurrent_checkouts_never_oversell(self):
+        user = User.objects.create(username="shopper")
+        product = make_product(user, stock=10)
+        connections.close_all()
+
+        context = multiprocessing.get_context("fork")
+        with context.Pool(8) as pool:
+            results = pool.starmap(_buy_one, [(product.id, user.id)] * 40)
+
+        product.refresh_from_db()
+        self.assertEqual(results.count(True), 10)
+        self.assertEqual(product.count_in_stock, 0)
+        self.assertFalse(product.in_stock)
+        self.assertEqual(StockReservation.objects.count(), 10)
@@ -0,0 +1,157 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+
+from store.models import Order, OrderItem, ProductImage, ShippingAddress
+
+from .helpers import checkout, make_product
+
+
+@override_settings(DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage")
+class OrderHistoryTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="shopper")
+        self.product = make_product(self.user, stock=100)
+        ProductImage.objects.create(product=self.product)
+        self.orders = []
+        for _ in range(5):
+            order = Order.objects.create(
+                created_by=self.user, tax="1.00", shipping_charge="2.00"
+            )
+            ShippingAddress.objects.create(
+                order=order,
+                customer=self.user,
+                address="1 Main St",
+                city="Pune",
+                state="MH",
+                zipcode="411001",
+                country="India",
+            )
+            OrderItem.objects.create(product=self.product, order=order, quantity=2)
+            order.update_totals()
+            self.orders.append(order)
+        self.client.force_authenticate(self.user)
+
+    def get_history(self, **params):
+        return self.client.get(reverse("store:get_order_history"), params)
+
+    def test_cursor_walks_every_order_newest_first(self):
+        seen = []
+        params = {"page_size": 2}
+        while True:
+            response = self.get_history(**params).json()
+            seen += [order["id"] for order in response["orders"]]
+            if response["next"] is None:
+                break
+            params["cursor"] = response["next"]
+
+        self.assertEqual(seen, [order.id for order in reversed(self.orders)])
+
+    def test_page_query_count_does_not_grow_with_orders(self):
+        # Orders, line items with their products, archived orders.
+        with self.assertNumQueries(3):
+            response = self.get_history(page_size=5)
+
+        self.assertEqual(len(response.json()["orders"]), 5)
+        self.assertEqual(response.json()["orders"][0]["total_items"], 2)
+
+    def test_summary_mode_omits_line_items(self):
+        # Orders, archived orders.
+        with self.assertNumQueries(2):
+            response = self.get_history(summary="true")
+
+        order = response.json()["orders"][0]
+        self.assertNotIn("orderItems", order)
+        self.assertEqual(order["total_items"], 2)
+        self.assertEqual(order["total_price"], 2 * 10.99 + 3)
+
+    def test_admin_summary_sums_stored_totals(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        response = self.client.get(reverse("store:get_summary_for_admin_dashboard"))
+
+        month = self.orders[0].created_at.strftime("%Y-%m")
+        self.assertEqual(response.data["ordersCount"], 5)
+        self.assertEqual(response.data["ordersPrice"], 5 * Decimal("24.98"))
+        self.assertEqual(
+            response.data["salesData"],
+            [{"id": month, "totalSales": 5 * Decimal("24.98")}],
+        )
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.get_history(cursor="not-a-cursor").status_code, 404)
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage",
+    CART_TAX_RATE=Decimal("0.05"),
+    CART_SHIPPING_CHARGE=Decimal("2.00"),
+    CART_FREE_SHIPPING_OVER=Decimal("100.00"),
+)
+class OrderSnapshotTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="shopper")
+        self.product = make_product(self.user, stock=10)
+        ProductImage.objects.create(product=self.product, image="images/book.png")
+        self.client.force_authenticate(self.user)
+
+    def checkout(self, qty):
+        response = checkout(
+            self.client, (self.product, qty), tax="1.50", shipping_charge="2.00"
+        )
+        return Order.objects.get(id=response.data["order"]["id"])
+
+    def test_checkout_stores_totals_and_item_snapshots(self):
+        order = self.checkout(3)
+
+        self.assertEqual(order.total_items, 3)
+        self.assertEqual(order.items_price, Decimal("32.97"))
+        # Priced here: the tax and shipping in the request are ignored.
+        self.assertEqual(order.tax, Decimal("1.65"))
+        self.assertEqual(order.shipping_charge, Decimal("2.00"))
+        self.assertEqual(order.total_price, Decimal("36.62"))
+        item = order.orderitem_set.get()
+        self.assertEqual(item.price, Decimal("10.99"))
+        self.assertEqual(item.name, "django-stars")
+        self.assertEqual(item.image.name, "images/book.png")
+
+    def test_catalog_changes_do_not_rewrite_past_orders(self):
+        order = self.checkout(1)
+        self.product.title = "Renamed"
+        self.product.discount_price = Decimal("99.00")
+        self.product.save()
+
+        response = self.client.get(reverse("store:get_order_by_id", args=[order.id]))
+
+        data = response.data["order"]
+        self.assertEqual(data["total_price"], Decimal("13.54"))
+        self.assertEqual(data["orderItems"][0]["price"], Decimal("10.99"))
+        self.assertEqual(data["orderItems"][0]["name"], "django-stars")
+
+
+class OrderTotalsTestCase(APITestCase):
+    def test_editing_items_updates_the_order_totals(self):
+        user = User.objects.create(username="shopper")
+        order = Order.objects.create(created_by=user, tax="1.00", shipping_charge=0)
+        first = OrderItem.objects.create(
+            product=make_product(user, stock=10), order=order, quantity=1
+        )
+        second = OrderItem.objects.create(
+            product=make_product(user, stock=10, slug="other"), order=order, quantity=1
+        )
+
+        first.quantity = 3
+        first.save()
+        order.refresh_from_db()
+        self.assertEqual(order.total_items, 4)
+        self.assertEqual(order.total_price, 4 * Decimal("10.99") + 1)
+
+        second.delete()
+        order.refresh_from_db()
+        self.assertEqual(order.total_items, 3)
+        self.assertEqual(order.total_price, 3 * Decimal("10.99") + 1)
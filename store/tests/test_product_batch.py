@@ -0,0 +1,67 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+
+from store.models import ProductImage
+
+from .helpers import make_product
+
+
+@override_settings(DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage")
+class ProductBatchTestCase(APITestCase):
+    url = reverse("store:get_products_batch")
+
+    def setUp(self):
+        user = User.objects.create(username="seller")
+        self.products = {}
+        for slug in ("first", "second", "third"):
+            self.products[slug] = make_product(user, stock=5, slug=slug)
+            ProductImage.objects.create(product=self.products[slug], alt_text=slug)
+
+    def test_by_slugs_in_request_order(self):
+        # The products, their images, reviews and specification values.
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, {"slugs": "third,gone,first,third"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [p["slug"] for p in response.data["products"]], ["third", "first"]
+        )
+        self.assertEqual(response.data["missing"], ["gone"])
+        self.assertEqual(
+            response.data["products"][0]["product_image"][0]["alt_text"], "third"
+        )
+
+    def test_by_ids_with_fields(self):
+        first, second = self.products["first"], self.products["second"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url, {"ids": f"{second.id},0,{first.id}", "fields": "id,title"}
+            )
+
+        self.assertEqual(
+            response.data["products"],
+            [{"id": second.id, "title": "second"}, {"id": first.id, "title": "first"}],
+        )
+        self.assertEqual(response.data["missing"], [0])
+
+    def test_matches_the_detail_view(self):
+        batch = self.client.get(self.url, {"slugs": "second"})
+        detail = self.client.get(
+            reverse("store:get_individual_product", args=["second"])
+        )
+
+        self.assertEqual(batch.json()["products"], [detail.json()])
+
+    def test_bad_requests(self):
+        for params in [
+            {},
+            {"ids": "1", "slugs": "first"},
+            {"ids": "1,first"},
+            {"slugs": ",".join(f"p{n}" for n in range(101))},
+        ]:
+            with self.subTest(params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
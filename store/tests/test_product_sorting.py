@@ -0,0 +1,116 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from store.models import Category, Product
+from store.views import category_products, sort_and_filter_products
+
+from .helpers import make_product
+
+
+def sorted_products(products, **params):
+    request = Request(APIRequestFactory().get("/", params))
+    return sort_and_filter_products(request, products)
+
+
+class ProductSortingTestCase(APITestCase):
+    def setUp(self):
+        user = User.objects.create(username="seller")
+        for slug, price, rating, reviews in [
+            ("cheap", "5.00", "4.50", 2),
+            ("middle", "15.00", None, None),
+            ("pricey", "50.00", "3.00", 9),
+        ]:
+            product = make_product(user, stock=5, slug=slug)
+            Product.objects.filter(id=product.id).update(
+                discount_price=price, rating=rating, num_reviews=reviews
+            )
+        make_product(user, stock=5, slug="hidden")
+        Product.objects.filter(slug="hidden").update(is_active=False)
+
+    def slugs(self, **params):
+        response = self.client.get(
+            reverse("store:get_products_by_category", args=["django"]),
+            {"fields": "slug", **params},
+        )
+        self.assertEqual(response.status_code, 200)
+        return [product["slug"] for product in response.data]
+
+    def test_sorts(self):
+        self.assertEqual(self.slugs(sort="price_asc"), ["cheap", "middle", "pricey"])
+        self.assertEqual(self.slugs(sort="price_desc"), ["pricey", "middle", "cheap"])
+        # Unrated products, and ones without a review count, come last.
+        self.assertEqual(self.slugs(sort="rating"), ["cheap", "pricey", "middle"])
+        self.assertEqual(self.slugs(sort="popularity"), ["pricey", "cheap", "middle"])
+        self.assertEqual(len(self.slugs()), 3)
+
+    def test_range_filters(self):
+        self.assertEqual(
+            self.slugs(sort="price_asc", min_price="10", max_price="50"),
+            ["middle", "pricey"],
+        )
+        self.assertEqual(self.slugs(sort="rating", min_rating="4"), ["cheap"])
+
+        response = self.client.get(
+            reverse("store:all_products"), {"sort": "price_desc", "max_price": "20"}
+        )
+        self.assertEqual(
+            [product["slug"] for product in response.data["products"]],
+            ["middle", "cheap"],
+        )
+
+    def test_bad_parameters(self):
+        for params in [{"sort": "cheapest"}, {"min_price": "x"}, {"min_rating": "nan"}]:
+            response = self.client.get(reverse("store:all_products"), params)
+            self.assertEqual(response.status_code, 400)
+
+
+class ProductSortingPlanTestCase(TestCase):
+    """Every sort and range filter reads an index, in order, without a sort."""
+
+    def plan(self, queryset):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # Tiny test tables are cheaper to scan; plan as for a big one.
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset[:20].explain()
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Sort", plan)
+        elif connection.vendor == "sqlite":
+            self.assertNotIn("TEMP B-TREE FOR ORDER BY", plan)
+        return plan
+
+    def assertUsesIndex(self, index, **params):
+        products = Product.objects.filter(is_active=True)
+        self.assertIn(index, self.plan(sorted_products(products, **params)))
+
+    def test_list_sorts_use_indexes(self):
+        self.assertUsesIndex("product_active_newest_idx")
+        self.assertUsesIndex("product_active_price_idx", sort="price_asc")
+        self.assertUsesIndex("product_active_price_idx", sort="price_desc")
+        self.assertUsesIndex("product_active_rating_idx", sort="rating")
+        self.assertUsesIndex("product_active_popular_idx", sort="popularity")
+
+    def test_range_filters_use_indexes(self):
+        self.assertUsesIndex(
+            "product_active_price_idx", sort="price_asc", min_price="10", max_price="20"
+        )
+        self.assertUsesIndex("product_active_rating_idx", sort="rating", min_rating="4")
+
+    def test_category_listing_uses_indexes(self):
+        category = Category.objects.create(name="django", slug="django")
+        products = category_products(category)
+        for index, sort in [
+            ("product_category_newest_idx", "newest"),
+            ("product_category_price_idx", "price_asc"),
+            ("product_category_price_idx", "price_desc"),
+            ("product_category_rating_idx", "rating"),
+            ("product_category_popular_idx", "popularity"),
+        ]:
+            with self.subTest(sort=sort):
+                plan = self.plan(sorted_products(products, sort=sort))
+                self.assertIn(index, plan)
@@ -0,0 +1,144 @@
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+
+from store.models import Product, Review
+from store.ratings import histogram, record_review, star
+
+from .helpers import make_product
+
+
+def add_review(product, rating):
+    customer = User.objects.create(username=f"shopper{User.objects.count()}")
+    return Review.objects.create(
+        product=product,
+        created_by=customer,
+        rating=rating,
+        created_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+class RatingSummaryTestCase(TestCase):
+    def setUp(self):
+        self.product = make_product(User.objects.create(username="seller"), stock=5)
+
+    def summary(self):
+        product = Product.objects.get(id=self.product.id)
+        return product.rating, product.num_reviews, histogram(product)
+
+    def test_stars_round_to_the_nearest(self):
+        self.assertEqual(
+            [star(rating) for rating in ["0", "0.4", "1.49", "1.5", "4.5", "7", None]],
+            [None, 1, 1, 2, 5, 5, None],
+        )
+
+    def test_reviews_are_recorded_incrementally(self):
+        for rating in [5, 4, 4, 0]:
+            record_review(add_review(self.product, rating))
+
+        self.assertEqual(
+            self.summary(),
+            (Decimal("4.33"), 3, {"1": 0, "2": 0, "3": 0, "4": 2, "5": 1}),
+        )
+
+    def test_average_does_not_drift_with_rounding(self):
+        # Past 200 reviews one four star review moves the average by less
+        # than half a cent, so a rounded running average would stay at 5.
+        for rating in [5] * 300 + [4] * 100:
+            record_review(add_review(self.product, rating))
+
+        rating, count, _ = self.summary()
+        self.assertEqual((rating, count), (Decimal("4.75"), 400))
+        self.assertEqual(
+            Product.objects.get(id=self.product.id).rating_total, Decimal("1900")
+        )
+
+    def test_rebuild_recomputes_from_the_reviews(self):
+        for rating in ["1.2", "2.5", "4.5", "5", "0"]:
+            add_review(self.product, rating)
+        other = make_product(self.product.created_by, stock=1, slug="other")
+        Product.objects.filter(id=other.id).update(num_reviews=9, ratings_3=9)
+
+        out = StringIO()
+        call_command("rebuild_rating_summaries", "--batch-size", "1", stdout=out)
+
+        self.assertEqual(
+            self.summary(),
+            (Decimal("3.30"), 4, {"1": 1, "2": 0, "3": 1, "4": 0, "5": 2}),
+        )
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating_total, Decimal("13.20"))
+        other.refresh_from_db()
+        self.assertEqual(
+            (other.rating, other.num_reviews, other.ratings_3), (None, 0, 0)
+        )
+        self.assertIn("2 product(s)", out.getvalue())
+
+
+@override_settings(DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage")
+class RatingHistogramApiTestCase(APITestCase):
+    def setUp(self):
+        self.product = make_product(User.objects.create(username="seller"), stock=5)
+        record_review(add_review(self.product, 3))
+
+    def test_review_post_updates_the_histogram(self):
+        self.client.force_authenticate(User.objects.create(username="critic"))
+
+        response = self.client.post(
+            reverse("store:create_product_review", args=[self.product.id]),
+            {"rating": 5, "comment": "Great"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.rating, Decimal("4.00"))
+        self.assertEqual(histogram(self.product)["5"], 1)
+
+    def test_review_is_not_saved_without_its_rating(self):
+        self.client.force_authenticate(User.objects.create(username="critic"))
+
+        with mock.patch("store.views.record_review", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(
+                    reverse("store:create_product_review", args=[self.product.id]),
+                    {"rating": 5, "comment": "Great"},
+                    format="json",
+                )
+
+        self.assertEqual(self.product.review_set.count(), 1)
+
+    def test_histogram_is_served_without_aggregating_reviews(self):
+        expected = {"1": 0, "2": 0, "3": 1, "4": 0, "5": 0}
+
+        detail = self.client.get(
+            reverse("store:get_individual_product", args=[self.product.slug])
+        )
+        self.assertEqual(detail.data["rating_histogram"], expected)
+
+        # Only the product row and a page of reviews.
+        with self.assertNumQueries(2):
+            reviews = self.client.get(
+                reverse("store:get_product_reviews", args=[self.product.slug])
+            )
+        self.assertEqual(reviews.data["rating_histogram"], expected)
+
+        listed = self.client.get(
+            reverse("store:all_products"),
+            {"fields": "slug", "expand": "rating_histogram"},
+        )
+        self.assertEqual(listed.data["products"][0]["rating_histogram"], expected)
+        self.assertNotIn(
+            "rating_histogram",
+            self.client.get(reverse("store:all_products")).data["products"][0],
+        )
@@ -0,0 +1,259 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+
+from store.models import (
+    Category,
+    Order,
+    OrderItem,
+    Product,
+    ProductSpecification,
+    ProductSpecificationValue,
+    ProductType,
+    RelatedProduct,
+)
+from store.recommendations import (
+    rebuild_similar,
+    refresh_bought_together,
+    refresh_similar,
+)
+
+from .helpers import make_product
+
+
+class BoughtTogetherTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="shopper")
+        self.products = {
+            slug: make_product(self.user, stock=10, slug=slug)
+            for slug in ["book", "pen", "ink", "lamp"]
+        }
+
+    def order(self, *slugs, paid=True, paid_at=None):
+        order = Order.objects.create(
+            created_by=self.user,
+            tax=0,
+            shipping_charge=0,
+            is_paid=paid,
+            paid_at=(paid_at or timezone.now()) if paid else None,
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order, product=self.products[slug], quantity=1, price="1.00"
+            )
+            for slug in slugs
+        )
+        return order
+
+    def neighbours(self, slug):
+        return [
+            (row.related.slug, row.score)
+            for row in RelatedProduct.objects.filter(
+                product=self.products[slug], kind=RelatedProduct.BOUGHT_TOGETHER
+            ).order_by("rank")
+        ]
+
+    def get(self, slug):
+        return self.client.get(reverse("store:get_related_products", args=[slug]))
+
+    def test_neighbours_ranked_by_orders_bought_together(self):
+        self.order("book", "pen", "ink")
+        self.order("book", "pen")
+        self.order("book", "lamp", paid=False)
+
+        self.assertEqual(refresh_bought_together(), 3)
+
+        self.assertEqual(self.neighbours("book"), [("pen", 2), ("ink", 1)])
+        self.assertEqual(self.neighbours("ink"), [("book", 1), ("pen", 1)])
+        self.assertEqual(self.neighbours("lamp"), [])
+
+    def test_top_limits_neighbours(self):
+        self.order("book", "pen", "ink", "lamp")
+        self.order("book", "lamp")
+
+        refresh_bought_together(top=2)
+
+        self.assertEqual(self.neighbours("book"), [("lamp", 2), ("pen", 1)])
+
+    def test_refresh_only_recomputes_newly_sold_products(self):
+        self.order("book", "pen", paid_at=timezone.now() - timedelta(days=1))
+        refresh_bought_together()
+        RelatedProduct.objects.update(computed_at=timezone.now() - timedelta(hours=1))
+
+        self.order("pen", "ink")
+        self.assertEqual(refresh_bought_together(), 2)
+        self.assertEqual(self.neighbours("pen"), [("book", 1), ("ink", 1)])
+        self.assertEqual(self.neighbours("ink"), [("pen", 1)])
+
+        # Changes to old orders wait for a full refresh.
+        Order.objects.update(paid_at=timezone.now() - timedelta(days=1))
+        OrderItem.objects.filter(product=self.products["pen"]).delete()
+        self.assertEqual(refresh_bought_together(), 0)
+        self.assertEqual(self.neighbours("book"), [("pen", 1)])
+        refresh_bought_together(full=True)
+        self.assertEqual(self.neighbours("book"), [])
+
+    def test_endpoint_is_a_single_read(self):
+        self.order("book", "pen", "ink")
+        self.order("book", "pen")
+        refresh_bought_together()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get("book")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            [
+                (product["slug"], product["score"])
+                for product in response.data["products"]
+            ],
+            [("pen", 2), ("ink", 1)],
+        )
+        self.assertNotIn("product_image", response.data["products"][0])
+
+    def test_endpoint_hides_inactive_products(self):
+        self.order("book", "pen")
+        refresh_bought_together()
+        Product.objects.filter(slug="pen").update(is_active=False)
+
+        self.assertEqual(self.get("book").data["products"], [])
+        self.assertEqual(self.get("missing").status_code, 404)
+
+
+class SimilarProductsTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="admin")
+        self.book = ProductType.objects.create(name="book")
+        self.lamp = ProductType.objects.create(name="lamp")
+        self.author = ProductSpecification.objects.create(
+            product_type=self.book, name="author"
+        )
+        self.django = Category.objects.create(name="django", slug="django")
+        self.web = Category.objects.create(name="web", slug="web", parent=self.django)
+        self.home = Category.objects.create(name="home", slug="home")
+
+    def product(self, slug, product_type, category, price, brand=None, author=None):
+        product = Product.objects.create(
+            product_type=product_type,
+            category=category,
+            created_by=self.user,
+            title=slug,
+            slug=slug,
+            brand=brand,
+            regular_price=price,
+            discount_price=price,
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        if author:
+            ProductSpecificationValue.objects.create(
+                product=product, specification=self.author, value=author
+            )
+        return product
+
+    def similar(self, product):
+        return [
+            row.related.slug
+            for row in RelatedProduct.objects.filter(
+                product=product, kind=RelatedProduct.SIMILAR
+            ).order_by("rank")
+        ]
+
+    def test_rebuild_ranks_by_shared_features(self):
+        two_scoops = self.product(
+            "two-scoops", self.book, self.web, "30", "Feldroy", "Greenfeld"
+        )
+        self.product("two-scoops-3", self.book, self.web, "35", "Feldroy", "Greenfeld")
+        self.product("django-for-apis", self.book, self.web, "30", author="Vincent")
+        self.product("django-book", self.book, self.django, "90")
+        self.product("lamp", self.lamp, self.home, "30")
+
+        self.assertEqual(rebuild_similar(), 5)
+
+        self.assertEqual(
+            self.similar(two_scoops),
+            ["two-scoops-3", "django-for-apis", "django-book", "lamp"],
+        )
+        score = RelatedProduct.objects.get(
+            product=two_scoops, rank=1, kind=RelatedProduct.SIMILAR
+        ).score
+        self.assertTrue(0 < score < 1)
+        # Bought together neighbours are kept apart.
+        self.assertFalse(
+            RelatedProduct.objects.filter(kind=RelatedProduct.BOUGHT_TOGETHER).exists()
+        )
+
+    def test_broad_features_bring_in_no_candidates(self):
+        first = self.product("first", self.book, self.web, "30", "Feldroy")
+        self.product("second", self.book, self.web, "35", "Feldroy")
+        django_book = self.product("django-book", self.book, self.django, "90")
+        self.product("lamp", self.lamp, self.home, "500")
+
+        # The book type and the django tree are held by three products.
+        with mock.patch("store.recommendations.MAX_POSTING", 2):
+            rebuild_similar()
+
+        self.assertEqual(self.similar(first), ["second"])
+        # Nothing selective in common: the narrowest feature, cut short.
+        self.assertEqual(self.similar(django_book), ["first", "second"])
+
+    def test_refresh_updates_the_lists_of_saved_products(self):
+        first = self.product("first", self.book, self.web, "30", author="Vincent")
+        lamp = self.product("lamp", self.lamp, self.home, "30")
+        rebuild_similar()
+        self.assertEqual(self.similar(first), ["lamp"])
+
+        # Saving queues nothing in the request; the refresh picks it up.
+        with self.captureOnCommitCallbacks(execute=True):
+            new = self.product("new", self.book, self.web, "30", author="Vincent")
+        self.assertEqual(self.similar(new), [])
+        refresh_similar()
+        self.assertEqual(self.similar(new), ["first", "lamp"])
+        self.assertEqual(self.similar(first), ["new", "lamp"])
+
+        # A changed specification lowers the score but keeps it listed.
+        value = new.productspecificationvalue_set.get()
+        value.value = "Feldroy"
+        value.save()
+        refresh_similar()
+        self.assertEqual(self.similar(first), ["new", "lamp"])
+        self.assertLess(RelatedProduct.objects.get(product=first, related=new).score, 1)
+
+        new.is_active = False
+        new.save()
+        refresh_similar()
+        self.assertEqual(self.similar(new), [])
+        self.assertEqual(self.similar(first), ["lamp"])
+
+    def test_refresh_skips_products_not_saved_since(self):
+        first = self.product("first", self.book, self.web, "30")
+        self.product("second", self.book, self.web, "30")
+        rebuild_similar()
+        Product.objects.update(updated_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(refresh_similar(), 0)
+        first.save()
+        self.assertEqual(refresh_similar(), 1)
+
+    def test_endpoint(self):
+        first = self.product("first", self.book, self.web, "30")
+        self.product("second", self.book, self.web, "30")
+        rebuild_similar()
+
+        response = self.client.get(
+            reverse("store:get_similar_products", args=[first.slug])
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [product["slug"] for product in response.data["products"]], ["second"]
+        )
+        self.assertAlmostEqual(response.data["products"][0]["score"], 1.0)
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import (
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from ecommerce.db_router import PIN_COOKIE, ReplicaRouter, use_replica
+from ecommerce.middleware import ReplicaRoutingMiddleware
+from store.models import Order, Product
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"], REPLICA_MAX_LAG=5)
+@mock.patch("ecommerce.db_router.replica_lag", return_value=0)
+class ReplicaRouterTestCase(TransactionTestCase):
+    # TestCase would wrap every test in a transaction, which pins reads to
+    # the primary.
+    router = ReplicaRouter()
+
+    def test_reads_use_primary_unless_opted_in(self, lag):
+        self.assertEqual(self.router.db_for_read(Product), "default")
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Product), "replica_1")
+
+    def test_reads_after_a_write_stay_on_primary(self, lag):
+        with use_replica():
+            self.assertEqual(self.router.db_for_write(Order), "default")
+            self.assertEqual(self.router.db_for_read(Order), "default")
+
+    def test_reads_inside_transactions_stay_on_primary(self, lag):
+        with use_replica(), transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Order), "default")
+
+    def test_lagging_replicas_are_skipped(self, lag):
+        lag.return_value = 30
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Product), "default")
+
+
+class ReplicaRoutingMiddlewareTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(lambda request: None)
+
+    def test_only_safe_requests_to_opted_in_views_use_replicas(self):
+        allowed = self.middleware.replica_reads_allowed
+        products = reverse("store:all_products")
+
+        self.assertTrue(allowed(self.factory.get(products)))
+        self.assertTrue(allowed(self.factory.get(reverse("store_async:all_products"))))
+        self.assertFalse(allowed(self.factory.post(products)))
+        self.assertFalse(allowed(self.factory.get(reverse("store:get_order_history"))))
+
+        pinned = self.factory.get(products)
+        pinned.COOKIES[PIN_COOKIE] = "1"
+        self.assertFalse(allowed(pinned))
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response = self.client.get(reverse("store:all_products"))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+        response = self.client.post(reverse("accounts:get_csrf_token"))
+        self.assertIn(PIN_COOKIE, response.cookies)
+        # Sent back on the frontend's cross-site API calls.
+        self.assertEqual(response.cookies[PIN_COOKIE]["samesite"], "None")
+        self.assertTrue(response.cookies[PIN_COOKIE]["secure"])
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+
+from store.models import Review
+from store.serializers import ProductSerializer
+
+from .helpers import make_product
+
+
+@override_settings(DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage")
+class ProductReviewsTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="seller")
+        self.product = make_product(self.user, stock=5)
+        self.other = make_product(self.user, stock=5, slug="other")
+        now = timezone.now()
+        # Ratings 1..8, one a minute, the best reviews the newest.
+        for minute in range(8):
+            self.review(
+                self.product, rating=minute + 1, at=now + timedelta(minutes=minute)
+            )
+        self.review(self.other, rating=5, at=now)
+
+    def review(self, product, rating, at):
+        customer = User.objects.create(username=f"shopper{User.objects.count()}")
+        return Review.objects.create(
+            product=product,
+            created_by=customer,
+            rating=rating,
+            created_at=at,
+            updated_at=at,
+        )
+
+    def ratings(self, reviews):
+        return [int(float(review["rating"])) for review in reviews]
+
+    def get_reviews(self, **params):
+        url = reverse("store:get_product_reviews", args=[self.product.slug])
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_reviews_are_paginated_by_cursor(self):
+        first = self.get_reviews(page_size=5)
+        second = self.get_reviews(page_size=5, cursor=first["next"])
+
+        self.assertEqual(self.ratings(first["reviews"]), [8, 7, 6, 5, 4])
+        self.assertEqual(self.ratings(second["reviews"]), [3, 2, 1])
+        self.assertIsNone(second["next"])
+
+    def test_reviews_sorted_by_rating(self):
+        lowest = self.get_reviews(sort="lowest", page_size=3)
+        following = self.get_reviews(sort="lowest", page_size=3, cursor=lowest["next"])
+
+        self.assertEqual(self.ratings(lowest["reviews"]), [1, 2, 3])
+        self.assertEqual(self.ratings(following["reviews"]), [4, 5, 6])
+        self.assertEqual(
+            self.ratings(self.get_reviews(sort="highest")["reviews"])[:2], [8, 7]
+        )
+
+    def test_slugs_made_of_digits_list_their_reviews(self):
+        product = make_product(self.user, stock=5, slug="1984")
+        self.review(product, rating=4, at=timezone.now())
+
+        url = reverse("store:get_product_reviews", args=[product.slug])
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ratings(response.data["reviews"]), [4])
+
+    def test_unknown_sort_and_product(self):
+        url = reverse("store:get_product_reviews", args=["missing"])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        url = reverse("store:get_product_reviews", args=[self.product.slug])
+        self.assertEqual(self.client.get(url, {"sort": "oldest"}).status_code, 400)
+
+    def test_product_payloads_embed_only_the_newest_reviews(self):
+        response = self.client.get(
+            reverse("store:get_individual_product", args=[self.product.slug])
+        )
+        self.assertEqual(self.ratings(response.data["reviews"]), [8, 7, 6, 5, 4])
+
+        # The category, products, images and one query for all reviews.
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                reverse("store:get_products_by_category", args=["django"]),
+                {"fields": "slug,reviews,product_image"},
+            )
+        reviews = {p["slug"]: self.ratings(p["reviews"]) for p in response.data}
+        self.assertEqual(reviews, {"django-stars": [8, 7, 6, 5, 4], "other": [5]})
+
+    def test_newest_reviews_of_a_large_category_take_one_query(self):
+        # More products than SQLite allows terms in a compound SELECT.
+        product_ids = [self.product.id, self.other.id, *range(10**6, 10**6 + 600)]
+
+        with self.assertNumQueries(1):
+            reviews = list(Review.newest_for_products(product_ids, 2))
+
+        self.assertEqual(
+            [(review.product_id, review.rating) for review in reviews],
+            [(self.product.id, 8), (self.product.id, 7), (self.other.id, 5)],
+        )
+
+    def test_embed_limit_is_configurable(self):
+        ProductSerializer.embedded_reviews = 2
+        self.addCleanup(setattr, ProductSerializer, "embedded_reviews", 5)
+
+        data = ProductSerializer([self.product], many=True, fields={"reviews"}).data
+
+        self.assertEqual(self.ratings(data[0]["reviews"]), [8, 7])
@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+
+from store.models import ProductSpecification, ProductSpecificationValue
+
+from .helpers import make_product
+
+
+@override_settings(DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage")
+class ProductSpecificationsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        user = User.objects.create(username="seller")
+        self.products = [
+            make_product(user, stock=5, slug=slug) for slug in ("first", "second")
+        ]
+        product_type = self.products[0].product_type
+        self.pages = ProductSpecification.objects.create(
+            product_type=product_type, name="Pages"
+        )
+        self.author = ProductSpecification.objects.create(
+            product_type=product_type, name="Author"
+        )
+        for product in self.products:
+            ProductSpecificationValue.objects.create(
+                product=product, specification=self.pages, value="320"
+            )
+            ProductSpecificationValue.objects.create(
+                product=product, specification=self.author, value="Ada"
+            )
+
+    def detail_url(self, product):
+        return reverse("store:get_individual_product", args=[product.slug])
+
+    def test_detail_includes_specifications(self):
+        response = self.client.get(self.detail_url(self.products[0]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["specifications"], {"Pages": "320", "Author": "Ada"}
+        )
+
+    def test_names_are_cached_per_product_type(self):
+        self.client.get(self.detail_url(self.products[0]))
+
+        # Product, images, reviews and specification values. No names.
+        with self.assertNumQueries(4):
+            self.client.get(self.detail_url(self.products[1]))
+
+    def test_saving_a_specification_clears_its_names(self):
+        self.client.get(self.detail_url(self.products[0]))
+        self.pages.name = "Page count"
+        self.pages.save()
+
+        response = self.client.get(self.detail_url(self.products[0]))
+
+        self.assertEqual(
+            response.data["specifications"], {"Page count": "320", "Author": "Ada"}
+        )
+
+    def test_list_specifications_are_opt_in(self):
+        url = reverse("store:all_products")
+        self.assertNotIn("specifications", self.client.get(url).data["products"][0])
+
+        self.client.get(url, {"specifications": "true"})
+        with self.assertNumQueries(5):
+            response = self.client.get(url, {"specifications": "true"})
+
+        self.assertEqual(
+            [p["specifications"] for p in response.data["products"]],
+            [{"Pages": "320", "Author": "Ada"}] * 2,
+        )
@@ -0,0 +1,23 @@
+from django.core.wsgi import get_wsgi_application
+from django.test import TransactionTestCase
+
+from ecommerce.warmup import preload, send_request, warm_worker
+
+
+class WarmupTestCase(TransactionTestCase):
+    # Requests sent through the WSGI handler close the connection when they
+    # finish, which TestCase's wrapping transaction would not survive.
+    databases = "__all__"
+
+    def test_preload_reports_its_phases(self):
+        self.assertEqual(
+            set(preload()), {"urls", "serializers", "store.autocomplete.load"}
+        )
+
+    def test_worker_warmup_serves_requests_through_the_application(self):
+        application = get_wsgi_application()
+
+        self.assertEqual(send_request(application, "/api/products/"), "200 OK")
+        timings = warm_worker(application)
+        self.assertIn("connections", timings)
+        self.assertIn("/api/categories/", timings)
@@ -7,6 +7,12 @@ app_name = "store"
 urlpatterns = [
     path("products/", ProductListView.as_view(), name="all_products"),
     path("products/top/", TopProductListView.as_view(), name="top_products"),
+    path("products/batch/", ProductBatchView.as_view(), name="get_products_batch"),
+    path(
+        "products/autocomplete/",
+        ProductAutocompleteView.as_view(),
+        name="autocomplete_products",
+    ),
     path("products/create/", CreateProductView.as_view(), name="create_product"),
     path(
         "products/upload/",
@@ -16,13 +22,31 @@ urlpatterns = [
     path("categories/", CategoryListView.as_view(), name="all_top_level_categories"),
     path("orders/", GetOrdersView.as_view(), name="get_all_orders_list"),
     path("summary/", GetSummaryView.as_view(), name="get_summary_for_admin_dashboard"),
+    path("summary/sales/", GetSalesReportView.as_view(), name="get_sales_report"),
     path("orders/history/", GetOrderHistoryView.as_view(), name="get_order_history"),
+    # Reviews are created by product id and listed by product slug. The id
+    # route has its own prefix so it never shadows a slug made of digits.
     path(
-        "products/<str:pk>/reviews/",
+        "products/id/<int:pk>/reviews/",
         CreateProductReviewView.as_view(),
         name="create_product_review",
     ),
+    path(
+        "products/<slug:slug>/reviews/",
+        ProductReviewListView.as_view(),
+        name="get_product_reviews",
+    ),
     path("products/<slug:slug>/", ProductView.as_view(), name="get_individual_product"),
+    path(
+        "products/<slug:slug>/related/",
+        RelatedProductListView.as_view(),
+        name="get_related_products",
+    ),
+    path(
+        "products/<slug:slug>/similar/",
+        SimilarProductListView.as_view(),
+        name="get_similar_products",
+    ),
     path(
         "products/delete/<str:pk>/",
         DeleteProductView.as_view(),
@@ -38,7 +62,14 @@ urlpatterns = [
         CategoryItemView.as_view(),
         name="get_products_by_category",
     ),
+    path("cart/quote/", CartQuoteView.as_view(), name="quote_cart"),
     path("orders/add/", AddOrderItemsView.as_view(), name="add_order_items"),
+    path("orders/pay/", UpdateOrdersToPaidView.as_view(), name="pay_orders"),
+    path(
+        "orders/deliver/",
+        UpdateOrdersToDeliveredView.as_view(),
+        name="deliver_orders",
+    ),
     path("orders/<str:pk>/", GetOrderByIdView.as_view(), name="get_order_by_id"),
     path(
         "orders/<str:pk>/pay/",
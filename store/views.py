@@ -1,35 +1,213 @@
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Prefetch
+from django.db import transaction
+from django.db.models import Count, F, Prefetch, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.functional import cached_property
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import generics, status
+from rest_framework.exceptions import ParseError
 from rest_framework.permissions import AllowAny
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from ecommerce.pagination import KeysetPagination
+
 from .serializers import *
 from .models import *
-from . import models
+from . import analytics, fulfillment, models
+from .autocomplete import autocomplete
+from .idempotency import idempotent
+from .inventory import InsufficientStock, reserve_stock
+from .pricing import quote_cart
+from .ratings import STARS, histogram, record_review
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+
+def with_order_details(orders):
+    """Load everything `OrderSerializer` reads in a fixed number of queries."""
+    return orders.select_related("created_by", "shippingaddress").prefetch_related(
+        Prefetch("orderitem_set", queryset=OrderItem.objects.select_related("product"))
+    )
+
+
+def transition_order(transition, pk):
+    """Run a `fulfillment` transition on one order and return its outcome."""
+    try:
+        order_id = int(pk)
+    except ValueError:
+        return fulfillment.NOT_FOUND
+    return transition([order_id])[order_id]
+
+
+def order_not_found():
+    return Response(
+        {"detail": "Order does not exist!", "status": status.HTTP_404_NOT_FOUND},
+        status=status.HTTP_404_NOT_FOUND,
+    )
 
-from datetime import datetime
 
-from itertools import groupby
+def with_specifications(products):
+    """Prefetch what `ProductSerializer.specifications` reads, names aside."""
+    return products.prefetch_related(
+        Prefetch(
+            "productspecificationvalue_set",
+            queryset=ProductSpecificationValue.objects.order_by("specification_id"),
+            to_attr="specification_values",
+        )
+    )
+
+
+# How to load each relation or summary a product serializer can add, and the
+# product columns it needs. The ones a request leaves out are not queried.
+RATING_COLUMNS = [f"ratings_{stars}" for stars in STARS]
+
+PRODUCT_RELATIONS = {
+    "category": (lambda products: products.select_related("category"), ["category"]),
+    "product_image": (lambda products: products.prefetch_related("product_image"), []),
+    # `ProductListSerializer` loads the newest reviews of a page in one query.
+    "reviews": (lambda products: products, []),
+    "specifications": (with_specifications, ["product_type"]),
+    "rating_histogram": (lambda products: products, list(RATING_COLUMNS)),
+}
+
+
+def split_list(request, name):
+    """Comma separated query parameter values, in order and without repeats."""
+    value = request.query_params.get(name) or ""
+    return list(
+        dict.fromkeys(item.strip() for item in value.split(",") if item.strip())
+    )
+
+
+def split_param(request, name):
+    return set(split_list(request, name))
+
+
+def product_fields(request, serializer_class=ProductSerializer):
+    """
+    The product fields to serialize: the ones in ``?fields=``, or else the
+    serializer's defaults, plus the relations in ``?expand=``.
+    ``?specifications=true`` is short for ``?expand=specifications``.
+    """
+    defaults = set(serializer_class().fields)
+    available = defaults | set(serializer_class.optional_fields)
+    fields = split_param(request, "fields")
+    expand = split_param(request, "expand")
+    if request.query_params.get("specifications") in ("1", "true"):
+        expand.add("specifications")
+
+    unknown = (fields - available) | (expand - set(PRODUCT_RELATIONS))
+    if unknown:
+        raise ParseError(f"Unknown product fields: {', '.join(sorted(unknown))}.")
+    return (fields or defaults) | expand
+
+
+def with_product_fields(products, fields):
+    """Load only the columns and relations that `fields` read."""
+    columns = {"id"} | {
+        field.name for field in Product._meta.concrete_fields if field.name in fields
+    }
+    for name, (load, needs) in PRODUCT_RELATIONS.items():
+        if name in fields:
+            products = load(products)
+            columns.update(needs)
+    return products.only(*columns)
+
+
+# Each ordering ends in the id, so pages never tie, and each matches one of
+# the indexes on the active products.
+PRODUCT_ORDERINGS = {
+    "newest": ("-created_at", "-id"),
+    "price_asc": ("discount_price", "id"),
+    "price_desc": ("-discount_price", "-id"),
+    "rating": (F("rating").desc(nulls_last=True), "-id"),
+    "popularity": (F("num_reviews").desc(nulls_last=True), "-id"),
+}
+
+
+def decimal_param(request, name):
+    value = request.query_params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        value = Decimal(value)
+    except InvalidOperation:
+        raise ParseError(f"{name} must be a number.")
+    if not value.is_finite():
+        raise ParseError(f"{name} must be a number.")
+    return value
+
+
+def sort_and_filter_products(request, products):
+    """
+    Order `products` by ``?sort=`` and keep the ones within ``?min_price=``,
+    ``?max_price=`` and ``?min_rating=``.
+    """
+    sort = request.query_params.get("sort", "newest")
+    if sort not in PRODUCT_ORDERINGS:
+        raise ParseError(f"sort must be one of {', '.join(PRODUCT_ORDERINGS)}.")
+
+    min_price = decimal_param(request, "min_price")
+    max_price = decimal_param(request, "max_price")
+    min_rating = decimal_param(request, "min_rating")
+    if min_price is not None:
+        products = products.filter(discount_price__gte=min_price)
+    if max_price is not None:
+        products = products.filter(discount_price__lte=max_price)
+    if min_rating is not None:
+        products = products.filter(rating__gte=min_rating)
+    return products.order_by(*PRODUCT_ORDERINGS[sort])
+
+
+def category_products(category):
+    """
+    The active products of `category` and its subcategories. A category
+    without subcategories is matched by id alone, so its newest products are
+    read in order off ``product_category_newest_idx`` without a sort.
+    """
+    if category.is_leaf_node():
+        return models.Product.objects.filter(is_active=True, category=category)
+    return models.Product.objects.filter(
+        is_active=True, category__in=category.get_descendants(include_self=True)
+    )
+
+
+class ProductFieldsMixin:
+    """``?fields=`` and ``?expand=`` for generic product views."""
+
+    @cached_property
+    def product_fields(self):
+        return product_fields(self.request, self.get_serializer_class())
+
+    def get_queryset(self):
+        return with_product_fields(super().get_queryset(), self.product_fields)
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(*args, fields=self.product_fields, **kwargs)
 
 
 class ProductListView(APIView):
-    """Get a list of all active products."""
+    """
+    Get a list of all active products. Sort them with ``?sort=`` newest (the
+    default), price_asc, price_desc, rating or popularity, and filter them
+    with ``?min_price=``, ``?max_price=`` and ``?min_rating=``.
+    """
 
+    replica_reads = True
     permission_classes = (AllowAny,)
     serializer_class = ProductSerializer
 
     def get(self, request):
-        products = (
-            Product.objects.filter(is_active=True)
-            .select_related("product_type", "category", "created_by")
-            .prefetch_related(
-                "product_image", Prefetch("review_set", to_attr="reviews")
-            )
+        fields = product_fields(request, self.serializer_class)
+        products = with_product_fields(
+            sort_and_filter_products(request, Product.objects.filter(is_active=True)),
+            fields,
         )
 
         page = request.query_params.get("page")
@@ -49,7 +227,7 @@ class ProductListView(APIView):
         page = int(page)
 
         serializer = self.serializer_class(
-            products, many=True, context={"request": request}
+            products, many=True, fields=fields, context={"request": request}
         )
         return Response(
             {
@@ -65,16 +243,19 @@ class ProductListView(APIView):
 class TopProductListView(APIView):
     """Get a list of top 5 active products."""
 
+    replica_reads = True
     permission_classes = (AllowAny,)
     serializer_class = ProductSerializer
 
     def get(self, request):
-        products = Product.objects.filter(is_active=True, rating__gte=3).order_by(
-            "-rating"
+        fields = product_fields(request, self.serializer_class)
+        products = with_product_fields(
+            Product.objects.filter(is_active=True, rating__gte=3).order_by("-rating"),
+            fields,
         )[0:5]
 
         serializer = self.serializer_class(
-            products, many=True, context={"request": request}
+            products, many=True, fields=fields, context={"request": request}
         )
         return Response(
             {"products": serializer.data, "status": status.HTTP_200_OK},
@@ -88,94 +269,310 @@ class TopProductListView(APIView):
 #     serializer_class = ProductSerializer
 
 
-class ProductView(generics.RetrieveAPIView):
+class ProductView(ProductFieldsMixin, generics.RetrieveAPIView):
     """Get individual product details based on slug."""
 
+    replica_reads = True
     lookup_field = "slug"
-    queryset = Product.objects.all().prefetch_related(
-        "product_image", Prefetch("review_set", to_attr="reviews")
-    )
+    queryset = Product.objects.all()
+    permission_classes = (AllowAny,)
+    serializer_class = ProductDetailSerializer
+
+
+class ProductBatchView(APIView):
+    """
+    Get many products at once, by ``?ids=`` or by ``?slugs=``, in the order
+    asked for. Takes ``?fields=`` and ``?expand=`` like the product view.
+    """
+
+    replica_reads = True
+    permission_classes = (AllowAny,)
+    serializer_class = ProductDetailSerializer
+    max_products = 100
+
+    def get(self, request):
+        ids, slugs = split_list(request, "ids"), split_list(request, "slugs")
+        if bool(ids) == bool(slugs):
+            raise ParseError("Pass either ids or slugs.")
+        if ids and not all(id.isdigit() for id in ids):
+            raise ParseError("ids must be integers.")
+        keys = [int(id) for id in ids] if ids else slugs
+        if len(keys) > self.max_products:
+            raise ParseError(f"At most {self.max_products} products at a time.")
+
+        fields = product_fields(request, self.serializer_class)
+        found = with_product_fields(Product.objects.all(), fields).in_bulk(
+            keys, field_name="id" if ids else "slug"
+        )
+
+        serializer = self.serializer_class(
+            [found[key] for key in keys if key in found],
+            many=True,
+            fields=fields,
+            context={"request": request},
+        )
+        return Response(
+            {
+                "products": serializer.data,
+                "missing": [key for key in keys if key not in found],
+                "status": status.HTTP_200_OK,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ProductAutocompleteView(APIView):
+    """
+    Suggest products, brands and categories for what has been typed so far,
+    ``?q=``, most popular first. Answered from this process's in-memory
+    index, without a query.
+    """
+
+    permission_classes = (AllowAny,)
+    default_limit = 8
+    max_limit = 20
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            raise ParseError("limit must be an integer.")
+        if not 1 <= limit <= self.max_limit:
+            raise ParseError(f"limit must be between 1 and {self.max_limit}.")
+
+        return Response(
+            {
+                "suggestions": autocomplete.suggest(
+                    request.query_params.get("q", ""), limit
+                ),
+                "status": status.HTTP_200_OK,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class RelatedProductListView(APIView):
+    """
+    Get the products most often bought together with a product, by slug,
+    best first, with the number of paid orders that held both as `score`.
+    """
+
+    replica_reads = True
     permission_classes = (AllowAny,)
     serializer_class = ProductSerializer
+    kind = RelatedProduct.BOUGHT_TOGETHER
+    fields = [
+        "id",
+        "title",
+        "slug",
+        "brand",
+        "regular_price",
+        "discount_price",
+        "rating",
+        "num_reviews",
+        "in_stock",
+    ]
+
+    def get(self, request, slug):
+        # One read of the (product, kind, rank) index, joined to the products.
+        neighbours = list(
+            RelatedProduct.objects.filter(
+                product__slug=slug, kind=self.kind, related__is_active=True
+            )
+            .select_related("related")
+            .only("score", *(f"related__{field}" for field in self.fields))
+            .order_by("rank")
+        )
+        if not neighbours:
+            generics.get_object_or_404(Product.objects.only("id"), slug=slug)
+
+        serializer = self.serializer_class(
+            [neighbour.related for neighbour in neighbours],
+            many=True,
+            fields=self.fields,
+            context={"request": request},
+        )
+        return Response(
+            {
+                "products": [
+                    {**product, "score": neighbour.score}
+                    for product, neighbour in zip(serializer.data, neighbours)
+                ],
+                "status": status.HTTP_200_OK,
+            },
+            status=status.HTTP_200_OK,
+        )
+
 
+class SimilarProductListView(RelatedProductListView):
+    """
+    Get the products most like a product, by slug, best first, with their
+    similarity from 0 to 1 as `score`.
+    """
 
-class CategoryItemView(generics.ListAPIView):
-    """Get individual category details based on slug."""
+    kind = RelatedProduct.SIMILAR
 
+
+class CategoryItemView(ProductFieldsMixin, generics.ListAPIView):
+    """
+    Get the active products of a category and its subcategories, by slug,
+    sorted and filtered like the product list.
+    """
+
+    replica_reads = True
     permission_classes = (AllowAny,)
     serializer_class = ProductSerializer
 
     def get_queryset(self):
-        return models.Product.objects.filter(
-            category__in=Category.objects.get(slug=self.kwargs["slug"]).get_descendants(
-                include_self=True
-            )
+        products = category_products(Category.objects.get(slug=self.kwargs["slug"]))
+        return with_product_fields(
+            sort_and_filter_products(self.request, products), self.product_fields
         )
 
 
 class CategoryListView(generics.ListAPIView):
     """Get a list of categories."""
 
+    replica_reads = True
     queryset = Category.objects.filter(level=1)
     permission_classes = (AllowAny,)
     serializer_class = CategorySerializer
 
 
+class CartQuoteView(APIView):
+    """
+    Check a whole cart against the catalog and price it. Takes the
+    ``orderItems`` of a checkout, each optionally with the ``price`` the
+    shopper was shown, and returns every line's problems along with the
+    totals checkout will charge.
+    """
+
+    permission_classes = (AllowAny,)
+
+    def post(self, request):
+        try:
+            quote = quote_cart(request.data.get("orderItems") or [])
+        except ValueError as exc:
+            return Response(
+                {"detail": str(exc), "status": status.HTTP_400_BAD_REQUEST},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {"quote": quote.to_json(), "status": status.HTTP_200_OK},
+            status=status.HTTP_200_OK,
+        )
+
+
 class AddOrderItemsView(APIView):
+    """
+    Create an order from a cart. The cart is checked and priced like a
+    quote first, so tax and shipping are computed here rather than taken
+    from the request.
+    """
+
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = OrderSerializer
 
+    @idempotent
     def post(self, request):
         user = request.user
         data = request.data
 
         orderItems = data["orderItems"]
 
-        if orderItems and len(orderItems) == 0:
-            Response(
-                {"detail": "No Order Items", "status": status.HTTP_400_BAD_REQUEST}
-            )
-        else:
-            # Create Order
-            order = Order.objects.create(
-                created_by=user,
-                transaction_id=data.get("transactionId", user.id),
-                payment_method=data["paymentMethod"],
-                tax=data["tax"],
-                shipping_charge=data["shippingCharge"],
+        if not orderItems:
+            return Response(
+                {"detail": "No Order Items", "status": status.HTTP_400_BAD_REQUEST},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-            # Create Shipping Address
-            shipping = ShippingAddress.objects.create(
-                order=order,
-                customer=user,
-                name=data["shippingAddress"]["name"],
-                address=data["shippingAddress"]["address"],
-                city=data["shippingAddress"]["city"],
-                state=data["shippingAddress"]["state"],
-                zipcode=data["shippingAddress"]["zipcode"],
-                country=data["shippingAddress"]["country"],
-                shipping_charge=data["shippingCharge"],
+        try:
+            quote = quote_cart(
+                orderItems, Product.objects.prefetch_related("product_image")
+            )
+        except ValueError as exc:
+            return Response(
+                {"detail": str(exc), "status": status.HTTP_400_BAD_REQUEST},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not quote.valid:
+            line = next(line for line in quote.lines if line.problems)
+            return Response(
+                {
+                    "detail": "Product %s cannot be ordered: %s."
+                    % (line.product_id, ", ".join(line.problems)),
+                    "product": line.product_id,
+                    "quote": quote.to_json(),
+                    "status": status.HTTP_400_BAD_REQUEST,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-            # Create Order Items from "orderItems" list
-            for item in orderItems:
-                product = Product.objects.get(id=item["product"])
+        try:
+            with transaction.atomic():
+                # Create Order
+                order = Order.objects.create(
+                    created_by=user,
+                    transaction_id=data.get("transactionId", user.id),
+                    payment_method=data["paymentMethod"],
+                    tax=quote.tax,
+                    shipping_charge=quote.shipping_charge,
+                )
 
-                order_item = OrderItem.objects.create(
-                    product=product, order=order, quantity=item["qty"]
+                # Create Shipping Address
+                shipping = ShippingAddress.objects.create(
+                    order=order,
+                    customer=user,
+                    name=data["shippingAddress"]["name"],
+                    address=data["shippingAddress"]["address"],
+                    city=data["shippingAddress"]["city"],
+                    state=data["shippingAddress"]["state"],
+                    zipcode=data["shippingAddress"]["zipcode"],
+                    country=data["shippingAddress"]["country"],
+                    shipping_charge=quote.shipping_charge,
                 )
 
-                # Update Stock
-                product.count_in_stock -= order_item.quantity
-                product.save()
-        serializer = self.serializer_class(order, many=False)
+                # Reserve Stock, then create Order Items from the quoted lines
+                reserve_stock(
+                    order, [(line.product_id, line.quantity) for line in quote.lines]
+                )
+                items = [
+                    OrderItem(product=line.product, order=order, quantity=line.quantity)
+                    for line in quote.lines
+                ]
+                for item in items:
+                    item.snapshot_product()
+                OrderItem.objects.bulk_create(items)
+                order.update_totals()
+                analytics.record_checkout(items)
+        except InsufficientStock as exc:
+            return Response(
+                {
+                    "detail": "Not enough stock for product %s!" % exc.product_id,
+                    "product": exc.product_id,
+                    "status": status.HTTP_400_BAD_REQUEST,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Reload so money fields are Decimals rather than the raw request values
+        order.refresh_from_db()
+        serializer = self.serializer_class(
+            order, many=False, context={"request": request}
+        )
         return Response({"order": serializer.data, "status": status.HTTP_200_OK})
 
 
 class GetOrderHistoryView(APIView):
-    """Get a list of orders created by a particular user."""
+    """
+    Get a page of orders created by a particular user, newest first.
+
+    Pass the returned `next` cursor as `?cursor=` to get the following page
+    and `?summary=true` to leave out line items and shipping addresses.
+    Archived orders are listed along with the others.
+    """
 
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
@@ -183,19 +580,40 @@ class GetOrderHistoryView(APIView):
 
     def get(self, request):
         user = request.user
-        orders = user.order_creator
-        serializer = self.serializer_class(
-            orders, many=True, context={"request": request}
-        )
+        summary = request.query_params.get("summary") in ("1", "true")
+
+        orders = Order.objects.filter(created_by=user)
+        archived = ArchivedOrder.objects.filter(created_by=user)
+        if summary:
+            serializer_class = OrderSummarySerializer
+            archived_serializer_class = ArchivedOrderSummarySerializer
+        else:
+            orders = with_order_details(orders)
+            archived = archived.select_related("created_by")
+            serializer_class = self.serializer_class
+            archived_serializer_class = ArchivedOrderSerializer
+
+        paginator = KeysetPagination(("-created_at", "-id"))
+        page = paginator.paginate_querysets([orders, archived], request)
+        context = {"request": request}
 
         return Response(
-            {"orders": serializer.data, "status": status.HTTP_200_OK},
+            {
+                "orders": [
+                    archived_serializer_class(order, context=context).data
+                    if isinstance(order, ArchivedOrder)
+                    else serializer_class(order, context=context).data
+                    for order in page
+                ],
+                "next": paginator.next_cursor,
+                "status": status.HTTP_200_OK,
+            },
             status=status.HTTP_200_OK,
         )
 
 
 class GetOrderByIdView(APIView):
-    """Get order details by id for a particular user."""
+    """Get order details by id for a particular user, archived or not."""
 
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
@@ -205,9 +623,14 @@ class GetOrderByIdView(APIView):
         user = request.user
 
         try:
-            order = Order.objects.get(id=pk)
+            try:
+                order = Order.objects.get(id=pk)
+                serializer_class = self.serializer_class
+            except Order.DoesNotExist:
+                order = ArchivedOrder.objects.get(id=pk)
+                serializer_class = ArchivedOrderSerializer
             if user.is_staff or order.created_by == user:
-                serializer = self.serializer_class(
+                serializer = serializer_class(
                     order, many=False, context={"request": request}
                 )
                 return Response(
@@ -236,12 +659,23 @@ class UpdateOrderToPaidView(APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def put(self, request, pk):
-        order = Order.objects.get(id=pk)
+        # Paying an order that is already paid changes nothing.
+        outcome = transition_order(fulfillment.mark_paid, pk)
 
-        order.is_paid = True
-        order.paid_at = datetime.now()
-        order.save()
+        if outcome == fulfillment.NOT_FOUND:
+            return order_not_found()
+        if outcome == fulfillment.OUT_OF_STOCK:
+            return Response(
+                {
+                    "detail": "Product %s went out of stock before payment!"
+                    % outcome.product_id,
+                    "product": outcome.product_id,
+                    "status": status.HTTP_400_BAD_REQUEST,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         return Response(
             {"detail": "Order was paid successfully", "status": status.HTTP_200_OK},
@@ -250,17 +684,24 @@ class UpdateOrderToPaidView(APIView):
 
 
 class UpdateOrderToDeliveredView(APIView):
-    """Update 'is_delivered' status of a particular order."""
+    """Update 'is_delivered' status of a particular, paid order."""
 
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAdminUser]
 
     def put(self, request, pk):
-        order = Order.objects.get(id=pk)
+        outcome = transition_order(fulfillment.mark_delivered, pk)
 
-        order.is_delivered = True
-        order.delivered_at = datetime.now()
-        order.save()
+        if outcome == fulfillment.NOT_FOUND:
+            return order_not_found()
+        if outcome == fulfillment.UNPAID:
+            return Response(
+                {
+                    "detail": "Order has not been paid yet!",
+                    "status": status.HTTP_400_BAD_REQUEST,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         return Response(
             {
@@ -271,6 +712,63 @@ class UpdateOrderToDeliveredView(APIView):
         )
 
 
+class BulkOrderTransitionView(APIView):
+    """
+    Move many orders to a new status with one ``UPDATE``. Takes
+    ``{"orders": [id, ...]}`` and returns the outcome for each id: the new
+    status, or why the order was left as it was.
+    """
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAdminUser]
+    max_orders = 1000
+    transition = None
+
+    def put(self, request):
+        order_ids = request.data.get("orders")
+        try:
+            if not isinstance(order_ids, list) or not order_ids:
+                raise ValueError
+            if len(order_ids) > self.max_orders:
+                raise ValueError
+            order_ids = [int(id) for id in order_ids]
+        except (TypeError, ValueError):
+            return Response(
+                {
+                    "detail": "Send a list of at most %s order ids." % self.max_orders,
+                    "status": status.HTTP_400_BAD_REQUEST,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        outcomes = self.transition(order_ids)
+        return Response(
+            {
+                "orders": [
+                    {"id": id, "outcome": outcome} for id, outcome in outcomes.items()
+                ],
+                "updated": sum(
+                    outcome in (fulfillment.PAID, fulfillment.DELIVERED)
+                    for outcome in outcomes.values()
+                ),
+                "status": status.HTTP_200_OK,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class UpdateOrdersToPaidView(BulkOrderTransitionView):
+    """Mark many unpaid orders paid."""
+
+    transition = staticmethod(fulfillment.mark_paid)
+
+
+class UpdateOrdersToDeliveredView(BulkOrderTransitionView):
+    """Mark many paid orders delivered. Unpaid orders are not delivered."""
+
+    transition = staticmethod(fulfillment.mark_delivered)
+
+
 class DeleteProductView(APIView):
     """Delete a particular product by id."""
 
@@ -410,28 +908,34 @@ class GetOrdersView(APIView):
 class GetSummaryView(APIView):
     """Get data summary for admin dashboard."""
 
+    replica_reads = True
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAdminUser]
     serializer_class = OrderSerializer
 
     def get(self, request):
-        orders = Order.objects.all()
-        serializer = self.serializer_class(
-            orders, many=True, context={"request": request}
-        )
-        ordersCount = len(orders)
+        ordersCount = 0
+        ordersPrice = 0
+        monthlySales = defaultdict(int)
+        # Archived orders still count.
+        for orders in [Order.objects.order_by(), ArchivedOrder.objects.order_by()]:
+            totals = orders.aggregate(count=Count("id"), total=Sum("total_price"))
+            ordersCount += totals["count"]
+            ordersPrice += totals["total"] or 0
+            for month, totalSales in (
+                orders.annotate(month=TruncMonth("created_at"))
+                .values("month")
+                .annotate(totalSales=Sum("total_price"))
+                .values_list("month", "totalSales")
+            ):
+                monthlySales[month.strftime("%Y-%m")] += totalSales
         productsCount = Product.objects.count()
         usersCount = User.objects.count()
-        ordersPrice = sum(item["total_price"] for item in serializer.data)
 
-        salesData = []
-        for key, value in groupby(serializer.data, key=lambda x: x["created_at"][:7]):
-            salesData.append(
-                {
-                    "id": key,
-                    "totalSales": sum(item["total_price"] for item in value),
-                }
-            )
+        salesData = [
+            {"id": month, "totalSales": totalSales}
+            for month, totalSales in sorted(monthlySales.items())
+        ]
 
         return Response(
             {
@@ -446,8 +950,118 @@ class GetSummaryView(APIView):
         )
 
 
+class GetSalesReportView(APIView):
+    """
+    Units and revenue, checked out and paid, from the daily sales table.
+
+    Query params: ``start`` and ``end`` as ISO dates (default: the last 30
+    days), ``by`` one of day, category, product_type or product, and the
+    optional filters ``category`` (slug, takes in its subcategories),
+    ``product_type`` (id) and ``product`` (slug). By category, the rows are
+    the subcategories of ``category``, so drilling down is a matter of
+    passing a row's key back as ``category``.
+    """
+
+    replica_reads = True
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAdminUser]
+    max_days = 366 * 2
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            end = date.fromisoformat(params["end"]) if "end" in params else None
+            start = date.fromisoformat(params["start"]) if "start" in params else None
+        except ValueError:
+            raise ParseError("start and end must be dates as YYYY-MM-DD.")
+        end = end or timezone.localdate()
+        start = start or end - timedelta(days=29)
+        if start > end:
+            raise ParseError("start must not be after end.")
+        if (end - start).days >= self.max_days:
+            raise ParseError(f"A report covers at most {self.max_days} days.")
+
+        by = params.get("by", "day")
+        if by not in analytics.GROUPINGS:
+            raise ParseError(f"by must be one of {', '.join(analytics.GROUPINGS)}.")
+
+        filters = {}
+        if "category" in params:
+            filters["category"] = generics.get_object_or_404(
+                Category, slug=params["category"]
+            )
+        if "product_type" in params:
+            filters["product_type"] = generics.get_object_or_404(
+                ProductType, id=params["product_type"]
+            )
+        if "product" in params:
+            filters["product"] = generics.get_object_or_404(
+                Product.objects.only("id"), slug=params["product"]
+            )
+
+        report = analytics.sales_report(start, end, by=by, **filters)
+        return Response(
+            {
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "by": by,
+                **report,
+                "status": status.HTTP_200_OK,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ProductReviewListView(APIView):
+    """
+    Get a page of reviews of a product, by product slug. Sort them with
+    ``?sort=newest`` (the default), ``highest`` or ``lowest`` rating, and pass
+    the returned `next` cursor as ``?cursor=`` for the following page.
+    """
+
+    permission_classes = [AllowAny]
+    replica_reads = True
+
+    # Unrated reviews only appear in the newest first order, as a cursor
+    # cannot continue from a missing rating.
+    orderings = {
+        "newest": ("-created_at", "-id"),
+        "highest": ("-rating", "-created_at", "-id"),
+        "lowest": ("rating", "-created_at", "-id"),
+    }
+
+    def get(self, request, slug):
+        product = generics.get_object_or_404(
+            Product.objects.only("id", "rating", "num_reviews", *RATING_COLUMNS),
+            slug=slug,
+        )
+
+        sort = request.query_params.get("sort", "newest")
+        if sort not in self.orderings:
+            raise ParseError(f"sort must be one of {', '.join(self.orderings)}.")
+        reviews = product.review_set.all()
+        if sort != "newest":
+            reviews = reviews.filter(rating__isnull=False)
+
+        paginator = KeysetPagination(self.orderings[sort])
+        page = paginator.paginate_queryset(reviews, request)
+        serializer = ReviewSerializer(page, many=True)
+
+        return Response(
+            {
+                "reviews": serializer.data,
+                "next": paginator.next_cursor,
+                "rating": product.rating,
+                "num_reviews": product.num_reviews,
+                "rating_histogram": histogram(product),
+                "status": status.HTTP_200_OK,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
 class CreateProductReviewView(APIView):
-    """Create a review for a particular product."""
+    """Create a review for a product, by product id."""
 
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
@@ -477,23 +1091,16 @@ class CreateProductReviewView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         else:
-            review = Review.objects.create(
-                product=product,
-                created_by=user,
-                name=user.first_name,
-                rating=data["rating"],
-                comment=data["comment"],
-            )
-
-            reviews = product.review_set.all()
-            product.num_reviews = len(reviews)
-
-            total_rating = 0
-            for i in reviews:
-                total_rating += i.rating
-
-            product.rating = total_rating / len(reviews)
-            product.save()
+            # The review and the rating columns counting it commit together.
+            with transaction.atomic():
+                review = Review.objects.create(
+                    product=product,
+                    created_by=user,
+                    name=user.first_name,
+                    rating=data["rating"],
+                    comment=data["comment"],
+                )
+                record_review(review)
 
             return Response(
                 {